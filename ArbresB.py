@@ -0,0 +1,520 @@
+# coding: utf-8
+
+from bisect import bisect_left
+import sys
+
+import ArbresRN
+
+class NoeudB:
+    """
+    Noeud d'un ArbreB: ses clés croissantes dans une liste, et la liste de
+    ses enfants (une de plus que de clés), None pour une feuille.
+
+    rougeAGauche ne sert qu'aux noeuds de deux clés, pour la correspondance
+    avec un arbre rouge-noir: la première clé est alors le fils rouge de la
+    seconde, sinon la seconde est le fils rouge de la première.
+    """
+    __slots__ = ('cles', 'enfants', 'rougeAGauche')
+
+    def __init__(self, cles, enfants=None, rougeAGauche=False):
+        self.cles = cles
+        self.enfants = enfants
+        self.rougeAGauche = rougeAGauche
+
+    def estFeuille(self):
+        return self.enfants is None
+
+
+class ArbreB:
+    """
+    B-arbre d'ordre 'ordre' (au moins 3): chaque noeud a au plus ordre - 1
+    clés et, sauf la racine, au moins ceil(ordre / 2) - 1; toutes les
+    feuilles sont à la même profondeur. Avec ordre=4 (par défaut), c'est
+    l'arbre 2-3-4 isomorphe aux arbres rouge-noir: un noeud noir et ses fils
+    rouges forment un noeud de l'arbre 2-3-4.
+
+    Les clés d'un noeud sont contiguës dans une liste, parcourue par
+    dichotomie (module bisect): une recherche ne visite que
+    O(log n / log ordre) objets, et l'arbre compte beaucoup moins d'objets
+    Python qu'un arbre de NoeudRN.
+
+    L'insertion et la recherche ont la même sémantique que
+    NoeudRN.insererRN(): une valeur déjà présente n'est pas insérée une
+    seconde fois. La forme obtenue n'est en revanche pas celle de l'arbre
+    rouge-noir construit par les mêmes insertions.
+
+    Conversions en O(n): depuisRN() et versRN(). Pour ordre=4, elles
+    conservent la forme et les couleurs de l'arbre rouge-noir (et donc la
+    forme de l'arbre 2-3-4); sinon, l'arbre d'arrivée est construit à partir
+    des valeurs triées.
+    """
+    def __init__(self, ordre=4):
+        if ordre < 3:
+            raise ValueError("L'ordre d'un B-arbre est au moins 3: {}".format(ordre))
+        self.ordre = ordre
+        self.minimum = (ordre + 1) // 2 - 1
+        self.racine = NoeudB([])
+        self.taille = 0
+
+    def __len__(self):
+        return self.taille
+
+    def estVide(self):
+        return self.taille == 0
+
+    def __contains__(self, valeur):
+        noeud = self.racine
+        while True:
+            cles = noeud.cles
+            i = bisect_left(cles, valeur)
+            if i < len(cles) and cles[i] == valeur: return True
+            if noeud.enfants is None: return False
+            noeud = noeud.enfants[i]
+
+    def __iter__(self):
+        """
+        Parcours infixe paresseux: une pile de (noeud, indice de la
+        prochaine clé), les feuilles étant rendues d'un bloc.
+        """
+        if self.estVide(): return
+        P = []
+        noeud = self.racine
+        while True:
+            while noeud.enfants is not None:
+                P.append((noeud, 0))
+                noeud = noeud.enfants[0]
+            yield from noeud.cles
+            while P:
+                noeud, i = P.pop()
+                if i < len(noeud.cles):
+                    yield noeud.cles[i]
+                    P.append((noeud, i + 1))
+                    noeud = noeud.enfants[i + 1]
+                    break
+            else:
+                return
+
+    def insererRN(self, valeur):
+        """
+        Insère la valeur dans une feuille; un noeud qui atteint 'ordre' clés
+        est coupé en deux, sa clé médiane remontant dans son parent, et
+        ainsi de suite jusqu'à la racine, qui est coupée en dernier recours
+        (seul cas où la hauteur augmente).
+        """
+        chemin = []
+        noeud = self.racine
+        while True:
+            cles = noeud.cles
+            i = bisect_left(cles, valeur)
+            if i < len(cles) and cles[i] == valeur: return
+            if noeud.enfants is None: break
+            chemin.append((noeud, i))
+            noeud = noeud.enfants[i]
+        noeud.cles.insert(i, valeur)
+        self.taille += 1
+
+        while len(noeud.cles) == self.ordre:
+            milieu = self.ordre // 2
+            cle = noeud.cles[milieu]
+            droite = NoeudB(noeud.cles[milieu+1:])
+            del noeud.cles[milieu:]
+            if noeud.enfants is not None:
+                droite.enfants = noeud.enfants[milieu+1:]
+                del noeud.enfants[milieu+1:]
+            if not chemin:
+                self.racine = NoeudB([cle], [noeud, droite])
+                return
+            noeud, i = chemin.pop()
+            noeud.cles.insert(i, cle)
+            noeud.enfants.insert(i + 1, droite)
+
+    # Un B-arbre n'a pas d'insertion sans rééquilibrage
+    inserer = insererRN
+
+    def _supprimer(self, valeur):
+        """
+        Supprime la valeur si elle est présente, et retourne un booléen
+        indiquant si elle l'était.
+
+        Une clé d'un noeud interne est remplacée par son prédécesseur, pris
+        dans une feuille. Une feuille qui passe sous le minimum emprunte une
+        clé à un frère voisin par l'intermédiaire du parent, ou, si aucun
+        frère ne peut en céder, fusionne avec l'un d'eux et la clé qui les
+        sépare: le parent peut alors passer à son tour sous le minimum.
+        """
+        chemin = []
+        noeud = self.racine
+        while True:
+            cles = noeud.cles
+            i = bisect_left(cles, valeur)
+            if i < len(cles) and cles[i] == valeur: break
+            if noeud.enfants is None: return False
+            chemin.append((noeud, i))
+            noeud = noeud.enfants[i]
+
+        if noeud.enfants is None:
+            del noeud.cles[i]
+        else:
+            chemin.append((noeud, i))
+            feuille = noeud.enfants[i]
+            while feuille.enfants is not None:
+                chemin.append((feuille, len(feuille.enfants) - 1))
+                feuille = feuille.enfants[-1]
+            noeud.cles[i] = feuille.cles.pop()
+            noeud = feuille
+        self.taille -= 1
+
+        while chemin and len(noeud.cles) < self.minimum:
+            parent, i = chemin.pop()
+            enfants = parent.enfants
+            if i > 0 and len(enfants[i-1].cles) > self.minimum:
+                gauche = enfants[i-1]
+                noeud.cles.insert(0, parent.cles[i-1])
+                parent.cles[i-1] = gauche.cles.pop()
+                if gauche.enfants is not None:
+                    noeud.enfants.insert(0, gauche.enfants.pop())
+                break
+            if i + 1 < len(enfants) and len(enfants[i+1].cles) > self.minimum:
+                droite = enfants[i+1]
+                noeud.cles.append(parent.cles[i])
+                parent.cles[i] = droite.cles.pop(0)
+                if droite.enfants is not None:
+                    noeud.enfants.append(droite.enfants.pop(0))
+                break
+            if i > 0: i -= 1
+            gauche, droite = enfants[i], enfants[i+1]
+            gauche.cles.append(parent.cles.pop(i))
+            gauche.cles.extend(droite.cles)
+            if gauche.enfants is not None:
+                gauche.enfants.extend(droite.enfants)
+            del enfants[i+1]
+            noeud = parent
+
+        if not self.racine.cles and self.racine.enfants is not None:
+            self.racine = self.racine.enfants[0]
+        return True
+
+    def supprimerRN(self, valeur):
+        """
+        Supprime une valeur et rééquilibre, comme NoeudRN.supprimerRN().
+        Lève KeyError si la valeur est absente.
+        """
+        if not self._supprimer(valeur):
+            raise KeyError(valeur)
+
+    def insererRNLot(self, valeurs):
+        """
+        Insère les valeurs du lot une à une, dans l'ordre croissant.
+        """
+        for valeur in sorted(set(valeurs)):
+            self.insererRN(valeur)
+
+    def discard(self, valeur):
+        self._supprimer(valeur)
+
+    def pop(self, valeur=None):
+        """
+        Supprime et retourne la valeur, ou la plus petite valeur de l'arbre
+        si aucune n'est précisée, comme NoeudRN.pop().
+        """
+        if valeur is None:
+            if self.estVide():
+                raise KeyError('pop dans un arbre vide')
+            noeud = self.racine
+            while noeud.enfants is not None: noeud = noeud.enfants[0]
+            valeur = noeud.cles[0]
+        self.supprimerRN(valeur)
+        return valeur
+
+    def calculerHauteur(self):
+        """
+        Nombre de niveaux sous la racine: une feuille est de hauteur 0.
+        """
+        hauteur = 0
+        noeud = self.racine
+        while noeud.enfants is not None:
+            noeud = noeud.enfants[0]
+            hauteur += 1
+        return hauteur
+
+    def octetsParCle(self):
+        """
+        Retourne la mémoire occupée par les noeuds et leurs listes, divisée
+        par le nombre de valeurs. Permet la comparaison avec
+        NoeudRN.octetsParCle().
+        """
+        if self.estVide(): return 0
+        octets = 0
+        P = [self.racine]
+        while P:
+            noeud = P.pop()
+            octets += sys.getsizeof(noeud) + sys.getsizeof(noeud.cles)
+            if noeud.enfants is not None:
+                octets += sys.getsizeof(noeud.enfants)
+                P.extend(noeud.enfants)
+        return octets / self.taille
+
+    def verifier(self):
+        """
+        Vérifie que l'arbre est un B-arbre valide: clés strictement
+        croissantes en ordre infixe, nombre de clés de chaque noeud, un
+        enfant de plus que de clés, feuilles à la même profondeur et
+        taille. Retourne None si l'arbre est valide, sinon la description
+        de la première violation rencontrée, comme NoeudRN.verifier().
+        """
+        profondeurFeuilles = None
+        precedente, compte = None, 0
+        P = [(self.racine, 0, 0)]
+        while P:
+            noeud, profondeur, i = P.pop()
+            cles = noeud.cles
+            if i == 0:
+                if len(cles) >= self.ordre:
+                    return 'Noeud de {} clés pour un ordre {}'.format(len(cles), self.ordre)
+                if noeud is not self.racine and len(cles) < self.minimum:
+                    return 'Noeud de {} clés, sous le minimum {}'.format(len(cles), self.minimum)
+                if noeud.enfants is None:
+                    if profondeurFeuilles is None: profondeurFeuilles = profondeur
+                    if profondeur != profondeurFeuilles:
+                        return 'Feuilles aux profondeurs {} et {}'.format(profondeurFeuilles, profondeur)
+                    for cle in cles:
+                        if compte and not precedente < cle:
+                            return 'Ordre: {} après {}'.format(cle, precedente)
+                        precedente, compte = cle, compte + 1
+                    continue
+                if len(noeud.enfants) != len(cles) + 1:
+                    return '{} enfants pour {} clés'.format(len(noeud.enfants), len(cles))
+            if i > 0:
+                cle = cles[i-1]
+                if compte and not precedente < cle:
+                    return 'Ordre: {} après {}'.format(cle, precedente)
+                precedente, compte = cle, compte + 1
+            if i < len(cles): P.append((noeud, profondeur, i + 1))
+            P.append((noeud.enfants[i], profondeur + 1, 0))
+        if compte != self.taille:
+            return 'Taille: {} clés pour une taille de {}'.format(compte, self.taille)
+        return None
+
+    """
+    Construction et conversions
+    """
+    @classmethod
+    def depuisTrie(cls, valeurs, ordre=4):
+        """
+        Construit un B-arbre à partir de valeurs croissantes, en temps
+        linéaire. Les doublons sont ignorés; lève ValueError si les valeurs
+        ne sont pas triées.
+
+        On prend la plus petite hauteur h qui permet de ranger les n
+        valeurs (un arbre plein de hauteur h en a ordre^(h+1) - 1), puis
+        chaque noeud répartit ses valeurs aussi également que possible entre
+        le moins d'enfants possible: chacun est alors au moins à moitié
+        plein, ce qui respecte le minimum de clés.
+        """
+        arbre = cls(ordre)
+        triees = []
+        for valeur in valeurs:
+            if triees:
+                if valeur == triees[-1]: continue
+                if valeur < triees[-1]:
+                    raise ValueError('Les valeurs ne sont pas triées: {} après {}.'.format(valeur, triees[-1]))
+            triees.append(valeur)
+        if not triees: return arbre
+
+        # capacites[h]: nombre de valeurs d'un arbre plein de hauteur h
+        capacites = [ordre - 1]
+        while capacites[-1] < len(triees):
+            capacites.append(ordre * (capacites[-1] + 1) - 1)
+        arbre.racine = cls._construire(triees, 0, len(triees), len(capacites) - 1, capacites)
+        arbre.taille = len(triees)
+        return arbre
+
+    @classmethod
+    def _construire(cls, valeurs, debut, fin, h, capacites):
+        if h == 0:
+            return NoeudB(valeurs[debut:fin])
+        # Un sous-arbre de c valeurs occupe c + 1 "places" (ses noeuds vides)
+        places = fin - debut + 1
+        k = -(-places // (capacites[h-1] + 1))
+        base, reste = divmod(places, k)
+        cles, enfants = [], []
+        for i in range(k):
+            suivant = debut + base + (i < reste) - 1
+            enfants.append(cls._construire(valeurs, debut, suivant, h - 1, capacites))
+            if i < k - 1: cles.append(valeurs[suivant])
+            debut = suivant + 1
+        return NoeudB(cles, enfants)
+
+    @classmethod
+    def depuisRN(cls, racine, ordre=4):
+        """
+        Construit en O(n) le B-arbre correspondant à l'arbre rouge-noir de
+        racine 'racine' (un NoeudRN ou une vue). Pour ordre=4, chaque noeud
+        noir et ses fils rouges deviennent un noeud de l'arbre 2-3-4, en
+        retenant de quel côté est le fils rouge d'un noeud de deux clés:
+        versRN() rend exactement l'arbre de départ. Pour un autre ordre, les
+        noeuds ainsi formés n'auraient pas le bon nombre de clés: l'arbre
+        est construit par depuisTrie().
+        """
+        if ordre != 4:
+            return cls.depuisTrie(racine, ordre)
+        arbre = cls(ordre)
+        if racine.estVide(): return arbre
+
+        P = [(racine, arbre.racine)]
+        while P:
+            noeud, b = P.pop()
+            fg, fd = noeud.fg, noeud.fd
+            # Sous-arbres noirs sous le groupe, de gauche à droite
+            sousArbres = []
+            if fg.couleur == 'R':
+                b.cles.append(fg.valeur)
+                sousArbres += [fg.fg, fg.fd]
+            else:
+                sousArbres.append(fg)
+            b.cles.append(noeud.valeur)
+            if fd.couleur == 'R':
+                b.cles.append(fd.valeur)
+                sousArbres += [fd.fg, fd.fd]
+            else:
+                sousArbres.append(fd)
+            b.rougeAGauche = fg.couleur == 'R' and fd.couleur != 'R'
+            arbre.taille += len(b.cles)
+            if not sousArbres[0].estVide():
+                b.enfants = [NoeudB([]) for _ in sousArbres]
+                P.extend(zip(sousArbres, b.enfants))
+        return arbre
+
+    def versRN(self, classe=ArbresRN.NoeudRN):
+        """
+        Retourne en O(n) la racine de l'arbre rouge-noir correspondant (des
+        noeuds de 'classe'). Jusqu'à l'ordre 4, chaque noeud devient un
+        noeud noir avec un fils rouge par clé supplémentaire (la clé du
+        milieu est noire dans un noeud de trois clés); au-delà, l'arbre est
+        construit par classe.depuisTrie(). Le ramasse-miettes est suspendu
+        pendant la construction (voir ArbresRN._sansRamasseMiettes).
+        """
+        if self.ordre > 4:
+            return classe.depuisTrie(self)
+        with ArbresRN._sansRamasseMiettes():
+            return self._versRN(classe)
+
+    def _versRN(self, classe):
+        racine = classe()
+        if self.estVide(): return racine
+
+        # Pile de (noeud du B-arbre, noeud rouge-noir vide à remplir)
+        P = [(self.racine, racine)]
+        while P:
+            b, noeud = P.pop()
+            cles = b.cles
+            i = 1 if len(cles) == 3 or (len(cles) == 2 and b.rougeAGauche) else 0
+            noeud.valeur = cles[i]
+            # Places des sous-arbres noirs, de gauche à droite: (parent, à gauche ?)
+            places = []
+            if i == 1:
+                noeud.fg = rouge = classe(parent=noeud)
+                rouge.valeur, rouge.couleur = cles[0], 'R'
+                places += [(rouge, True), (rouge, False)]
+            else:
+                places.append((noeud, True))
+            if i + 1 < len(cles):
+                noeud.fd = rouge = classe(parent=noeud)
+                rouge.valeur, rouge.couleur = cles[i+1], 'R'
+                places += [(rouge, True), (rouge, False)]
+            else:
+                places.append((noeud, False))
+
+            for j, (p, aGauche) in enumerate(places):
+                fils = classe(parent=p)
+                if aGauche: p.fg = fils
+                else:       p.fd = fils
+                if b.enfants is not None: P.append((b.enfants[j], fils))
+        return racine
+
+    def vue(self):
+        """
+        Retourne un NoeudRNArbreB représentant la racine de l'arbre
+        rouge-noir correspondant, utilisable partout où un NoeudRN est
+        attendu pour la lecture et l'affichage (tk_arbres.ArbreGraphique en
+        particulier, dont le morphisme RN <-> 234 regroupe alors exactement
+        les clés de chaque noeud). Seulement jusqu'à l'ordre 4: au-delà, un
+        noeud n'a pas d'équivalent rouge-noir.
+        """
+        if self.ordre > 4:
+            raise ValueError("Pas de vue rouge-noir pour un B-arbre d'ordre {}".format(self.ordre))
+        return NoeudRNArbreB(self, self.racine if self.taille else None)
+
+
+class NoeudRNArbreB(ArbresRN.NoeudRNLecture):
+    """
+    Adaptateur présentant l'arbre rouge-noir correspondant à un ArbreB
+    d'ordre au plus 4, sur le modèle de ArbresRNTableau.NoeudRNTableau:
+
+     - une vue désigne les clés debut à fin - 1 d'un noeud du B-arbre: tout
+       le noeud pour son noeud noir, une seule clé pour un fils rouge
+     - les vues des fils sont créées à la demande puis conservées
+     - les noeuds vides (noeud None) ont chacun leur vue
+     - seule la racine (obtenue par ArbreB.vue()) permet de modifier
+       l'arbre: inserer(), insererRN(), insererRNLot(), supprimerRN(),
+       discard() et pop() sont confiés à l'ArbreB; les autres
+       modifications lèvent TypeError (voir ArbresRN.NoeudRNLecture)
+    """
+    def __init__(self, arbre, noeud, debut=0, fin=None, parent=None):
+        self.arbre = arbre
+        self.noeud = noeud
+        self.debut = debut
+        self.fin = len(noeud.cles) if fin is None and noeud is not None else fin
+        self._p = parent
+        self._fg = None
+        self._fd = None
+        self.verbosite = 0
+
+    def _indice(self):
+        """
+        Indice, dans le noeud du B-arbre, de la clé portée par cette vue.
+        """
+        k = self.fin - self.debut
+        if k == 3 or (k == 2 and self.noeud.rougeAGauche): return self.debut + 1
+        return self.debut
+
+    def _enfant(self, j):
+        enfants = self.noeud.enfants
+        return NoeudRNArbreB(self.arbre, None if enfants is None else enfants[j], parent=self)
+
+    @property
+    def valeur(self):
+        if self.noeud is None: return None
+        return self.noeud.cles[self._indice()]
+
+    @property
+    def couleur(self):
+        if self.noeud is None or self.fin - self.debut == len(self.noeud.cles): return 'N'
+        return 'R'
+
+    @property
+    def p(self):
+        return self._p
+
+    @property
+    def fg(self):
+        if self.noeud is None: return None
+        if self._fg is None:
+            i = self._indice()
+            if i > self.debut: self._fg = NoeudRNArbreB(self.arbre, self.noeud, self.debut, i, self)
+            else:              self._fg = self._enfant(i)
+        return self._fg
+
+    @property
+    def fd(self):
+        if self.noeud is None: return None
+        if self._fd is None:
+            i = self._indice()
+            if i + 1 < self.fin: self._fd = NoeudRNArbreB(self.arbre, self.noeud, i + 1, self.fin, self)
+            else:                self._fd = self._enfant(i + 1)
+        return self._fd
+
+    def _resynchroniser(self):
+        self.noeud = self.arbre.racine if self.arbre.taille else None
+        self.debut = 0
+        self.fin = len(self.noeud.cles) if self.noeud is not None else None
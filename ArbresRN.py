@@ -1,7 +1,30 @@
 # coding: utf-8
 
+import contextlib
+import functools
+import gc
+import heapq
 import random
-import time
+import sys
+from collections import deque
+
+@contextlib.contextmanager
+def _sansRamasseMiettes():
+    """
+    Suspend le ramasse-miettes cyclique pendant la construction d'un
+    arbre: les noeuds, reliés à leur parent, forment des cycles qu'il
+    parcourrait sans cesse alors qu'aucun ne peut être libéré. Il est
+    ensuite réactivé s'il était actif.
+
+    Attention: gc.disable() vaut pour tout le processus, y compris les
+    autres threads, jusqu'à la fin de la construction.
+    """
+    actif = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if actif: gc.enable()
 
 class NoeudRN:
     """
@@ -38,14 +61,24 @@ class NoeudRN:
          ou deux fils vides
        - on pourrait n'utiliser qu'un seul noeud vide pour toutes les
          feuilles
-       - la suppression n'est pas implémentée
+       - pour supprimer une valeur portée par un noeud à deux fils, on
+         recopie la valeur de son successeur, puis on supprime ce dernier
     """
+    # Taille du sous-arbre, maintenue seulement après activerTailles().
+    # Ces attributs de classe servent de valeurs par défaut: un noeud n'a
+    # son propre attribut taille que si l'option est activée, et seule la
+    # racine a un attribut _avecTailles.
+    taille = None
+    _avecTailles = False
+    # Compteurs, sur la racine seulement, après activerStatistiques()
+    _statistiques = None
+
     def __init__(self, valeur=None, parent=None):
         self.valeur = valeur
 
         # Si le noeud n'est pas vide, on lui ajoute deux fils vides
-        self.fg = None if valeur is None else NoeudRN()
-        self.fd = None if valeur is None else NoeudRN()
+        self.fg = None if valeur is None else type(self)()
+        self.fd = None if valeur is None else type(self)()
 
         # On relie le noeud à son parent
         self.p = parent
@@ -103,6 +136,108 @@ class NoeudRN:
             h = 1 if self.couleur == 'N' else 0
 
             return h + max(hg,hd)
+
+    def verifier(self, echantillons=None):
+        """
+        Vérifie que l'arbre de racine self est un arbre rouge-noir valide:
+         - ordre d'ABR: les valeurs sont strictement croissantes en ordre
+           infixe
+         - règles 1 à 4 (voir la docstring de la classe)
+         - structure: seuls les noeuds vides n'ont pas de fils, chaque fils
+           a pour parent son père et la racine n'a pas de parent
+         - tailles des sous-arbres, si elles sont maintenues
+
+        Retourne None si l'arbre est valide, sinon la description de la
+        première violation rencontrée.
+
+        Par défaut, l'arbre est parcouru une seule fois, en O(n): le nombre
+        de noeuds noirs est compté en descendant, et comparé en chaque noeud
+        vide au nombre trouvé sur le premier chemin.
+
+        Avec echantillons=k, on ne vérifie que le chemin le plus à gauche et
+        k chemins de la racine à un noeud vide tirés au hasard, en
+        O(k log n). Les violations situées hors de ces chemins passent
+        inaperçues.
+        """
+        if self.p is not None:
+            return 'Structure: la racine a pour parent {}'.format(self.p.valeur)
+        if self.couleur != 'N':
+            return 'Règle 2: la racine est rouge'
+
+        noirs = None
+        if echantillons is None:
+            P = [(self, None, None, 0)]
+            while P:
+                noeud, mini, maxi, n = P.pop()
+                erreur = self._verifierNoeud(noeud, mini, maxi)
+                if erreur: return erreur
+                if noeud.couleur == 'N': n += 1
+                if noeud.fg is None:
+                    if noirs is None: noirs = n
+                    elif n != noirs:
+                        return self._erreurHauteurNoire(noeud, n, noirs)
+                    continue
+                P.append((noeud.fd, noeud.valeur, maxi, n))
+                P.append((noeud.fg, mini, noeud.valeur, n))
+            return None
+
+        for k in range(echantillons + 1):
+            noeud, mini, maxi, n = self, None, None, 0
+            while True:
+                erreur = self._verifierNoeud(noeud, mini, maxi)
+                if erreur: return erreur
+                if noeud.couleur == 'N': n += 1
+                if noeud.fg is None: break
+                # Le premier chemin est celui de gauche, les autres au hasard
+                if k == 0 or random.random() < 0.5:
+                    noeud, maxi = noeud.fg, noeud.valeur
+                else:
+                    noeud, mini = noeud.fd, noeud.valeur
+            if noirs is None: noirs = n
+            elif n != noirs:
+                return self._erreurHauteurNoire(noeud, n, noirs)
+        return None
+
+    def _verifierNoeud(self, noeud, mini, maxi):
+        """
+        Vérifications locales de verifier(), pour un noeud dont la valeur
+        doit être strictement comprise entre mini et maxi (None: pas de
+        borne). Retourne la description de la violation, ou None.
+        """
+        if noeud.couleur not in ('R', 'N'):
+            return 'Règle 1: couleur {!r} pour le noeud {}'.format(noeud.couleur, noeud.valeur)
+
+        if noeud.valeur is None:
+            if noeud.fg is not None or noeud.fd is not None:
+                return 'Structure: noeud vide avec des fils, sous {}'.format(noeud.p.valeur)
+            if noeud.couleur != 'N':
+                return 'Règle 2: noeud vide rouge, sous {}'.format(noeud.p.valeur)
+            return None
+
+        if noeud.fg is None or noeud.fd is None:
+            return 'Structure: le noeud {} n\'a pas deux fils'.format(noeud.valeur)
+        if (mini is not None and not mini < noeud.valeur) or \
+           (maxi is not None and not noeud.valeur < maxi):
+            return 'Ordre: {} n\'est pas entre {} et {}'.format(noeud.valeur, mini, maxi)
+
+        for fils in (noeud.fg, noeud.fd):
+            if fils.p is not noeud:
+                return 'Structure: un fils de {} a pour parent {}'.format(
+                       noeud.valeur, None if fils.p is None else fils.p.valeur)
+            if noeud.couleur == 'R' and fils.couleur == 'R':
+                return 'Règle 3: le noeud rouge {} a un fils rouge {}'.format(
+                       noeud.valeur, fils.valeur)
+
+        if self._avecTailles:
+            attendue = noeud.fg._tailleSousArbre() + noeud.fd._tailleSousArbre() + 1
+            if noeud.taille != attendue:
+                return 'Taille: le noeud {} a une taille {}, ses fils et lui en totalisent {}'.format(
+                       noeud.valeur, noeud.taille, attendue)
+        return None
+
+    def _erreurHauteurNoire(self, vide, n, noirs):
+        return 'Règle 4: {} noeuds noirs jusqu\'au noeud vide sous {}, {} ailleurs'.format(
+               n, vide.p.valeur, noirs)
             
     def calculerGeneration(self):
         if self.estRacine():
@@ -140,183 +275,1136 @@ class NoeudRN:
             ....,
           ]
         """
-        if self.estVide(): return []
-        F = [] # File pour le parcours en largeur
-        liste = []
-        F.append(self)
+        return list(self.generations())
+
+    def generations(self, inclureNIL=True):
+        """
+        Générateur des générations de noeuds, une liste par génération, de
+        la racine vers les feuilles. Avec inclureNIL=False, les noeuds vides
+        sont omis.
+
+        Parcours en largeur en O(n): la file est une deque, et chaque noeud
+        y entre avec sa génération, celle de son parent plus un, ce qui évite
+        de la recalculer en remontant jusqu'à la racine. Seule la génération
+        courante est gardée en mémoire, avec la file.
+        """
+        if self.estVide(): return
+        F = deque([(self, 0)]) # File pour le parcours en largeur
+        generation, courante = 0, []
         while F:
-            noeud = F.pop(0)
-            if not liste:
-                liste.append([noeud])
-            else:
-                if noeud.calculerGeneration() == liste[-1][-1].calculerGeneration():
-                    liste[-1].append(noeud)
-                else:
-                    liste.append([noeud])
+            noeud, g = F.popleft()
+            if g != generation:
+                yield courante
+                generation, courante = g, []
+            courante.append(noeud)
             if not noeud.estVide():
-                F.append(noeud.fg)
-                F.append(noeud.fd)
-        return liste
+                if inclureNIL or not noeud.fg.estVide(): F.append((noeud.fg, g+1))
+                if inclureNIL or not noeud.fd.estVide(): F.append((noeud.fd, g+1))
+        yield courante
 
     def calculerLargeur(self):
         """
         Retourne le nombre de noeuds de la génération la plus nombreuse.
         """
-        liste = self.listeGenerations()
-        if liste: return max(len(gen) for gen in liste)
-        else:     return 0
+        return max((len(gen) for gen in self.generations()), default=0)
+
+    def octetsParCle(self):
+        """
+        Retourne la mémoire occupée par l'arbre (noeuds, noeuds vides et
+        leurs dictionnaires d'attributs), divisée par le nombre de valeurs.
+        Permet la comparaison avec ArbreRNCompact.octetsParCle().
+        """
+        octets, cles = 0, 0
+        P = [self] # Pile pour le parcours
+        while P:
+            noeud = P.pop()
+            octets += sys.getsizeof(noeud) + sys.getsizeof(noeud.__dict__)
+            if not noeud.estVide():
+                cles += 1
+                P.append(noeud.fg)
+                P.append(noeud.fd)
+        return octets / cles if cles else 0
+
+    @classmethod
+    def depuisTrie(cls, valeurs, trier=False):
+        """
+        Construit un arbre rouge-noir à partir de valeurs croissantes, en
+        temps linéaire et sans rotation. Les doublons sont ignorés, comme
+        pour insererRN(). Lève ValueError si les valeurs ne sont pas triées.
+
+        'valeurs' est parcouru une seule fois: un générateur n'est jamais
+        mis en liste, sauf avec trier=True, où les valeurs sont d'abord
+        triées.
+
+        Principe (compteur binaire):
+         - les valeurs arrivent alternativement comme racine d'un arbre
+           parfait entièrement noir et comme séparateur à sa droite
+         - deux arbres parfaits de même hauteur, séparés par une valeur,
+           sont réunis en un arbre parfait de hauteur supérieure
+         - à la fin, la pile contient des arbres parfaits de hauteurs
+           strictement décroissantes, que l'on raccorde de droite à gauche:
+           le séparateur, colorié en rouge, est placé sur la branche droite
+           de l'arbre de gauche, à la hauteur noire de l'arbre de droite
+
+        Le ramasse-miettes est suspendu pendant la construction (voir
+        _sansRamasseMiettes).
+        """
+        with _sansRamasseMiettes():
+            return cls._depuisTrie(valeurs, trier)
+
+    @classmethod
+    def _depuisTrie(cls, valeurs, trier):
+        if trier: valeurs = sorted(valeurs)
+
+        # Pile de [arbre parfait, hauteur, séparateur à sa droite ou None]
+        pile = []
+        precedente = None
+        for valeur in valeurs:
+            if precedente is not None:
+                if valeur == precedente: continue
+                if valeur < precedente:
+                    raise ValueError('Les valeurs ne sont pas triées: {} après {}.'.format(valeur, precedente))
+            precedente = valeur
+
+            if pile and pile[-1][2] is None:
+                pile[-1][2] = valeur
+                continue
+
+            arbre = cls()
+            arbre.valeur = valeur
+            arbre.fg = cls(parent=arbre)
+            arbre.fd = cls(parent=arbre)
+            hauteur = 1
+            while pile and pile[-1][1] == hauteur:
+                gauche, _, separateur = pile.pop()
+                arbre = cls._relier(gauche, separateur, arbre, 'N')
+                hauteur += 1
+            pile.append([arbre, hauteur, None])
+
+        if not pile: return cls()
+
+        # Raccordement des arbres de la pile, de droite à gauche
+        droite, hauteurDroite = None, 0
+        while pile:
+            gauche, hauteur, separateur = pile.pop()
+            if separateur is not None:
+                if droite is None: droite = cls()
+                noeud = gauche
+                for _ in range(hauteur - hauteurDroite): noeud = noeud.fd
+                parent = noeud.p
+                parent.fd = cls._relier(noeud, separateur, droite, 'R')
+                parent.fd.p = parent
+            droite, hauteurDroite = gauche, hauteur
+        return droite
+
+    @classmethod
+    def _relier(cls, gauche, valeur, droite, couleur):
+        """
+        Crée un noeud portant la valeur, avec les sous-arbres gauche et droite.
+        """
+        noeud = cls()
+        noeud.valeur = valeur
+        noeud.couleur = couleur
+        noeud.fg = gauche
+        noeud.fd = droite
+        gauche.p = noeud
+        droite.p = noeud
+        return noeud
+
+    # Drapeaux de serialiser(), un octet par noeud
+    ROUGE, AVEC_FG, AVEC_FD = 1, 2, 4
+
+    def serialiser(self):
+        """
+        Forme compacte de l'arbre de racine self, qui conserve sa forme et
+        ses couleurs: retourne la liste des valeurs en ordre préfixe et un
+        objet bytes d'un octet par noeud (ROUGE, AVEC_FG, AVEC_FD). Les
+        noeuds vides ne sont pas représentés.
+        """
+        valeurs, drapeaux = [], bytearray()
+        P = [self]
+        while P:
+            noeud = P.pop()
+            if noeud.valeur is None: continue
+            valeurs.append(noeud.valeur)
+            drapeaux.append((noeud.couleur == 'R') |
+                            (noeud.fg.valeur is not None) << 1 |
+                            (noeud.fd.valeur is not None) << 2)
+            P.append(noeud.fd)
+            P.append(noeud.fg)
+        return valeurs, bytes(drapeaux)
+
+    @classmethod
+    def deserialiser(cls, valeurs, drapeaux):
+        """
+        Reconstruit en temps linéaire l'arbre produit par serialiser().
+        Le ramasse-miettes est suspendu pendant la reconstruction (voir
+        _sansRamasseMiettes).
+        """
+        with _sansRamasseMiettes():
+            return cls._deserialiser(valeurs, drapeaux)
+
+    @classmethod
+    def _deserialiser(cls, valeurs, drapeaux):
+        # Pile des places libres, (parent, à gauche ?): en ordre préfixe,
+        # le noeud suivant occupe toujours la dernière place ouverte
+        racine = cls()
+        places = []
+        for valeur, d in zip(valeurs, drapeaux):
+            if places:
+                p, aGauche = places.pop()
+                noeud = cls(parent=p)
+                if aGauche: p.fg = noeud
+                else:       p.fd = noeud
+            else:
+                noeud = racine
+            noeud.valeur = valeur
+            if d & cls.ROUGE: noeud.couleur = 'R'
+            if d & cls.AVEC_FD: places.append((noeud, False))
+            else:               noeud.fd = cls(parent=noeud)
+            if d & cls.AVEC_FG: places.append((noeud, True))
+            else:               noeud.fg = cls(parent=noeud)
+        return racine
+
+    def sauvegarder(self, chemin):
+        """
+        Écrit les valeurs (entiers ou flottants) dans un fichier binaire:
+        voir ArbresRNFichier. La forme de l'arbre n'est pas conservée.
+        """
+        # Import local: ArbresRNFichier importe ce module
+        import ArbresRNFichier
+        ArbresRNFichier.sauvegarder(self, chemin)
+
+    @classmethod
+    def charger(cls, chemin):
+        """
+        Reconstruit en temps linéaire un arbre écrit par sauvegarder().
+        """
+        import ArbresRNFichier
+        return ArbresRNFichier.charger(chemin, cls)
+
+    """
+    Recherches
+
+    Les noeuds retournés ne restent valables que tant que l'arbre n'est pas
+    modifié: les rotations déplacent les valeurs d'un noeud à l'autre.
+    """
+    def rechercher(self, valeur):
+        """
+        Retourne le noeud portant la valeur, None si elle est absente.
+        """
+        noeud = self
+        v = noeud.valeur
+        while v is not None:
+            if   valeur > v: noeud = noeud.fd
+            elif valeur < v: noeud = noeud.fg
+            else: return noeud
+            v = noeud.valeur
+        return None
+
+    def __contains__(self, valeur):
+        return self.rechercher(valeur) is not None
+
+    def plancher(self, valeur):
+        """
+        Retourne le noeud portant la plus grande valeur inférieure ou égale
+        à 'valeur', None s'il n'y en a pas.
+        """
+        meilleur = None
+        noeud = self
+        v = noeud.valeur
+        while v is not None:
+            if valeur < v:
+                noeud = noeud.fg
+            elif valeur > v:
+                meilleur = noeud
+                noeud = noeud.fd
+            else:
+                return noeud
+            v = noeud.valeur
+        return meilleur
+
+    def plafond(self, valeur):
+        """
+        Retourne le noeud portant la plus petite valeur supérieure ou égale
+        à 'valeur', None s'il n'y en a pas.
+        """
+        meilleur = None
+        noeud = self
+        v = noeud.valeur
+        while v is not None:
+            if valeur > v:
+                noeud = noeud.fd
+            elif valeur < v:
+                meilleur = noeud
+                noeud = noeud.fg
+            else:
+                return noeud
+            v = noeud.valeur
+        return meilleur
+
+    def minimum(self):
+        """
+        Retourne le noeud portant la plus petite valeur du sous-arbre,
+        None si le sous-arbre est vide.
+        """
+        if self.estVide(): return None
+        noeud = self
+        while not noeud.fg.estVide(): noeud = noeud.fg
+        return noeud
+
+    def maximum(self):
+        """
+        Retourne le noeud portant la plus grande valeur du sous-arbre,
+        None si le sous-arbre est vide.
+        """
+        if self.estVide(): return None
+        noeud = self
+        while not noeud.fd.estVide(): noeud = noeud.fd
+        return noeud
+
+    def successeur(self):
+        """
+        Retourne le noeud portant la valeur suivante dans l'arbre, None si
+        self porte la plus grande valeur.
+
+        Les pointeurs vers les parents évitent toute pile: parcourir n
+        noeuds successifs ne traverse chaque arête que deux fois, soit un
+        coût amorti constant par appel.
+        """
+        if not self.fd.estVide():
+            return self.fd.minimum()
+        noeud = self
+        while noeud.estFilsDroit(): noeud = noeud.p
+        return noeud.p
+
+    def predecesseur(self):
+        """
+        Retourne le noeud portant la valeur précédente dans l'arbre, None si
+        self porte la plus petite valeur. Symétrique de successeur().
+        """
+        if not self.fg.estVide():
+            return self.fg.maximum()
+        noeud = self
+        while noeud.estFilsGauche(): noeud = noeud.p
+        return noeud.p
+
+    """
+    Parcours paresseux
+
+    Les générateurs ci-dessous ne construisent jamais la liste des valeurs:
+    ils n'utilisent qu'une pile de hauteur O(log n), ou les pointeurs vers
+    les parents. L'arbre ne doit pas être modifié pendant le parcours.
+    """
+    def _noeudsEnOrdre(self, decroissant=False):
+        """
+        Générateur des noeuds non vides dans l'ordre croissant des valeurs,
+        ou décroissant (parcours infixe avec une pile explicite).
+        """
+        P = []
+        noeud = self
+        while P or not noeud.estVide():
+            if not noeud.estVide():
+                P.append(noeud)
+                noeud = noeud.fd if decroissant else noeud.fg
+            else:
+                noeud = P.pop()
+                yield noeud
+                noeud = noeud.fg if decroissant else noeud.fd
+
+    def __iter__(self):
+        for noeud in self._noeudsEnOrdre():
+            yield noeud.valeur
+
+    def __reversed__(self):
+        for noeud in self._noeudsEnOrdre(decroissant=True):
+            yield noeud.valeur
+
+    def intervalle(self, a, b, inclureBornes=True):
+        """
+        Générateur des valeurs v comprises entre a et b, dans l'ordre
+        croissant. inclureBornes est un booléen, ou un couple de booléens
+        pour traiter séparément les bornes a et b.
+
+        Le premier noeud est trouvé en O(log n), puis on passe d'un noeud
+        au suivant avec successeur(): un coût total O(log n + k) pour k
+        valeurs produites.
+        """
+        if isinstance(inclureBornes, bool):
+            inclureBornes = (inclureBornes, inclureBornes)
+        inclureA, inclureB = inclureBornes
+
+        noeud = self.plafond(a)
+        if noeud is not None and not inclureA and not noeud.valeur > a:
+            noeud = noeud.successeur()
+        while noeud is not None:
+            v = noeud.valeur
+            if v > b or (v == b and not inclureB): return
+            yield v
+            noeud = noeud.successeur()
+
+    """
+    Statistiques d'ordre
+
+    Après activerTailles(), chaque noeud non vide connaît la taille de son
+    sous-arbre, maintenue par les insertions, les suppressions et les
+    rotations pour un coût O(log n) par opération. Les méthodes rang(),
+    selection() et compterIntervalle() l'activent si nécessaire.
+    """
+    def activerTailles(self):
+        """
+        Calcule la taille de chaque sous-arbre (parcours postfixe itératif,
+        O(n)) et demande à l'arbre de racine self de la maintenir.
+        """
+        assert self.estRacine()
+        self._avecTailles = True
+        P = [(self, False)]
+        while P:
+            noeud, filsTraites = P.pop()
+            if noeud.estVide(): continue
+            if filsTraites:
+                noeud.taille = noeud.fg._tailleSousArbre() + noeud.fd._tailleSousArbre() + 1
+            else:
+                P.append((noeud, True))
+                P.append((noeud.fg, False))
+                P.append((noeud.fd, False))
+
+    def _tailleSousArbre(self):
+        return 0 if self.valeur is None else self.taille
+
+    def rang(self, valeur):
+        """
+        Retourne le nombre de valeurs strictement inférieures à 'valeur'.
+        """
+        if not self._avecTailles: self.activerTailles()
+        rang = 0
+        noeud = self
+        v = noeud.valeur
+        while v is not None:
+            if valeur > v:
+                rang += noeud.fg._tailleSousArbre() + 1
+                noeud = noeud.fd
+            elif valeur < v:
+                noeud = noeud.fg
+            else:
+                return rang + noeud.fg._tailleSousArbre()
+            v = noeud.valeur
+        return rang
+
+    def selection(self, i):
+        """
+        Retourne le noeud portant la i-ème plus petite valeur (à partir de 0).
+        Lève IndexError si i est hors de l'arbre.
+        """
+        if not self._avecTailles: self.activerTailles()
+        if not 0 <= i < self._tailleSousArbre():
+            raise IndexError(i)
+        noeud = self
+        while True:
+            tailleGauche = noeud.fg._tailleSousArbre()
+            if i < tailleGauche:
+                noeud = noeud.fg
+            elif i > tailleGauche:
+                i -= tailleGauche + 1
+                noeud = noeud.fd
+            else:
+                return noeud
+
+    def compterIntervalle(self, a, b):
+        """
+        Retourne le nombre de valeurs v telles que a <= v <= b.
+        """
+        if b < a: return 0
+        compte = self.rang(b) - self.rang(a)
+        if self.rechercher(b) is not None: compte += 1
+        return compte
 
     def insererRandom(self,eventail=1000):
         v = random.randrange(eventail)
         self.inserer(v)
     
-    def inserer(self,valeur, parent=None):
+    def inserer(self, valeur):
         """
         Insère une valeur en respectant la structure d'ABR.
         Ne réquilibre pas.
         """
-        if self.estVide():
-            self.valeur = valeur
-            self.fg = NoeudRN(parent=self)  # Essentiel pour les terminaisons
-            self.fd = NoeudRN(parent=self)  # Idem
-            self.p = parent
-            if parent: self.couleur = 'R'
-        else:
-            if   valeur > self.valeur: self.fd.inserer(valeur, self)
-            elif valeur < self.valeur: self.fg.inserer(valeur, self)
-            else:
-                if self.verbosite == 1:
-                    print('La valeur se trouve déjà dans l\'arbre.')
+        noeud = self._placeDe(valeur, self)
+        if not noeud.estVide():
+            if self._statistiques is not None:
+                self._compterDescente(noeud, self, trouve=True)
+            if self.verbosite == 1:
+                print('La valeur se trouve déjà dans l\'arbre.')
+            return
+
+        self._remplir(noeud, valeur)
+        if self._statistiques is not None:
+            self._compterDescente(noeud, self)
+        if not noeud.estRacine(): noeud.couleur = 'R'
+        self._marquer(noeud)
+
+    def _placeDe(self, valeur, depart):
+        """
+        Descend depuis le noeud 'depart' et retourne le noeud qui porte la
+        valeur, ou à défaut le noeud vide où elle doit être placée.
+        """
+        noeud = depart
+        v = noeud.valeur
+        while v is not None:
+            if   valeur > v: noeud = noeud.fd
+            elif valeur < v: noeud = noeud.fg
+            else: break
+            v = noeud.valeur
+        return noeud
+
+    def _remplir(self, noeud, valeur):
+        """
+        Le noeud vide 'noeud' de l'arbre de racine self devient une feuille
+        portant la valeur.
+        """
+        noeud.valeur = valeur
+        noeud.fg = type(noeud)(parent=noeud)  # Essentiel pour les terminaisons
+        noeud.fd = type(noeud)(parent=noeud)  # Idem
+
+        if self._avecTailles:
+            noeud.taille = 1
+            ancetre = noeud.p
+            while ancetre is not None:
+                ancetre.taille += 1
+                ancetre = ancetre.p
+
+    def activerStatistiques(self):
+        """
+        Active les compteurs de l'arbre de racine self, remis à zéro:
+         - insertions, suppressions, reconstructions (par insererRNLot)
+         - comparaisons de valeurs lors des descentes, déduites du chemin
+           suivi
+         - allocations de noeuds par les insertions (les reconstructions ne
+           sont pas détaillées)
+         - recolorations, rotationsGauches, rotationsDroites: faites par les
+           corrections; les rotations comptent aussi celles des suppressions
+         - 'cas 0', 'cas 1', 'cas 2-1', 'cas 2-2': cas rencontrés par
+           corrigerInsertion()
+         - profondeurs: nombre de noeuds insérés à chaque profondeur, avant
+           les corrections
+
+        Désactivés, ils ne coûtent qu'un test par insertion ou suppression
+        (et un par cas de correction).
+        """
+        self._statistiques = {'insertions': 0, 'suppressions': 0,
+                              'reconstructions': 0, 'comparaisons': 0,
+                              'allocations': 0, 'recolorations': 0,
+                              'rotationsGauches': 0, 'rotationsDroites': 0,
+                              'cas 0': 0, 'cas 1': 0, 'cas 2-1': 0, 'cas 2-2': 0,
+                              'profondeurs': {}}
+
+    def desactiverStatistiques(self):
+        self._statistiques = None
+
+    def reinitialiserStatistiques(self):
+        if self._statistiques is not None:
+            self.activerStatistiques()
 
-    def insererRN(self,valeur, parent=None):
+    def statistiques(self):
+        """
+        Retourne une copie des compteurs, ou None s'ils sont désactivés.
+        """
+        if self._statistiques is None: return None
+        stats = dict(self._statistiques)
+        stats['profondeurs'] = dict(sorted(stats['profondeurs'].items()))
+        return stats
+
+    def _compterDescente(self, noeud, depart, trouve=False):
+        """
+        Met à jour les compteurs après une descente de 'depart' jusqu'à
+        'noeud', qui vient de recevoir la valeur, ou qui la portait déjà si
+        trouve est vrai. La descente fait une comparaison pour aller à
+        droite, deux pour aller à gauche ou pour reconnaître la valeur.
+        """
+        stats = self._statistiques
+        comparaisons = 2 if trouve else 0
+        profondeur = 0
+        n, avantDepart = noeud, True
+        while n.p is not None:
+            if n is depart: avantDepart = False
+            if avantDepart: comparaisons += 1 if n is n.p.fd else 2
+            profondeur += 1
+            n = n.p
+        stats['comparaisons'] += comparaisons
+        if not trouve:
+            stats['insertions'] += 1
+            stats['allocations'] += 2  # les deux fils vides
+            profondeurs = stats['profondeurs']
+            profondeurs[profondeur] = profondeurs.get(profondeur, 0) + 1
+
+    def insererRN(self, valeur):
         """
         Insère une valeur en respectant la structure d'ABR.
         Rééquilibre en tenant compte de la structure d'arbre RN.
+
+        La descente est itérative, puis les corrections remontent vers la
+        racine dans une boucle. Les rotations ne font que relier des
+        pointeurs, et le noeud vide atteint devient lui-même le nouveau
+        noeud.
+
+        Une insertion crée donc deux noeuds, et non un seul: les deux fils
+        vides du nouveau noeud. Chaque NoeudRN a ses propres fils vides,
+        avec un lien vers leur parent, dont se servent supprimerNoeud(),
+        corrigerSuppression() et le calcul de la géométrie (les noeuds
+        vides y sont dessinés à leur place). Un noeud vide partagé
+        demanderait de reprendre ces parcours: c'est le choix fait par
+        ArbreRNCompact, qui ne crée qu'un noeud par insertion.
         """
         if self.verbosite == 1:
             print(80*'=')
-            print('Insertion de la valeur {} dans {}.'.format(valeur,self.valeur)) 
+            print('Insertion de la valeur {}.'.format(valeur))
             print(80*'=')
-            
-        if self.estVide():
-            self.valeur = valeur
-            self.fg = NoeudRN(parent=self)  # Essentiel pour les terminaisons
-            self.fd = NoeudRN(parent=self)  # Idem
-            self.p = parent
-            if parent: self.couleur = 'R'   # Un noeud est rouge juste avant l'insertion
-        else:
-            if   valeur > self.valeur: self.fd.insererRN(valeur, self)
-            elif valeur < self.valeur: self.fg.insererRN(valeur, self)
-            else:
-                if self.verbosite == 1:
-                    print('La valeur se trouve déjà dans l\'arbre.')
 
+        self._insererRN(valeur, self)
+
+    def _insererRN(self, valeur, depart):
+        """
+        Insère la valeur dans l'arbre de racine self en descendant depuis le
+        noeud 'depart', dont le sous-arbre doit pouvoir contenir la valeur.
+        Retourne le noeud qui porte la valeur après les corrections.
         """
-        Si la parent est noir, pas de problème, sinon la règle 3 est violée.
+        noeud = self._placeDe(valeur, depart)
+        if not noeud.estVide():
+            if self._statistiques is not None:
+                self._compterDescente(noeud, depart, trouve=True)
+            if self.verbosite == 1:
+                print('La valeur se trouve déjà dans l\'arbre.')
+            return noeud
+
+        return self._insererDans(noeud, valeur, depart)
+
+    def _insererDans(self, noeud, valeur, depart):
         """
-                
-        # Corrections pour satisfaire à toutes les règles
+        Le noeud vide 'noeud', atteint en descendant depuis 'depart', reçoit
+        la valeur, puis l'arbre de racine self est rééquilibré. Retourne le
+        noeud qui porte la valeur après les corrections.
         """
-        Cas 0: le noeud est la racine, violation de la règle 2.
+        self._remplir(noeud, valeur)
+        if self._statistiques is not None:
+            self._compterDescente(noeud, depart)
+        noeud.couleur = 'R' # Un noeud est rouge juste avant l'insertion
+
+        return self.corrigerInsertion(noeud)
+
+    def corrigerInsertion(self, noeud):
         """
-        if self.estRacine():
+        Rétablit les règles 2 et 3 après l'insertion du noeud rouge 'noeud'
+        dans l'arbre de racine self, en remontant vers la racine.
+        Retourne le noeud qui porte finalement la valeur insérée.
+
+        Les rotations laissant en place le noeud autour duquel elles sont
+        faites (voir rotationDroite), les références p et gp désignent
+        toujours les mêmes positions dans l'arbre après une rotation. Seule
+        la valeur insérée peut changer de noeud: on la suit dans 'porteur'.
+        Le plus haut noeud modifié, 'haut', est marqué pour la géométrie.
+        """
+        porteur = haut = noeud
+        stats = self._statistiques
+        # Si le parent est noir, pas de problème, sinon la règle 3 est violée.
+        while not noeud.estRacine() and noeud.p.couleur == 'R':
+            p = noeud.p
+            gp = p.p  # Existe, car la racine est noire
+            oncle = gp.fd if p is gp.fg else gp.fg
+
             if self.verbosite:
-                print('{} est la racine.'.format(self.valeur))
-            # La racine doit être noire (règle 2)
-            self.couleur = 'N'
-            
-        elif self.p.estRacine():
+                print('Oncle de {}: {}, de couleur {}'.format(noeud.valeur,
+                                                              oncle.valeur,
+                                                              oncle.couleur))
+            """
+            Cas 1: l'oncle est rouge:
+            - changment de couleur pour le grand-père, l'oncle et le père
+            - on recommence avec le grand-père
+
+               Ngp        c1        Rgp   
+               / \      ----->     / \    
+              Rp  Ro              Np  No  
+             / \                 / \      
+            R   Nf              R   Nf    
+
+            """
+            if oncle.couleur == 'R':
+                if self.verbosite:
+                    print('L\'oncle est rouge.')
+
+                gp.couleur = 'R'
+                oncle.couleur = 'N'
+                p.couleur = 'N'
+                noeud = haut = gp
+                if stats is not None:
+                    stats['cas 1'] += 1
+                    stats['recolorations'] += 3
+                continue
+
             if self.verbosite:
-                print('Le parent de {} est la racine.'.format(self.valeur))
+                print('L\'oncle est noir.')
+            """
+            Cas 2-2: l'oncle est noir, configuration en triangle:
+
+                  /                    \
+                            ou  
+                  \                    /
+
+            - rotation droite autour du père si le noeud est fils gauche et
+              le père fils droit
+            - rotation gauche autour du père si le noeud est fils droit et
+              le père fils gauche
+            - puis cas 2-1
+
+            Les transformations ci-dessus permettent de se ramener à une
+            configuration en ligne: le père garde sa place et porte désormais
+            la valeur du noeud, l'ancienne valeur du père descend d'un niveau.
+
+                     Ngp               Ngp               
+                     / \      rg       / \   
+                    Rp  No  ----->    R   No 
+                   / \               /       
+                 Nf   R~noeud       Rp       
+                                   /         
+                                  Nf         
+            """
+            if noeud.estFilsGauche() and p.estFilsDroit():
+                if self.verbosite:
+                    print('Configuration triangle noeud fils gauche père fils droit.')
+                p.rotationDroite()
+                if porteur is noeud: porteur = p
+                noeud = p.fd
+                if stats is not None:
+                    stats['cas 2-2'] += 1
+                    stats['rotationsDroites'] += 1
+
+            elif noeud.estFilsDroit() and p.estFilsGauche():
+                if self.verbosite:
+                    print('Configuration triangle noeud fils droit père fils gauche.')
+                p.rotationGauche()
+                if porteur is noeud: porteur = p
+                noeud = p.fg
+                if stats is not None:
+                    stats['cas 2-2'] += 1
+                    stats['rotationsGauches'] += 1
+
+            """
+            Cas 2-1: configuration en ligne:
+
+                 /                  \
+                          ou
+               /                      \
+
+            """
+            if stats is not None:
+                stats['cas 2-1'] += 1
+                stats['recolorations'] += 2
+                if noeud.estFilsGauche(): stats['rotationsDroites'] += 1
+                else:                     stats['rotationsGauches'] += 1
+            noeud.corrigerConfigurationLigne()
+            if porteur is p: porteur = gp
+            haut = gp
+            break
 
+        """
+        Cas 0: le noeud est la racine, violation de la règle 2.
+        """
+        # La racine doit être noire (règle 2)
+        if stats is not None and self.couleur == 'R':
+            stats['cas 0'] += 1
+            stats['recolorations'] += 1
+        self.couleur = 'N'
+
+        self._marquer(haut)
+        return porteur
+
+    # Un lot est fusionné par reconstruction complète lorsque l'arbre
+    # contient au plus facteurReconstruction fois plus de valeurs que le lot
+    facteurReconstruction = 1
+
+    def insererRNLot(self, valeurs):
+        """
+        Insère un lot de valeurs dans l'arbre de racine self.
+
+        Le lot est trié et dédoublonné, puis:
+         - si l'arbre est petit devant le lot, les valeurs de l'arbre et du
+           lot sont fusionnées et l'arbre est reconstruit en temps linéaire
+           par depuisTrie()
+         - sinon les valeurs sont insérées dans l'ordre croissant, chaque
+           descente partant du noeud de la valeur précédente: on remonte
+           seulement jusqu'au premier ancêtre dont le sous-arbre contient
+           la nouvelle valeur
+        """
+        lot = sorted(set(valeurs))
+        if not lot: return
+
+        if self._estPlusPetitQue(NoeudRN.facteurReconstruction * len(lot)):
+            fusion = heapq.merge((n.valeur for n in self._noeudsEnOrdre()), lot)
+            self._adopter(type(self).depuisTrie(fusion))
+            if self._avecTailles: self.activerTailles()
+            if self._statistiques is not None: self._statistiques['reconstructions'] += 1
+            return
+
+        porteur = self._insererRN(lot[0], self)
+        for valeur in lot[1:]:
+            # porteur.valeur < valeur: on remonte jusqu'au premier ancêtre
+            # dont le sous-arbre gauche contient porteur et la valeur
+            noeud, p = porteur, porteur.p
+            while p is not None and (noeud is p.fd or not valeur < p.valeur):
+                noeud, p = p, p.p
+            porteur = self._insererRN(valeur, noeud)
+
+    def _estPlusPetitQue(self, limite):
+        """
+        Indique si l'arbre contient au plus 'limite' valeurs.
+
+        Un arbre de hauteur noire h contient au moins 2^h - 1 valeurs: la
+        réponse est souvent connue en O(log n). Sinon on compte les valeurs,
+        en s'arrêtant dès que le compte dépasse la limite.
+        """
+        h, noeud = 0, self
+        while not noeud.estVide():
+            if noeud.estNoir(): h += 1
+            noeud = noeud.fg
+        if 2**h - 1 > limite: return False
+
+        compte = 0
+        P = [self]
+        while P and compte <= limite:
+            noeud = P.pop()
+            if not noeud.estVide():
+                compte += 1
+                P.append(noeud.fg)
+                P.append(noeud.fd)
+        return compte <= limite
+
+
+    def _adopter(self, autre):
+        """
+        La racine self prend la place de la racine de l'arbre 'autre', qui
+        ne doit plus être utilisé ensuite.
+        """
+        self._copierValeur(autre)
+        self.couleur = autre.couleur
+        self.fg = autre.fg
+        self.fd = autre.fd
+        if self.fg is not None:
+            self.fg.p = self
+            self.fd.p = self
+        self.invaliderGeometrie()
+
+    """
+    Jointure, scission et opérations ensemblistes
+
+    joindre() réunit deux arbres séparés par une valeur en
+    O(|hg - hd| + 1) amorti, où hg et hd sont leurs hauteurs noires:
+    l'arbre le moins haut est accroché le long de la branche de l'autre, au
+    premier noeud noir de même hauteur noire, puis corrigerInsertion()
+    rééquilibre. scinder() en découle: on descend jusqu'à la valeur, et l'on
+    rejoint en remontant les sous-arbres laissés de chaque côté (O(log n)).
+
+    Les opérations ensemblistes (reunir, intersecter, soustraire) scindent
+    l'arbre self selon la racine de l'autre, traitent récursivement les deux
+    moitiés, et les rejoignent: O(m log(n/m + 1)) pour des arbres de m <= n
+    valeurs, au lieu de O(m log n) pour m insertions. Les deux moitiés sont
+    indépendantes: parallele_arbres.py les répartit entre plusieurs
+    processus.
+
+    Les méthodes internes manipulent des couples (arbre, hauteur noire):
+    la hauteur noire d'un sous-arbre se déduit de celle de son père sans
+    parcours. Les noeuds des arbres d'origine sont réutilisés, aucun n'est
+    recopié.
+    """
+    @classmethod
+    def joindre(cls, gauche, cle, droite):
+        """
+        Retourne la racine de l'arbre formé des valeurs de 'gauche', de
+        'cle' et des valeurs de 'droite', qui ne doivent plus être utilisés
+        ensuite. Lève ValueError si les valeurs de gauche ne sont pas toutes
+        inférieures à cle, ou celles de droite toutes supérieures.
+
+        L'arbre obtenu maintient les tailles si l'un des deux arbres les
+        maintenait (elles sont alors calculées pour l'autre, en O(n)).
+        Les compteurs et le cache de géométrie ne sont pas conservés.
+        """
+        assert gauche.estRacine() and droite.estRacine()
+        maxi, mini = gauche.maximum(), droite.minimum()
+        if (maxi is not None and not maxi.valeur < cle) or \
+           (mini is not None and not cle < mini.valeur):
+            raise ValueError('{} ne sépare pas les valeurs des deux arbres.'.format(cle))
+
+        avecTailles = gauche._avecTailles or droite._avecTailles
+        noeud = cls()
+        noeud.valeur = cle
+        if avecTailles:
+            for arbre in (gauche, droite):
+                if not arbre._avecTailles: arbre.activerTailles()
+            noeud.taille = 1
+
+        hg, hd = gauche._hauteurNoire(), droite._hauteurNoire()
+        gauche._oublierEtatRacine()
+        droite._oublierEtatRacine()
+        racine = cls._joindre(gauche, hg, noeud, droite, hd)[0]
+        if avecTailles: racine._avecTailles = True
+        return racine
+
+    def scinder(self, cle):
+        """
+        Sépare les valeurs de l'arbre de racine self: retourne
+        (gauche, present, droite), où gauche et droite sont les racines des
+        arbres des valeurs inférieures et supérieures à cle, et present
+        indique si cle était dans l'arbre. L'arbre de racine self est vidé.
+        Les deux arbres maintiennent les tailles si self les maintenait.
+        """
+        assert self.estRacine()
+        h = self._hauteurNoire()
+        gauche, _, trouve, droite, _ = type(self)._scinder(self._detacher(), h, cle)
+        if self._avecTailles:
+            gauche._avecTailles = droite._avecTailles = True
+        return gauche, trouve is not None, droite
+
+    def reunir(self, autre):
+        """
+        L'arbre de racine self reçoit les valeurs de l'arbre 'autre', qui
+        est vidé. Pour une valeur présente dans les deux arbres, c'est le
+        noeud de 'autre' qui est conservé.
+        """
+        self._combiner(autre, type(self)._reunir)
+
+    def intersecter(self, autre):
+        """
+        L'arbre de racine self ne garde que les valeurs présentes dans
+        l'arbre 'autre', qui est vidé.
+        """
+        self._combiner(autre, type(self)._intersecter)
+
+    def soustraire(self, autre):
+        """
+        L'arbre de racine self perd les valeurs présentes dans l'arbre
+        'autre', qui est vidé.
+        """
+        self._combiner(autre, type(self)._soustraire)
+
+    def _combiner(self, autre, operation):
+        assert self.estRacine() and autre.estRacine()
+        if autre is self:
+            raise ValueError('Un arbre ne peut pas être combiné avec lui-même.')
+        # Les noeuds des deux arbres doivent maintenir les tailles si, et
+        # seulement si, self les maintient: O(m) pour l'arbre 'autre'
+        if self._avecTailles and not autre._avecTailles:
+            autre.activerTailles()
+        elif autre._avecTailles and not self._avecTailles:
+            for noeud in autre._noeudsEnOrdre(): del noeud.taille
+            autre._avecTailles = False
+
+        ha, hb = self._hauteurNoire(), autre._hauteurNoire()
+        resultat, _ = operation(self._detacher(), ha, autre._detacher(), hb)
+        self._adopter(resultat)
+        if self._avecTailles: self.taille = resultat.taille
+
+    def _hauteurNoire(self):
+        """
+        Hauteur noire de l'arbre de racine self, lue sur sa branche gauche:
+        O(log n), au lieu d'un parcours complet pour calculerHauteurNoire().
+        """
+        h, noeud = 0, self
+        while noeud.valeur is not None:
+            if noeud.couleur == 'N': h += 1
+            noeud = noeud.fg
+        return h
+
+    def _detacher(self):
+        """
+        Retourne une nouvelle racine qui prend le contenu de l'arbre de
+        racine self. La racine self, qui garde ses options (tailles,
+        compteurs, géométrie), devient un arbre vide.
+        """
+        racine = type(self)()
+        racine._adopter(self)
+        if self._avecTailles and self.valeur is not None:
+            racine.taille = self.taille
+        self.valeur = None
+        self.fg = None
+        self.fd = None
+        self.couleur = 'N'
+        self.invaliderGeometrie()
+        return racine
+
+    def _oublierEtatRacine(self):
+        """
+        Retire les attributs propres à une racine (tailles, compteurs, cache
+        de géométrie) à un noeud qui va devenir un noeud interne.
+        """
+        for nom in ('_avecTailles', '_statistiques', '_sales', '_profondeurs',
+                    '_hauteurGeometrie', '_dimensionsGeometrie'):
+            self.__dict__.pop(nom, None)
+
+    @staticmethod
+    def _separer(noeud, h):
+        """
+        Détache le sous-arbre de 'noeud', de hauteur noire h, de son père.
+        Retourne la nouvelle racine et sa hauteur noire: une racine rouge
+        est noircie.
+        """
+        noeud.p = None
+        if noeud.couleur == 'R':
+            noeud.couleur = 'N'
+            h += 1
+        return noeud, h
+
+    @classmethod
+    def _joindre(cls, gauche, hg, noeud, droite, hd):
+        """
+        Joint les arbres gauche et droite, de hauteurs noires hg et hd, avec
+        'noeud', qui porte la valeur qui les sépare (ses autres champs sont
+        écrasés). Retourne la racine de l'arbre obtenu et sa hauteur noire.
+
+        Les tailles sont maintenues si 'noeud' en a une: tous les noeuds
+        des deux arbres en ont alors une.
+        """
+        avecTailles = noeud.taille is not None
+        if hg == hd:
+            noeud.couleur = 'N'
+            noeud.p = None
+            noeud.fg, noeud.fd = gauche, droite
+            gauche.p = droite.p = noeud
+            if avecTailles:
+                noeud.taille = gauche._tailleSousArbre() + droite._tailleSousArbre() + 1
+            return noeud, hg + 1
+
+        # On descend le long de la branche droite de l'arbre le plus haut
+        # (gauche), ou le long de sa branche gauche (droite), jusqu'au
+        # premier noeud noir c de même hauteur noire que l'autre arbre.
+        # Le noeud rouge prend la place de c.
+        if hg > hd:
+            racine, c, h = gauche, gauche, hg
+            while c.couleur == 'R' or h > hd:
+                if c.couleur == 'N': h -= 1
+                c = c.fd
+            c.p.fd = noeud
+            noeud.fg, noeud.fd = c, droite
         else:
-            # Si on enfreint la règle 3 (parent rouge):
-            if self.couleur == 'R' and self.p.couleur == 'R':
+            racine, c, h = droite, droite, hd
+            while c.couleur == 'R' or h > hg:
+                if c.couleur == 'N': h -= 1
+                c = c.fg
+            c.p.fg = noeud
+            noeud.fg, noeud.fd = gauche, c
+        noeud.p = c.p
+        noeud.fg.p = noeud.fd.p = noeud
+        noeud.couleur = 'R'
+        if avecTailles:
+            noeud.taille = noeud.fg._tailleSousArbre() + noeud.fd._tailleSousArbre() + 1
+            ajout = noeud.taille - c._tailleSousArbre()
+            ancetre = noeud.p
+            while ancetre is not None:
+                ancetre.taille += ajout
+                ancetre = ancetre.p
+
+        # La correction est faite sous une fausse racine noire: si la racine
+        # devient rouge (cas 1), elle le reste, et l'on sait alors que la
+        # hauteur noire augmente en la noircissant.
+        sentinelle = cls()
+        sentinelle.fg = racine
+        racine.p = sentinelle
+        sentinelle.corrigerInsertion(noeud)
+        racine.p = None
+        h = max(hg, hd)
+        if racine.couleur == 'R':
+            racine.couleur = 'N'
+            h += 1
+        return racine, h
 
-                if self.verbosite:
-                    print('Oncle de {}: {}, de couleur {}'.format(self.valeur,
-                                                                  self.oncle().valeur,
-                                                                  self.oncle().couleur))
-                """
-                Cas 1: l'oncle est rouge:
-                - changment de couleur pour le grand-père, l'oncle et le père
-
-                   Ngp        c1        Rgp   
-                   / \      ----->     / \    
-                  Rp  Ro              Np  No  
-                 / \                 / \      
-                R   Nf              R   Nf    
-        
-                """
-                if self.oncle().couleur == 'R':
-                    if self.verbosite:
-                        print('L\'oncle est rouge.')
-                        
-                    self.p.p.couleur = 'R'
-                    self.oncle().couleur = 'N'
-                    self.p.couleur = 'N'
-
-                # Cas 2: l'oncle est noir
-                elif self.oncle().couleur == 'N': 
-                    if self.verbosite:
-                        print('L\'oncle est noir.')
-                    """
-                    Cas 2-2: l'oncle est noir, configuration en triangle:
-
-                          /                    \
-                                    ou  
-                          \                    /
-
-                    - rotation droite autour du père si le noeud est fils gauche et
-                      le père fils droit
-                    - rotation gauche autour du père si le noeud est fils droit et
-                      le père fils gauche
-                    - puis cas 2-1
-
-                    Les transformations ci-dessus permettent de se ramener à une
-                    configuration en ligne.
-
-                             Ngp               Ngp               
-                             / \      rg       / \   
-                            Rp  No  ----->    R   No 
-                           / \               /       
-                         Nf   R~self        Rp       
-                                           /         
-                                          Nf         
-                    """
-                    if self.estFilsGauche() and self.p.estFilsDroit():
-                        if self.verbosite:
-                            print('Configuration triangle noeud fils gauche père fils droit.')
-
-                        self.p.rotationDroite() # cette rotation laise self intact
-
-                        if self.verbosite:
-                            self.afficher('Après triangle noeud fils gauche père fils droit.')
-                            self.p.fd.afficher('Fils droit') 
-
-                        self.p.fd.corrigerConfigurationLigne()
-                        
-                    elif self.estFilsDroit() and self.p.estFilsGauche():
-                        if self.verbosite:
-                            print('Configuration triangle noeud fils droit père fils gauche.')
-
-                        self.p.rotationGauche()
-
-                        if self.verbosite:
-                            self.afficher('Après triangle noeud fils droit père fils gauche.')
-                            self.p.fg.afficher('Fils gauche') # self.p.fg désigne Rp, après rotation, sur la figure ci-dessus
-
-                        self.p.fg.corrigerConfigurationLigne()
-
-                    """
-                    Cas 2-1: configuration en ligne:
-
-                         /                  \
-                                  ou
-                       /                      \
-
-                    """
-                    self.corrigerConfigurationLigne()
+    @classmethod
+    def _scinder(cls, arbre, h, cle):
+        """
+        Scinde l'arbre de hauteur noire h selon la valeur cle. Retourne
+        (gauche, hg, trouve, droite, hd), où trouve est le noeud qui portait
+        cle (détaché), ou None.
+        """
+        # Descente: on note le chemin, et la hauteur noire de chaque noeud
+        chemin = []
+        noeud = arbre
+        v = noeud.valeur
+        while v is not None:
+            if   cle > v: chemin.append((noeud, h, False))
+            elif cle < v: chemin.append((noeud, h, True))
+            else: break
+            if noeud.couleur == 'N': h -= 1
+            noeud = noeud.fg if cle < v else noeud.fd
+            v = noeud.valeur
+
+        if v is None:
+            trouve = None
+            gauche, hg = cls._separer(noeud, 0)
+            droite, hd = cls(), 0
+        else:
+            trouve = noeud
+            if noeud.couleur == 'N': h -= 1
+            gauche, hg = cls._separer(noeud.fg, h)
+            droite, hd = cls._separer(noeud.fd, h)
+
+        # Remontée: chaque noeud du chemin rejoint, avec son autre
+        # sous-arbre, le côté opposé à celui où l'on est descendu
+        for noeud, h, aGauche in reversed(chemin):
+            if noeud.couleur == 'N': h -= 1
+            if aGauche:
+                autre, ha = cls._separer(noeud.fd, h)
+                droite, hd = cls._joindre(droite, hd, noeud, autre, ha)
+            else:
+                autre, ha = cls._separer(noeud.fg, h)
+                gauche, hg = cls._joindre(autre, ha, noeud, gauche, hg)
+        return gauche, hg, trouve, droite, hd
+
+    @classmethod
+    def _joindreSansCle(cls, gauche, hg, droite, hd):
+        """
+        Joint deux arbres sans valeur séparatrice: le maximum de gauche est
+        retiré (par scission) pour servir de séparateur.
+        """
+        if gauche.valeur is None: return droite, hd
+        if droite.valeur is None: return gauche, hg
+        maxi = gauche.maximum()
+        gauche, hg, maxi, _, _ = cls._scinder(gauche, hg, maxi.valeur)
+        return cls._joindre(gauche, hg, maxi, droite, hd)
+
+    @classmethod
+    def _moities(cls, a, ha, b, hb):
+        """
+        Scinde a selon la racine de b. Retourne les moitiés de a, le noeud
+        de a qui porte la valeur de la racine de b (ou None), et les
+        sous-arbres de b détachés.
+        """
+        ag, hag, trouve, ad, had = cls._scinder(a, ha, b.valeur)
+        h = hb - 1  # La racine de b est noire
+        bg, hbg = cls._separer(b.fg, h)
+        bd, hbd = cls._separer(b.fd, h)
+        return (ag, hag, bg, hbg), trouve, (ad, had, bd, hbd)
+
+    @classmethod
+    def _reunir(cls, a, ha, b, hb):
+        if a.valeur is None: return b, hb
+        if b.valeur is None: return a, ha
+        gauches, _, droites = cls._moities(a, ha, b, hb)
+        gauche, hg = cls._reunir(*gauches)
+        droite, hd = cls._reunir(*droites)
+        return cls._joindre(gauche, hg, b, droite, hd)
+
+    @classmethod
+    def _intersecter(cls, a, ha, b, hb):
+        if a.valeur is None: return a, ha
+        if b.valeur is None: return b, hb
+        gauches, trouve, droites = cls._moities(a, ha, b, hb)
+        gauche, hg = cls._intersecter(*gauches)
+        droite, hd = cls._intersecter(*droites)
+        if trouve is None: return cls._joindreSansCle(gauche, hg, droite, hd)
+        return cls._joindre(gauche, hg, trouve, droite, hd)
+
+    @classmethod
+    def _soustraire(cls, a, ha, b, hb):
+        if a.valeur is None or b.valeur is None: return a, ha
+        gauches, _, droites = cls._moities(a, ha, b, hb)
+        gauche, hg = cls._soustraire(*gauches)
+        droite, hd = cls._soustraire(*droites)
+        return cls._joindreSansCle(gauche, hg, droite, hd)
 
     def insererRNRandom(self,eventail=100):
         valeur = random.randrange(0,eventail)
@@ -338,23 +1426,212 @@ class NoeudRN:
                 R   Nf                Nf  No           Nf  No
                     
         """
-                
+        gp = self.p.p
+
         if self.estFilsGauche() and self.p.estFilsGauche():
             if self.verbosite:
                 print('Configuration ligne gauche gauche.')
-                
-            self.p.p.couleur == 'R'
-            self.p.couleur == 'N'
-            self.p.p.rotationDroite()
-                        
-        if self.estFilsDroit() and self.p.estFilsDroit():
+
+            # Après la rotation, gp porte la valeur du père et gp.fd celle
+            # de l'ancien grand-père
+            gp.rotationDroite()
+            gp.couleur = 'N'
+            gp.fd.couleur = 'R'
+
+        elif self.estFilsDroit() and self.p.estFilsDroit():
             if self.verbosite:
                 print('Configuration ligne droit droit.')
-            
-            self.p.p.couleur == 'R'
-            self.p.couleur == 'N'
-            self.p.p.rotationGauche()
 
+            gp.rotationGauche()
+            gp.couleur = 'N'
+            gp.fg.couleur = 'R'
+
+
+    def supprimerRN(self, valeur):
+        """
+        Supprime une valeur de l'arbre de racine self et rééquilibre.
+        Lève KeyError si la valeur est absente.
+        """
+        noeud = self.rechercher(valeur)
+        if noeud is None:
+            raise KeyError(valeur)
+
+        if self.verbosite == 1:
+            print(80*'=')
+            print('Suppression de la valeur {}.'.format(valeur))
+            print(80*'=')
+
+        self.supprimerNoeud(noeud)
+
+    def discard(self, valeur):
+        """
+        Supprime la valeur si elle est présente, sans erreur sinon.
+        """
+        noeud = self.rechercher(valeur)
+        if noeud is not None:
+            self.supprimerNoeud(noeud)
+
+    def pop(self, valeur=None):
+        """
+        Supprime et retourne la valeur, ou la plus petite valeur de l'arbre
+        si aucune n'est précisée.
+        Lève KeyError si la valeur est absente ou si l'arbre est vide.
+        """
+        if valeur is None:
+            noeud = self.minimum()
+            if noeud is None:
+                raise KeyError('pop dans un arbre vide')
+        else:
+            noeud = self.rechercher(valeur)
+            if noeud is None:
+                raise KeyError(valeur)
+        valeur = noeud.valeur
+        self.supprimerNoeud(noeud)
+        return valeur
+
+    def supprimerNoeud(self, noeud):
+        """
+        Retire 'noeud' de l'arbre de racine self et rééquilibre.
+
+        Si le noeud a deux fils, il reçoit la valeur de son successeur, et
+        c'est le successeur, qui a au plus un fils non vide, qui est retiré.
+        Le noeud retiré est remplacé par ce fils x (éventuellement vide).
+        Si le noeud retiré était noir, x porte un noir "en trop" que
+        corrigerSuppression() fait remonter ou absorbe.
+        """
+        if not noeud.fg.estVide() and not noeud.fd.estVide():
+            successeur = noeud.fd
+            while not successeur.fg.estVide(): successeur = successeur.fg
+            noeud._copierValeur(successeur)
+            noeud = successeur
+
+        x = noeud.fd if noeud.fg.estVide() else noeud.fg
+        if self._statistiques is not None: self._statistiques['suppressions'] += 1
+
+        # La racine représente l'arbre et reste en place: elle absorbe x,
+        # qui est soit vide, soit une feuille rouge.
+        if noeud.estRacine():
+            self._copierValeur(x)
+            if x.estVide():
+                self.fg = None
+                self.fd = None
+            else:
+                self.fg = x.fg
+                self.fd = x.fd
+                self.fg.p = self
+                self.fd.p = self
+                if self._avecTailles: self.taille = 1
+            self.couleur = 'N'
+            self.invaliderGeometrie()
+            return
+
+        if self._avecTailles:
+            ancetre = noeud.p
+            while ancetre is not None:
+                ancetre.taille -= 1
+                ancetre = ancetre.p
+
+        x.p = noeud.p
+        if noeud.estFilsGauche(): noeud.p.fg = x
+        else:                     noeud.p.fd = x
+
+        self._oublierGeneration(noeud)
+        self._marquer(x.p)
+
+        if noeud.couleur == 'N':
+            self.corrigerSuppression(x)
+
+    def corrigerSuppression(self, x):
+        """
+        Rétablit la règle 4 lorsque x, qui remplace un noeud noir retiré,
+        porte un noir "en trop".
+
+        Comme pour corrigerInsertion(), les rotations laissent en place le
+        noeud autour duquel elles sont faites.
+
+        Notations: p est le père de x, f son frère.
+        """
+        haut = x
+        stats = self._statistiques
+        while not x.estRacine() and x.couleur == 'N':
+            p = haut = x.p
+            if x is p.fg:
+                f = p.fd
+                """
+                Cas 1: le frère est rouge: rotation gauche autour du père,
+                pour se ramener à un frère noir.
+                """
+                if f.couleur == 'R':
+                    if self.verbosite: print('Cas 1: le frère est rouge.')
+                    f.couleur = 'N'
+                    p.couleur = 'R'
+                    p.rotationGauche()
+                    if stats is not None: stats['rotationsGauches'] += 1
+                    p = x.p  # l'ancien père, descendu à gauche
+                    f = p.fd
+                """
+                Cas 2: le frère et ses deux fils sont noirs: le frère devient
+                rouge, et le noir en trop remonte au père.
+                """
+                if f.fg.couleur == 'N' and f.fd.couleur == 'N':
+                    if self.verbosite: print('Cas 2: le frère et ses fils sont noirs.')
+                    f.couleur = 'R'
+                    x = p
+                    continue
+                """
+                Cas 3: le fils éloigné du frère est noir: rotation droite
+                autour du frère pour se ramener au cas 4.
+                """
+                if f.fd.couleur == 'N':
+                    if self.verbosite: print('Cas 3: le fils droit du frère est noir.')
+                    f.fg.couleur = 'N'
+                    f.couleur = 'R'
+                    f.rotationDroite()
+                    if stats is not None: stats['rotationsDroites'] += 1
+                """
+                Cas 4: le fils éloigné du frère est rouge: rotation gauche
+                autour du père, qui absorbe le noir en trop.
+                """
+                if self.verbosite: print('Cas 4: le fils droit du frère est rouge.')
+                f.couleur = p.couleur
+                p.couleur = 'N'
+                f.fd.couleur = 'N'
+                p.rotationGauche()
+                if stats is not None: stats['rotationsGauches'] += 1
+                break
+            else:
+                # Symétrique du cas précédent
+                f = p.fg
+                if f.couleur == 'R':
+                    if self.verbosite: print('Cas 1: le frère est rouge.')
+                    f.couleur = 'N'
+                    p.couleur = 'R'
+                    p.rotationDroite()
+                    if stats is not None: stats['rotationsDroites'] += 1
+                    p = x.p
+                    f = p.fg
+                if f.fg.couleur == 'N' and f.fd.couleur == 'N':
+                    if self.verbosite: print('Cas 2: le frère et ses fils sont noirs.')
+                    f.couleur = 'R'
+                    x = p
+                    continue
+                if f.fg.couleur == 'N':
+                    if self.verbosite: print('Cas 3: le fils gauche du frère est noir.')
+                    f.fd.couleur = 'N'
+                    f.couleur = 'R'
+                    f.rotationGauche()
+                    if stats is not None: stats['rotationsGauches'] += 1
+                if self.verbosite: print('Cas 4: le fils gauche du frère est rouge.')
+                f.couleur = p.couleur
+                p.couleur = 'N'
+                f.fg.couleur = 'N'
+                p.rotationDroite()
+                if stats is not None: stats['rotationsDroites'] += 1
+                break
+
+        x.couleur = 'N'
+        self.couleur = 'N'
+        self._marquer(haut)
 
     """
     Notations:
@@ -364,32 +1641,52 @@ class NoeudRN:
      / \         rg          / \
     A   C      <-----       C   E
 
-    Suppose que le noeud a un déséquilibre de +2
     A, b, C, d, E sont des noeuds
-   
-    - une rotation droite laisse b intact
-    - après une rotation droite de d, il n'y a plus aucune référence vers b.
+
+    - le noeud self reste à sa place (c'est indispensable pour la racine,
+      qui représente l'arbre): il reçoit la valeur et la couleur de b
+    - l'objet b est réutilisé pour porter la valeur et la couleur de d
+    - aucun noeud n'est créé, la rotation se fait en temps constant
     """
+    def _echangerContenu(self, autre):
+        """
+        Échange les valeurs et les couleurs de self et du noeud 'autre'.
+        Les sous-classes dont les noeuds portent d'autres données avec la
+        valeur (DictionnaireRN) les échangent aussi.
+        """
+        self.valeur, autre.valeur = autre.valeur, self.valeur
+        self.couleur, autre.couleur = autre.couleur, self.couleur
+
+    def _copierValeur(self, source):
+        """
+        Le noeud self reçoit la valeur du noeud source (et les données qui
+        l'accompagnent, voir _echangerContenu).
+        """
+        self.valeur = source.valeur
+
     def rotationDroite(self):
         if self.verbosite:
             print('Rotation droite de {}.'.format(self.valeur))
             self.afficher('Avant rotation droite:')
 
-        # Création du noeud d de droite
-        d = NoeudRN(self.valeur,parent=self)
-        d.fg = self.fg.fd
-        d.fd = self.fd
+        b = self.fg
+        A, C, E = b.fg, b.fd, self.fd
 
-        self.fg.fd.p = d
-        self.fd.p = d
-        
-        # Mise à jour de self
-        self.valeur = self.fg.valeur
+        # Échange des contenus de self et b
+        self._echangerContenu(b)
+
+        # b, qui porte maintenant d, devient le fils droit de self
+        b.fg = C
+        b.fd = E
+        E.p = b
 
-        self.fg.fg.p = self
-        self.fg = self.fg.fg
+        self.fg = A
+        A.p = self
+        self.fd = b
 
-        self.fd = d
+        # self garde les mêmes valeurs dans son sous-arbre, donc sa taille
+        if self.taille is not None:
+            b.taille = C._tailleSousArbre() + E._tailleSousArbre() + 1
 
         if self.verbosite:
             self.afficher('Après rotation droite:')
@@ -402,29 +1699,31 @@ class NoeudRN:
         / \         rg          / \
        A   C      <-----       C   E
 
-    - une rotation gauche laisse d intact
-    - après une rotation gauche de b, il n'y a plus aucune référence vers d.
+    - le noeud self reste à sa place: il reçoit la valeur et la couleur de d
+    - l'objet d est réutilisé pour porter la valeur et la couleur de b
     """
     def rotationGauche(self):
         if self.verbosite:
             print('Rotation gauche de {}.'.format(self.valeur))
             self.afficher('Avant rotation gauche:')
 
-        # Création du noeud b de gauche
-        b = NoeudRN(self.valeur, parent=self)
-        b.fd = self.fd.fg
-        b.fg = self.fg
+        d = self.fd
+        A, C, E = self.fg, d.fg, d.fd
 
-        self.fd.fg.p = b
-        self.fg.p = b
+        # Échange des contenus de self et d
+        self._echangerContenu(d)
 
-        # Mise à jour de self
-        self.valeur = self.fd.valeur
+        # d, qui porte maintenant b, devient le fils gauche de self
+        d.fd = C
+        d.fg = A
+        A.p = d
 
-        self.fd.fd.p = self
-        self.fd = self.fd.fd
+        self.fd = E
+        E.p = self
+        self.fg = d
 
-        self.fg = b
+        if self.taille is not None:
+            d.taille = A._tailleSousArbre() + C._tailleSousArbre() + 1
 
         if self.verbosite: self.afficher('Après rotation gauche:')
 
@@ -433,13 +1732,13 @@ class NoeudRN:
     """
     @classmethod
     def setLargeurTotalePixels(cls, l):
-        cls.largeurTotalePixels = l
+        NoeudRN.largeurTotalePixels = l
 
     @classmethod
     def setHauteurTotalePixels(cls, h):
-        cls.hauteurTotalePixels = h
+        NoeudRN.hauteurTotalePixels = h
 
-    def calculerGeometrie(self, t=False):
+    def calculerGeometrie(self, t=False, disposition='generations'):
         """
         Attention cette méthode initialise l'attribut de classe 'transformation',
         qui est un boolean:
@@ -451,39 +1750,316 @@ class NoeudRN:
         Inconvénient:
           - peut provoquer des erreurs si on essaie de représenter graphiquement plusieurs
             arbres en même temps
+
+        La géométrie est incrémentale. Chaque noeud garde sa génération et
+        ses coordonnées; les modifications faites par insererRN(), inserer()
+        et supprimerRN() marquent seulement le plus haut noeud touché
+        (rotations et changements de couleur compris). Seuls les sous-arbres
+        marqués sont recalculés, soit O(log n) en moyenne par insertion. Si
+        la hauteur de l'arbre change, toutes les distances changent
+        d'échelle: les coordonnées de tous les noeuds sont recalculées, mais
+        sans recalcul des générations.
+
+        Les modifications faites autrement (rotations appelées directement,
+        par exemple) doivent être suivies d'un appel à invaliderGeometrie().
+
+        disposition choisit le placement horizontal des noeuds:
+         - 'generations': un noeud de génération g est décalé de
+           largeurTotalePixels / 2^(g+1) par rapport à son père. Simple et
+           incrémental, mais les noeuds se chevauchent dès que l'arbre est
+           profond.
+         - 'compacte': disposition de Reingold-Tilford (voir
+           _disposerCompact), sans chevauchement, pour la vue ABR comme pour
+           la vue 234. Recalculée entièrement à chaque appel, en O(n).
+
+        Retourne la liste des racines des sous-arbres dont les coordonnées
+        ont été recalculées: [self] si tout l'arbre l'a été.
         """
         NoeudRN.transformation = t
-        self.geometrie()
-        self.geometrie234()
-        
-    def geometrie(self):
+        if disposition == 'compacte':
+            self._geometrieCompacte()
+            return [self]
+        if disposition != 'generations':
+            raise ValueError('Disposition inconnue: {}'.format(disposition))
+
+        dimensions = (NoeudRN.largeurTotalePixels, NoeudRN.hauteurTotalePixels)
+        if self._sales is None or self._dimensionsGeometrie != dimensions:
+            self._geometrieComplete()
+            return [self]
+        return self._geometrieIncrementale()
+
+    def invaliderGeometrie(self):
         """
-        Méthode récursive
+        Le prochain appel à calculerGeometrie() recalculera la géométrie de
+        tous les noeuds.
         """
-        if self.estRacine(): self.setGeometrieRacine()
-        elif self.estVide(): self.setGeometrie(4,2)
-        else:                self.setGeometrie(2,1)
+        self._sales = None
 
-        if self.fg: self.fg.geometrie()
-        if self.fd: self.fd.geometrie()
+    # Attributs du cache de géométrie, sur la racine seulement (voir taille)
+    _sales = None
+    _profondeurs = None
+    _hauteurGeometrie = 0
+    _dimensionsGeometrie = None
+    # Génération à laquelle un noeud non vide est compté dans _profondeurs
+    _genComptee = None
 
-    def geometrie234(self):
+    def _marquer(self, noeud):
         """
-        Méthode récursive.
+        Signale que le sous-arbre de 'noeud' doit être recalculé par le
+        prochain calculerGeometrie() sur la racine self.
         """
-        if self.estRacine(): self.setGeometrieRacine()
-        elif self.estVide(): self.setGeometrie234(4,2)
-        else:                self.setGeometrie234(2,1)
+        if self._sales is not None:
+            self._sales.append(noeud)
 
-        if self.fg: self.fg.geometrie234()
-        if self.fd: self.fd.geometrie234()
-            
-    def setGeometrieRacine(self,coeffDistance=1,coeffRayon=8):
-        assert self.estRacine()
+    def _oublierGeneration(self, noeud):
+        """
+        Retire des générations comptées un noeud qui quitte l'arbre.
+        """
+        if self._sales is not None and noeud._genComptee is not None:
+            self._profondeurs[noeud._genComptee] -= 1
+            noeud._genComptee = None
+
+    def _calculerGenerations(self, racine, g, complet=False):
+        """
+        Parcourt le sous-arbre de 'racine', de génération g, en mettant à jour
+        la génération de chaque noeud et le nombre de noeuds non vides par
+        génération. Si complet est vrai, les comptes précédents des noeuds
+        sont ignorés (ils ont été remis à zéro).
+        """
+        profondeurs = self._profondeurs
+        P = [(racine, g)]
+        while P:
+            noeud, g = P.pop()
+            noeud._gen = g
+            if noeud._genComptee is not None:
+                if not complet: profondeurs[noeud._genComptee] -= 1
+                noeud._genComptee = None
+            if noeud.fg is not None:
+                if g == len(profondeurs): profondeurs.append(0)
+                profondeurs[g] += 1
+                noeud._genComptee = g
+                P.append((noeud.fg, g+1))
+                P.append((noeud.fd, g+1))
+
+    def _calculerHauteurGeometrie(self):
+        """
+        Hauteur de l'arbre, d'après le nombre de noeuds non vides par
+        génération.
+        """
+        profondeurs = self._profondeurs
+        while profondeurs and profondeurs[-1] == 0: profondeurs.pop()
+        return max(len(profondeurs) - 1, 0)
 
-        hauteur = self.calculerHauteur()
-        largeur = self.calculerLargeur()
+    def _placerSousArbre(self, racine):
+        """
+        Calcule les coordonnées des noeuds du sous-arbre de 'racine', dont
+        les générations sont à jour, en descendant depuis 'racine'.
+        """
+        P = [racine]
+        while P:
+            noeud = P.pop()
+            if noeud.estRacine():
+                noeud.setGeometrieRacine(hauteur=self._hauteurGeometrie)
+            elif noeud.estVide():
+                noeud.setGeometrie(4,2)
+                noeud.setGeometrie234(4,2)
+            else:
+                noeud.setGeometrie(2,1)
+                noeud.setGeometrie234(2,1)
+            if noeud.fg is not None:
+                P.append(noeud.fg)
+                P.append(noeud.fd)
+
+    def _geometrieComplete(self):
+        self._sales = []
+        self._profondeurs = []
+        self._dimensionsGeometrie = (NoeudRN.largeurTotalePixels, NoeudRN.hauteurTotalePixels)
+        self._calculerGenerations(self, 0, complet=True)
+        self._hauteurGeometrie = self._calculerHauteurGeometrie()
+        self._placerSousArbre(self)
+
+    def _geometrieIncrementale(self):
+        sales, self._sales = self._sales, []
+
+        # On ne garde que les noeuds encore dans l'arbre, et pas déjà
+        # couverts par un autre sous-arbre marqué, du plus haut au plus bas.
+        profondeur = {}
+        for noeud in sales:
+            g, n = 0, noeud
+            while n.p is not None and (n is n.p.fg or n is n.p.fd):
+                g, n = g+1, n.p
+            if n is self: profondeur[noeud] = g
+        racines, faites = [], set()
+        for noeud in sorted(profondeur, key=profondeur.get):
+            n = noeud
+            while n is not None and n not in faites: n = n.p
+            if n is None:
+                faites.add(noeud)
+                racines.append(noeud)
+
+        for noeud in racines:
+            self._calculerGenerations(noeud, profondeur[noeud])
+
+        hauteur = self._calculerHauteurGeometrie()
+        if hauteur != self._hauteurGeometrie:
+            # Changement d'échelle: toutes les coordonnées sont recalculées
+            self._hauteurGeometrie = hauteur
+            self._placerSousArbre(self)
+            return [self]
+        self.fixerEchelle(hauteur)
+        for noeud in racines:
+            self._placerSousArbre(noeud)
+        return racines
+
+    def _disposerCompact(self, enfants, demiLargeur, ecart=0.25):
+        """
+        Disposition de Reingold-Tilford de l'arbre n-aire de racine self, en
+        O(n). enfants(noeud) donne la liste ordonnée des enfants d'un noeud,
+        demiLargeur(noeud) sa demi-largeur. Les abscisses sont en unités
+        arbitraires: deux noeuds d'une même génération sont séparés d'au
+        moins 'ecart'.
+
+        Chaque sous-arbre est disposé indépendamment, puis les sous-arbres
+        frères sont rapprochés au plus près de gauche à droite en comparant
+        leurs contours (bords gauche et droit de chaque génération). Le père
+        est centré au-dessus de ses enfants extrêmes.
+
+        Un contour est une liste, dont le dernier élément est la génération
+        du haut, et un décalage commun à tous ses éléments: la fusion de deux
+        contours ne coûte ainsi que la hauteur du plus petit, d'où le temps
+        linéaire.
+
+        Retourne la liste [(noeud, abscisse, génération)] en ordre préfixe,
+        la racine étant à l'abscisse 0.
+        """
+        relatif = {}
+        contours = {}
+        P = [(self, False)]
+        while P:
+            noeud, visite = P.pop()
+            fils = enfants(noeud)
+            if fils and not visite:
+                P.append((noeud, True))
+                P.extend((f, False) for f in fils)
+                continue
+
+            demi = demiLargeur(noeud)
+            if not fils:
+                contours[noeud] = ([-demi], 0, [demi], 0)
+                continue
+
+            # Contours de la forêt des enfants déjà placés
+            G, og, D, od = contours.pop(fils[0])
+            positions = [0]
+            for f in fils[1:]:
+                Gf, ogf, Df, odf = contours.pop(f)
+                x = max(d - g for d, g in zip(reversed(D), reversed(Gf)))
+                x += od - ogf + ecart
+                positions.append(x)
+
+                # Le contour gauche de la forêt reste celui de gauche, prolongé
+                # par celui du nouveau sous-arbre s'il est plus profond
+                if len(Gf) > len(G):
+                    delta = og - ogf - x
+                    Gf[len(Gf)-len(G):] = [v + delta for v in G]
+                    G, og = Gf, ogf + x
+                # Symétriquement pour le contour droit
+                if len(D) > len(Df):
+                    delta = odf + x - od
+                    D[len(D)-len(Df):] = [v + delta for v in Df]
+                else:
+                    D, od = Df, odf + x
+
+            centre = (positions[0] + positions[-1]) / 2
+            for f, x in zip(fils, positions):
+                relatif[f] = x - centre
+            og -= centre
+            od -= centre
+            G.append(-demi - og)
+            D.append( demi - od)
+            contours[noeud] = (G, og, D, od)
+
+        resultat = []
+        P = [(self, 0, 0)]
+        while P:
+            noeud, x, g = P.pop()
+            resultat.append((noeud, x, g))
+            for f in enfants(noeud):
+                P.append((f, x + relatif[f], g+1))
+        return resultat
+
+    def _geometrieCompacte(self, coeffRayon=8):
+        """
+        Calcule les coordonnées de tous les noeuds avec la disposition
+        compacte, dans les deux vues. Les abscisses sont mises à l'échelle
+        de largeurTotalePixels; les rayons sont réduits si nécessaire pour
+        que les noeuds ne se chevauchent pas.
+        """
+        # Le cache de la disposition par générations n'est plus valable
+        self._sales = None
+        L = NoeudRN.largeurTotalePixels
+        H = NoeudRN.hauteurTotalePixels
+
+        # Vue ABR: un noeud vide est une feuille deux fois plus étroite
+        def enfants(n):
+            return () if n.fg is None else (n.fg, n.fd)
+        def demiLargeur(n):
+            return 0.25 if n.fg is None else 0.5
+
+        noeuds = self._disposerCompact(enfants, demiLargeur)
+        hauteur = max([g for n, x, g in noeuds if n.fg is not None], default=0)
+        NoeudRN.fixerEchelle(hauteur, coeffRayon=coeffRayon)
+        xMin = min(x - demiLargeur(n) for n, x, g in noeuds)
+        xMax = max(x + demiLargeur(n) for n, x, g in noeuds)
+        k = L / (xMax - xMin)
+        NoeudRN.rayon = min(NoeudRN.rayon, k / 2)
+        for n, x, g in noeuds:
+            n._x = (x - xMin) * k
+            n._y = NoeudRN.rayon + g * NoeudRN.distance
+            if n.fg is None and g > 0: n._y -= NoeudRN.distance / 2
+
+        # Vue 234: un noeud noir et ses fils rouges forment un seul noeud
+        # 234, dont les enfants sont les fils noirs de ses membres
+        def absorbe(n, f):
+            return n.couleur == 'N' and f.couleur == 'R' and f.fg is not None
+        def enfants234(n):
+            if n.fg is None: return ()
+            fils = []
+            for f in (n.fg, n.fd):
+                if absorbe(n, f): fils += (f.fg, f.fd)
+                else:             fils.append(f)
+            return fils
+        def demiLargeur234(n):
+            if n.fg is None: return 0.25
+            return 0.5 * (1 + absorbe(n, n.fg) + absorbe(n, n.fd))
+
+        groupes = self._disposerCompact(enfants234, demiLargeur234)
+        hauteur234 = max([g for n, x, g in groupes if n.fg is not None], default=0)
+        NoeudRN.distance234 = H / (hauteur234 + 1)
+        xMin = min(x - demiLargeur234(n) for n, x, g in groupes)
+        xMax = max(x + demiLargeur234(n) for n, x, g in groupes)
+        k = L / (xMax - xMin)
+        NoeudRN.rayon234 = min(NoeudRN.rayon234, k / 2)
+        for n, x, g in groupes:
+            n._x234 = (x - xMin) * k
+            n._y234 = NoeudRN.rayon234 + g * NoeudRN.distance234
+            if n.fg is None:
+                if g > 0: n._y234 -= NoeudRN.distance234 / 2
+                continue
+            # Les membres rouges sont collés de part et d'autre du noeud noir
+            gauche, droite = absorbe(n, n.fg), absorbe(n, n.fd)
+            n._x234 += (gauche - droite) * k / 2
+            if gauche:
+                n.fg._x234, n.fg._y234 = n._x234 - k, n._y234
+            if droite:
+                n.fd._x234, n.fd._y234 = n._x234 + k, n._y234
 
+    @classmethod
+    def fixerEchelle(cls, hauteur, coeffDistance=1, coeffRayon=8):
+        """
+        Calcule les distances et les rayons communs à tous les noeuds pour
+        un arbre de la hauteur donnée.
+        """
         # Distance de base pour séparer verticalement deux générations
         NoeudRN.distance =        coeffDistance * NoeudRN.hauteurTotalePixels / ( hauteur + 1 )
         NoeudRN.distance234 = 2 * coeffDistance * NoeudRN.hauteurTotalePixels / ( hauteur + 2 )
@@ -492,9 +2068,17 @@ class NoeudRN:
         NoeudRN.rayon =     NoeudRN.largeurTotalePixels / (     coeffRayon * ( hauteur + 1 ) )
         NoeudRN.rayon234 =  NoeudRN.largeurTotalePixels / ( 2 * coeffRayon * ( hauteur + 2 ) )
 
+    def setGeometrieRacine(self,coeffDistance=1,coeffRayon=8,hauteur=None):
+        assert self.estRacine()
+
+        if hauteur is None: hauteur = self.calculerHauteur()
+        NoeudRN.fixerEchelle(hauteur, coeffDistance, coeffRayon)
+
         if self.verbosite == 1:
-            self.affichageGeometrie(hauteur,largeur)
+            self.affichageGeometrie(hauteur,self.calculerLargeur())
         
+        self._gen = 0
+
         self._x = NoeudRN.largeurTotalePixels // 2
         self._y = NoeudRN.rayon
 
@@ -512,13 +2096,14 @@ class NoeudRN:
         en ABR classique. La position d'un noeud est calculée en fonction de:
           - de la position de son  noeud parent
           - de son rang (fils gauche ou fils droit)
+          - de sa génération _gen, qui doit être à jour (voir calculerGeometrie)
         """
         self._x = self.p._x
         self._y = self.p._y + NoeudRN.distance / cy
 
         # Distance de base pour séparer horizontalement deux noeuds:
         #    largeur du canvas / 2 ^ ( génération du noeud )        
-        self.distanceHorizontale = NoeudRN.largeurTotalePixels // (2**self.calculerGeneration())
+        self.distanceHorizontale = NoeudRN.largeurTotalePixels // (2**self._gen)
 
         # Si le neoud est fils gauche
         if self.estFilsGauche():
@@ -542,7 +2127,7 @@ class NoeudRN:
 
         # Distance de base pour séparer horizontalement deux noeuds:
         #    largeur du canvas / 2 ^ ( génération du noeud )
-        self.distanceHorizontale234 = NoeudRN.largeurTotalePixels // (2**self.calculerGeneration())
+        self.distanceHorizontale234 = NoeudRN.largeurTotalePixels // (2**self._gen)
 
         # Si le noeud est noir
         if self.estNoir():
@@ -605,30 +2190,548 @@ class NoeudRN:
         if NoeudRN.transformation: return NoeudRN.rayon234
         else:                      return NoeudRN.rayon
         
+    """
+    Les coordonnées interpolées ne sont pas arrondies: une vue agrandie
+    (voir tk_arbres) les multiplie par son facteur de zoom.
+    """
     def xMorphisme(self,t):
-        return int(self._x + t * (self._x234 - self._x))
+        return self._x + t * (self._x234 - self._x)
 
     def yMorphisme(self,t):
-        return int(self._y + t * (self._y234 - self._y)) 
+        return self._y + t * (self._y234 - self._y)
 
     def rMorphisme(self,t):
-        return int(NoeudRN.rayon + t * (NoeudRN.rayon234 - NoeudRN.rayon))
+        return NoeudRN.rayon + t * (NoeudRN.rayon234 - NoeudRN.rayon)
+
+
+class DictionnaireRN(NoeudRN):
+    """
+    Dictionnaire trié: arbre rouge-noir dont chaque noeud porte, en plus de
+    sa valeur, une clé et une donnée. La racine représente le dictionnaire:
+
+        d = DictionnaireRN(fonctionCle=str.lower)
+        d['Pomme'] = 3
+        d['poire'] = 5
+        list(d.items())  # [('Pomme', 3), ('poire', 5)]
+
+    Les noeuds sont classés selon leur valeur, qui est la clé transformée
+    une fois pour toutes lors de son insertion: fonctionCle(cle), ou l'objet
+    de functools.cmp_to_key(comparateur) s'il y a un comparateur (appliqué
+    après fonctionCle si les deux sont donnés). Une recherche ne transforme
+    que la clé cherchée. Sans fonctionCle ni comparateur, la valeur est la
+    clé.
+
+    La donnée suit sa valeur dans les rotations et les suppressions (voir
+    _echangerContenu et _copierValeur). Affecter une nouvelle donnée à une
+    clé présente ne modifie pas l'arbre: pas de rééquilibrage.
+
+    Les méthodes de lecture de NoeudRN (rechercher, rang, compterIntervalle,
+    intervalle...) et supprimerRN restent disponibles: elles travaillent
+    sur les valeurs, c'est-à-dire les clés transformées. Les insertions de
+    valeurs seules (inserer, insererRN) lèvent TypeError: une entrée
+    s'ajoute par d[cle] = donnee, un lot d'entrées par insererRNLot().
+    """
+    # Valeurs par défaut, celles des noeuds vides
+    cle = None
+    donnee = None
+    # Transformation des clés, sur la racine seulement
+    _transformation = None
+
+    def __init__(self, valeur=None, parent=None, fonctionCle=None, comparateur=None):
+        NoeudRN.__init__(self, valeur, parent)
+        if comparateur is not None:
+            ordre = functools.cmp_to_key(comparateur)
+            if fonctionCle is None: self._transformation = ordre
+            else: self._transformation = lambda cle: ordre(fonctionCle(cle))
+        elif fonctionCle is not None:
+            self._transformation = fonctionCle
+
+    def _valeurDe(self, cle):
+        transformation = self._transformation
+        return cle if transformation is None else transformation(cle)
+
+    def _echangerContenu(self, autre):
+        NoeudRN._echangerContenu(self, autre)
+        self.cle, autre.cle = autre.cle, self.cle
+        self.donnee, autre.donnee = autre.donnee, self.donnee
+
+    def _copierValeur(self, source):
+        self.valeur = source.valeur
+        self.cle = source.cle
+        self.donnee = source.donnee
+
+    def _placer(self, cle, donnee):
+        """
+        Retourne le noeud de la clé, après l'avoir insérée avec la donnée si
+        elle était absente: une seule descente dans les deux cas.
+        """
+        valeur = self._valeurDe(cle)
+        noeud = self._placeDe(valeur, self)
+        if noeud.valeur is None:
+            # Clé et donnée sont posées avant les rotations, qui les déplacent
+            noeud.cle = cle
+            noeud.donnee = donnee
+            noeud = self._insererDans(noeud, valeur, self)
+        return noeud
+
+    def inserer(self, valeur):
+        raise TypeError('Un DictionnaireRN reçoit des entrées: d[cle] = donnee')
+
+    insererRN = inserer
+
+    def insererRNLot(self, entrees):
+        """
+        Ajoute des paires (cle, donnee), comme dict.update(): pour des clés
+        de même valeur, la dernière donnée l'emporte, y compris sur celle
+        d'une clé déjà présente, mais c'est la première clé qui est gardée
+        (celle déjà présente s'il y en a une), comme par d[cle] = donnee.
+
+        Comme pour NoeudRN.insererRNLot(), si le dictionnaire est petit
+        devant le lot, il est reconstruit en temps linéaire: les valeurs
+        fusionnées passent par depuisTrie(), puis les clés et les données
+        sont reposées sur les noeuds dans l'ordre infixe. Sinon chaque
+        entrée est placée par une descente (voir _placer).
+        """
+        # Les valeurs transformées ne sont pas forcément hachables
+        # (cmp_to_key), d'où le tri (stable) plutôt qu'un dict
+        premier = lambda entree: entree[0]
+        lot = self._regrouper(sorted(((self._valeurDe(cle), cle, donnee) for cle, donnee in entrees),
+                                     key=premier))
+        if not lot: return
+
+        if not self._estPlusPetitQue(NoeudRN.facteurReconstruction * len(lot)):
+            for valeur, cle, donnee in lot:
+                self._placer(cle, donnee).donnee = donnee
+            return
+
+        # À valeur égale, l'entrée présente vient avant celle du lot: elle
+        # garde sa clé et prend la donnée du lot
+        presentes = ((n.valeur, n.cle, n.donnee) for n in self._noeudsEnOrdre())
+        fusion = self._regrouper(heapq.merge(presentes, lot, key=premier))
+        self._adopter(self._depuisEntrees(fusion))
+        if self._avecTailles: self.activerTailles()
+        if self._statistiques is not None: self._statistiques['reconstructions'] += 1
+
+    @staticmethod
+    def _regrouper(entrees):
+        """
+        Regroupe les entrées (valeur, cle, donnee) croissantes de même
+        valeur en une seule, avec la première clé et la dernière donnée.
+        Lève ValueError si les entrées ne sont pas triées.
+        """
+        lot = []
+        for entree in entrees:
+            if lot and not lot[-1][0] < entree[0]:
+                if entree[0] < lot[-1][0]:
+                    raise ValueError('Les clés ne sont pas triées: {} après {}.'.format(entree[1], lot[-1][1]))
+                lot[-1] = lot[-1][:2] + entree[2:]
+            else:
+                lot.append(entree)
+        return lot
+
+    @classmethod
+    def _depuisEntrees(cls, entrees):
+        """
+        Arbre des entrées (valeur, cle, donnee), de valeurs strictement
+        croissantes, construit par NoeudRN.depuisTrie(). La racine n'a pas
+        de transformation des clés.
+        """
+        arbre = super().depuisTrie(entree[0] for entree in entrees)
+        for noeud, (_, cle, donnee) in zip(arbre._noeudsEnOrdre(), entrees):
+            noeud.cle = cle
+            noeud.donnee = donnee
+        return arbre
+
+    @classmethod
+    def depuisTrie(cls, entrees, trier=False, fonctionCle=None, comparateur=None):
+        """
+        Comme NoeudRN.depuisTrie(), à partir de paires (cle, donnee) dans
+        l'ordre des clés, transformées par fonctionCle et comparateur comme
+        pour le constructeur. Pour des clés de même valeur, la première clé
+        est gardée avec la dernière donnée, comme pour insererRNLot().
+        Lève ValueError si les clés ne sont pas triées, sauf avec
+        trier=True.
+        """
+        dictionnaire = cls(fonctionCle=fonctionCle, comparateur=comparateur)
+        lot = ((dictionnaire._valeurDe(cle), cle, donnee) for cle, donnee in entrees)
+        if trier: lot = sorted(lot, key=lambda entree: entree[0])
+        dictionnaire._adopter(cls._depuisEntrees(cls._regrouper(lot)))
+        return dictionnaire
+
+    @classmethod
+    def joindre(cls, gauche, entree, droite):
+        """
+        Comme NoeudRN.joindre(), avec une entrée (cle, donnee) entre les
+        deux dictionnaires. Le résultat garde la transformation des clés de
+        'gauche', qui doit être celle de 'droite'.
+        """
+        cle, donnee = entree
+        transformation = gauche._transformation
+        valeur = gauche._valeurDe(cle)
+        racine = super().joindre(gauche, valeur, droite)
+        racine._transformation = transformation
+        noeud = racine.rechercher(valeur)
+        noeud.cle = cle
+        noeud.donnee = donnee
+        return racine
+
+    def _oublierEtatRacine(self):
+        NoeudRN._oublierEtatRacine(self)
+        self.__dict__.pop('_transformation', None)
+
+    @classmethod
+    def deserialiser(cls, valeurs, drapeaux):
+        """
+        serialiser() ne garde que les valeurs, pas les clés ni les données.
+        """
+        raise TypeError('Un DictionnaireRN ne peut pas être désérialisé')
+
+    def __getitem__(self, cle):
+        noeud = self.rechercher(self._valeurDe(cle))
+        if noeud is None:
+            raise KeyError(cle)
+        return noeud.donnee
+
+    def __setitem__(self, cle, donnee):
+        self._placer(cle, donnee).donnee = donnee
+
+    def __delitem__(self, cle):
+        noeud = self.rechercher(self._valeurDe(cle))
+        if noeud is None:
+            raise KeyError(cle)
+        self.supprimerNoeud(noeud)
+
+    def __contains__(self, cle):
+        return self.rechercher(self._valeurDe(cle)) is not None
+
+    def get(self, cle, defaut=None):
+        noeud = self.rechercher(self._valeurDe(cle))
+        return defaut if noeud is None else noeud.donnee
+
+    def setdefault(self, cle, defaut=None):
+        return self._placer(cle, defaut).donnee
+
+    def pop(self, cle, *defaut):
+        """
+        Supprime la clé et retourne sa donnée, ou defaut si elle est absente.
+        Lève KeyError si elle est absente et qu'il n'y a pas de défaut.
+        """
+        noeud = self.rechercher(self._valeurDe(cle))
+        if noeud is None:
+            if defaut: return defaut[0]
+            raise KeyError(cle)
+        donnee = noeud.donnee
+        self.supprimerNoeud(noeud)
+        return donnee
+
+    """
+    Parcours paresseux, dans l'ordre des clés
+    """
+    def __iter__(self):
+        for noeud in self._noeudsEnOrdre():
+            yield noeud.cle
+
+    def __reversed__(self):
+        for noeud in self._noeudsEnOrdre(decroissant=True):
+            yield noeud.cle
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        for noeud in self._noeudsEnOrdre():
+            yield noeud.donnee
+
+    def items(self):
+        for noeud in self._noeudsEnOrdre():
+            yield noeud.cle, noeud.donnee
+
+    def scinder(self, cle):
+        """
+        Comme NoeudRN.scinder(), selon une clé. Les deux dictionnaires
+        gardent la transformation des clés; l'entrée de la clé elle-même
+        n'est dans aucun des deux.
+        """
+        gauche, present, droite = NoeudRN.scinder(self, self._valeurDe(cle))
+        gauche._transformation = droite._transformation = self._transformation
+        return gauche, present, droite
+
+    def sauvegarder(self, chemin):
+        """
+        Le format de ArbresRNFichier n'a de place que pour les valeurs.
+        """
+        raise TypeError('Un DictionnaireRN ne peut pas être sauvegardé')
+
+    @classmethod
+    def charger(cls, chemin):
+        raise TypeError('Un DictionnaireRN ne peut pas être chargé')
+
+
+class NoeudRNLecture(NoeudRN):
+    """
+    Base des adaptateurs qui présentent un autre moteur avec l'interface de
+    NoeudRN (ArbresRNTableau.NoeudRNTableau, ArbresB.NoeudRNArbreB...).
+
+    Leurs champs valeur, couleur, fg, fd et p sont des propriétés en lecture
+    seule: les méthodes de NoeudRN qui modifient les noeuds ne peuvent pas
+    fonctionner, et lèvent TypeError (voir METHODES_MODIFIANTES).
+
+    Celles de METHODES_CONFIEES sont confiées au moteur de l'adaptateur,
+    self.arbre, s'il a une méthode de ce nom: seulement sur la racine
+    (TypeError sur un autre noeud, avant toute modification), qui est
+    ensuite resynchronisée par rafraichir(). L'adaptateur fournit
+    _resynchroniser(), qui la fait de nouveau désigner la racine du moteur.
+    """
+    METHODES_MODIFIANTES = (
+        'supprimerNoeud', 'corrigerInsertion', 'corrigerSuppression',
+        'corrigerConfigurationLigne', 'rotationGauche', 'rotationDroite',
+        'activerStatistiques', 'joindre', 'scinder', 'reunir', 'intersecter',
+        'soustraire', 'depuisTrie', 'deserialiser', 'charger')
+    METHODES_CONFIEES = ('inserer', 'insererRN', 'insererRNLot', 'supprimerRN',
+                         'discard', 'pop')
+
+    def _exigerRacine(self, nom):
+        if self.p is not None:
+            raise TypeError("{}() ne s'applique qu'à la racine de la vue".format(nom))
+
+    def rafraichir(self):
+        """
+        Resynchronise la racine avec le moteur après une modification: les
+        vues des autres noeuds sont abandonnées.
+        """
+        self._exigerRacine('rafraichir')
+        self._resynchroniser()
+        self._abandonnerFils()
+
+    def _abandonnerFils(self):
+        """
+        Après une modification du moteur, la racine abandonne les vues de
+        ses descendants, les tailles calculées par activerTailles() (qui ne
+        sont pas maintenues) et sa géométrie.
+        """
+        assert self.estRacine()
+        self._fg = None
+        self._fd = None
+        self.__dict__.pop('_avecTailles', None)
+        self.__dict__.pop('taille', None)
+        self.invaliderGeometrie()
+
+def _interdire(nom):
+    def methode(*arguments, **options):
+        raise TypeError("{}() n'est pas disponible sur une vue en lecture seule".format(nom))
+    methode.__name__ = nom
+    return methode
+
+def _confier(nom):
+    def methode(self, *arguments, **options):
+        moteur = getattr(getattr(self, 'arbre', None), nom, None)
+        if moteur is None:
+            raise TypeError("{}() n'est pas disponible sur une vue en lecture seule".format(nom))
+        self._exigerRacine(nom)
+        resultat = moteur(*arguments, **options)
+        self.rafraichir()
+        return resultat
+    methode.__name__ = nom
+    return methode
+
+for _nom in NoeudRNLecture.METHODES_MODIFIANTES:
+    setattr(NoeudRNLecture, _nom, _interdire(_nom))
+for _nom in NoeudRNLecture.METHODES_CONFIEES:
+    setattr(NoeudRNLecture, _nom, _confier(_nom))
+del _nom
+
+
+class NoeudRNCompact:
+    """
+    Noeud d'un ArbreRNCompact.
+
+    Mêmes champs fondamentaux que NoeudRN (valeur, fg, fd, p, couleur), mais
+    déclarés dans __slots__: pas de dictionnaire d'attributs, ni de champ
+    verbosite par noeud.
+    """
+    __slots__ = ('valeur', 'fg', 'fd', 'p', 'couleur')
+
+    def __init__(self, valeur, fg, fd, p, couleur):
+        self.valeur = valeur
+        self.fg = fg
+        self.fd = fd
+        self.p = p
+        self.couleur = couleur
+
+
+class ArbreRNCompact:
+    """
+    Arbre rouge-noir économe en mémoire, pour les arbres de plusieurs
+    millions de valeurs:
+     - les noeuds sont des NoeudRNCompact
+     - un seul noeud vide (nil), noir, est partagé par toutes les feuilles
+       de l'arbre
+     - une insertion crée exactement un noeud
+
+    Contrairement à NoeudRN, l'arbre est un objet distinct de sa racine:
+    les rotations relient simplement les pointeurs et peuvent changer
+    la racine.
+
+    Le noeud vide étant partagé, son champ p n'a pas de signification.
+    """
+    def __init__(self):
+        self.nil = NoeudRNCompact(None, None, None, None, 'N')
+        self.racine = self.nil
+        self.taille = 0
+
+    def __len__(self):
+        return self.taille
+
+    def estVide(self):
+        return self.racine is self.nil
+
+    def rechercher(self, valeur):
+        """
+        Retourne le noeud portant la valeur, None si elle est absente.
+        """
+        nil = self.nil
+        noeud = self.racine
+        while noeud is not nil:
+            v = noeud.valeur
+            if   valeur > v: noeud = noeud.fd
+            elif valeur < v: noeud = noeud.fg
+            else: return noeud
+        return None
+
+    def __contains__(self, valeur):
+        return self.rechercher(valeur) is not None
+
+    def __iter__(self):
+        """
+        Parcours infixe paresseux, avec une pile des noeuds dont le
+        sous-arbre gauche est en cours de parcours.
+        """
+        nil = self.nil
+        P = []
+        noeud = self.racine
+        while True:
+            while noeud is not nil:
+                P.append(noeud)
+                noeud = noeud.fg
+            if not P: return
+            noeud = P.pop()
+            yield noeud.valeur
+            noeud = noeud.fd
+
+    def insererRN(self, valeur):
+        """
+        Insère une valeur et rééquilibre, comme NoeudRN.insererRN().
+        """
+        nil = self.nil
+        p, noeud = None, self.racine
+        while noeud is not nil:
+            p = noeud
+            if   valeur > noeud.valeur: noeud = noeud.fd
+            elif valeur < noeud.valeur: noeud = noeud.fg
+            else: return
+
+        noeud = NoeudRNCompact(valeur, nil, nil, p, 'R')
+        if p is None:             self.racine = noeud
+        elif valeur > p.valeur:   p.fd = noeud
+        else:                     p.fg = noeud
+        self.taille += 1
+
+        # Corrections: voir NoeudRN.corrigerInsertion()
+        while noeud.p is not None and noeud.p.couleur == 'R':
+            p = noeud.p
+            gp = p.p
+            if p is gp.fg:
+                oncle = gp.fd
+                if oncle.couleur == 'R':    # Cas 1
+                    p.couleur = oncle.couleur = 'N'
+                    gp.couleur = 'R'
+                    noeud = gp
+                    continue
+                if noeud is p.fd:           # Cas 2-2
+                    noeud = p
+                    self.rotationGauche(noeud)
+                    p = noeud.p
+                p.couleur = 'N'             # Cas 2-1
+                gp.couleur = 'R'
+                self.rotationDroite(gp)
+            else:
+                oncle = gp.fg
+                if oncle.couleur == 'R':
+                    p.couleur = oncle.couleur = 'N'
+                    gp.couleur = 'R'
+                    noeud = gp
+                    continue
+                if noeud is p.fg:
+                    noeud = p
+                    self.rotationDroite(noeud)
+                    p = noeud.p
+                p.couleur = 'N'
+                gp.couleur = 'R'
+                self.rotationGauche(gp)
+            break
+        self.racine.couleur = 'N'
+
+    def rotationGauche(self, b):
+        """
+        Rotation gauche autour de b (notations de NoeudRN.rotationGauche()).
+        """
+        d = b.fd
+        b.fd = d.fg
+        if d.fg is not self.nil: d.fg.p = b
+        d.p = b.p
+        if b.p is None:      self.racine = d
+        elif b is b.p.fg:    b.p.fg = d
+        else:                b.p.fd = d
+        d.fg = b
+        b.p = d
+
+    def rotationDroite(self, d):
+        """
+        Rotation droite autour de d (notations de NoeudRN.rotationDroite()).
+        """
+        b = d.fg
+        d.fg = b.fd
+        if b.fd is not self.nil: b.fd.p = d
+        b.p = d.p
+        if d.p is None:      self.racine = b
+        elif d is d.p.fd:    d.p.fd = b
+        else:                d.p.fg = b
+        b.fd = d
+        d.p = b
+
+    def calculerHauteur(self):
+        """
+        Même convention que NoeudRN.calculerHauteur(): une feuille est de
+        hauteur 0. Parcours itératif.
+        """
+        if self.estVide(): return 0
+        hauteur = 0
+        P = [(self.racine, 0)]
+        while P:
+            noeud, h = P.pop()
+            hauteur = max(hauteur, h)
+            if noeud.fg is not self.nil: P.append((noeud.fg, h+1))
+            if noeud.fd is not self.nil: P.append((noeud.fd, h+1))
+        return hauteur
+
+    def octetsParCle(self):
+        """
+        Retourne la mémoire occupée par l'arbre (objet arbre, noeuds et noeud
+        vide partagé), divisée par le nombre de valeurs.
+        """
+        if self.estVide(): return 0
+        octets = sys.getsizeof(self) + sys.getsizeof(self.__dict__)
+        octets += sys.getsizeof(self.nil)
+        P = [self.racine]
+        while P:
+            noeud = P.pop()
+            octets += sys.getsizeof(noeud)
+            if noeud.fg is not self.nil: P.append(noeud.fg)
+            if noeud.fd is not self.nil: P.append(noeud.fd)
+        return octets / self.taille
 
     
 if __name__ == '__main__':
-    arbre = NoeudRN()
-
-    N = 1000000
-    valeurs = [random.randrange(10*N) for _ in range(N)]
-
-    print('Début de l\'insertion.')
-    t1 = time.clock()
-    for i, valeur in enumerate(valeurs):
-        if i % ( N // 1000 ) == 0:
-            print('{} valeurs insérées.'.format(i))
-        arbre.insererRN(valeur)
-    t2 = time.clock()
-    print('Fin de l\'insertion: {} secondes.'.format(t2-t1))
-
-    h = arbre.calculerHauteur()
-    print('Hauteur de l\'arbre: {}, 2^{} = {}'.format(h,h, 2**h))
+    # Les mesures de performance sont dans bench_arbres.py
+    import bench_arbres
+    bench_arbres.principal(sys.argv[1:])
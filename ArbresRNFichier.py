@@ -0,0 +1,392 @@
+# coding: utf-8
+"""
+Enregistrement des arbres rouge-noir dans un fichier binaire.
+
+Le fichier décrit un arbre rouge-noir "implicite": les valeurs y sont
+rangées dans l'ordre croissant, et le noeud d'un intervalle [debut, fin[
+de valeurs est celui du milieu, (debut + fin) // 2, ses fils étant les
+noeuds des deux moitiés. Toutes les branches ont alors la même longueur à
+un près: les noeuds du niveau le plus profond sont rouges s'il est
+incomplet, les autres noirs. Un tableau de bits donne ces couleurs.
+
+Format (petit-boutiste):
+ - en-tête de 16 octets: 'ARNB', version (2 octets), type des valeurs
+   ('q': entiers signés sur 64 bits, 'd': flottants), un octet nul, nombre
+   de valeurs n (8 octets)
+ - les n valeurs, 8 octets chacune, dans l'ordre croissant
+ - les couleurs: ceil(n / 8) octets, le bit i % 8 de l'octet i // 8 valant
+   1 si le noeud de la i-ème valeur est rouge
+
+La forme de l'arbre enregistré n'est pas conservée (les valeurs en ordre
+croissant et les couleurs ne la déterminent pas toujours): l'arbre relu a
+la forme implicite ci-dessus, ce qui permet:
+ - charger(): reconstruction en temps linéaire, sans rotation
+ - ArbreRNFichier: recherches directement dans le fichier projeté en
+   mémoire (mmap), sans créer de noeud
+ - EcrivainRN: écriture au fil de l'eau, la mémoire utilisée ne dépendant
+   pas du nombre de valeurs
+"""
+
+import bisect
+import mmap
+import os
+import struct
+import sys
+import uuid
+from array import array
+
+import ArbresRN
+
+MAGIQUE = b'ARNB'
+VERSION = 1
+ENTETE = struct.Struct('<4sHcxQ')
+
+def _hauteur(n):
+    """
+    Profondeur des noeuds les plus profonds de l'arbre implicite de n
+    valeurs, et booléen indiquant si ce niveau est incomplet (ses noeuds
+    sont alors rouges).
+    """
+    h = max(n.bit_length() - 1, 0)
+    return h, n != 2**(h + 1) - 1
+
+def _couleursImplicites(n):
+    """
+    Génère, dans l'ordre croissant des indices, 1 pour un noeud rouge de
+    l'arbre implicite de n valeurs, 0 pour un noeud noir. Parcours infixe
+    avec une pile: O(log n) en mémoire.
+    """
+    h, incomplet = _hauteur(n)
+    P = []
+    debut, fin, g = 0, n, 0
+    while P or debut < fin:
+        if debut < fin:
+            milieu = (debut + fin) // 2
+            P.append((milieu, fin, g))
+            fin, g = milieu, g + 1
+        else:
+            milieu, fin, g = P.pop()
+            yield 1 if incomplet and g == h else 0
+            debut, g = milieu + 1, g + 1
+
+
+class EcrivainRN:
+    """
+    Écrit un fichier au fil de l'eau: les valeurs, strictement croissantes,
+    sont ajoutées une par une par ajouter(), et ne sont gardées en mémoire
+    que le temps de remplir un tampon. fermer() écrit les couleurs et le
+    nombre de valeurs dans l'en-tête.
+
+    L'écriture se fait dans un fichier temporaire du même répertoire, qui
+    ne remplace le fichier 'chemin' (par os.replace) qu'une fois complet:
+    un fichier existant n'est jamais tronqué par une écriture qui échoue.
+    abandonner(), appelé en cas d'erreur dans le bloc with, supprime le
+    fichier temporaire.
+
+        with EcrivainRN('arbre.arn') as ecrivain:
+            for valeur in arbre:
+                ecrivain.ajouter(valeur)
+    """
+    tailleTampon = 1 << 16
+
+    def __init__(self, chemin, typeValeurs='q'):
+        if typeValeurs not in ('q', 'd'):
+            raise ValueError('Type de valeurs non pris en charge: {!r}'.format(typeValeurs))
+        self.typeValeurs = typeValeurs
+        self.chemin = chemin
+        self.temporaire = '{}.{}.tmp'.format(chemin, uuid.uuid4().hex[:8])
+        self.fichier = open(self.temporaire, 'xb')
+        # En-tête provisoire, sans le nombre magique: fermer() l'écrit
+        self.fichier.write(ENTETE.pack(bytes(4), VERSION, typeValeurs.encode(), 0))
+        self.tampon = array(typeValeurs)
+        self.n = 0
+        self.derniere = None
+
+    def ajouter(self, valeur):
+        """
+        Lève ValueError si la valeur ne peut pas être écrite exactement dans
+        le type du fichier (flottant, entier hors de [-2^63, 2^63[, entier
+        que le type 'd' arrondirait...), ou si elle n'est pas supérieure à
+        la précédente.
+        """
+        try:
+            self.tampon.append(valeur)
+        except (TypeError, OverflowError):
+            raise ValueError('Valeur non représentable par le type {!r}: {!r}'.format(self.typeValeurs, valeur)) from None
+        if self.tampon[-1] != valeur:
+            self.tampon.pop()
+            raise ValueError('Valeur non représentable exactement par le type {!r}: {!r}'.format(self.typeValeurs, valeur))
+        if self.n and not self.derniere < valeur:
+            self.tampon.pop()
+            raise ValueError('Les valeurs ne sont pas croissantes: {} après {}.'.format(valeur, self.derniere))
+        self.derniere = valeur
+        self.n += 1
+        if len(self.tampon) >= self.tailleTampon:
+            self._vider()
+
+    def _vider(self):
+        if sys.byteorder != 'little': self.tampon.byteswap()
+        self.tampon.tofile(self.fichier)
+        self.tampon = array(self.typeValeurs)
+
+    def fermer(self):
+        if self.fichier.closed: return
+        try:
+            self._ecrireFin()
+            self.fichier.close()
+            os.replace(self.temporaire, self.chemin)
+        except BaseException:
+            self.abandonner()
+            raise
+
+    def abandonner(self):
+        """
+        Ferme et supprime le fichier temporaire: le fichier 'chemin' n'est
+        pas modifié.
+        """
+        self.fichier.close()
+        try:
+            os.remove(self.temporaire)
+        except FileNotFoundError:
+            pass
+
+    def _ecrireFin(self):
+        self._vider()
+        octets, octet = bytearray(), 0
+        for i, rouge in enumerate(_couleursImplicites(self.n)):
+            octet |= rouge << (i & 7)
+            if i & 7 == 7:
+                octets.append(octet)
+                octet = 0
+                if len(octets) >= self.tailleTampon:
+                    self.fichier.write(octets)
+                    octets.clear()
+        if self.n & 7: octets.append(octet)
+        self.fichier.write(octets)
+        self.fichier.seek(0)
+        self.fichier.write(ENTETE.pack(MAGIQUE, VERSION, self.typeValeurs.encode(), self.n))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, typeException, *exception):
+        if typeException is None: self.fermer()
+        else:                     self.abandonner()
+
+
+def sauvegarder(arbre, chemin):
+    """
+    Écrit les valeurs de l'arbre dans un fichier, au fil d'un parcours
+    infixe: voir EcrivainRN. Les valeurs sont écrites comme des flottants
+    si l'une d'elles en est un, sinon comme des entiers sur 64 bits; un
+    premier parcours en décide. Lève ValueError sur la première valeur qui
+    ne peut pas être écrite exactement.
+    """
+    typeValeurs = 'd' if any(isinstance(valeur, float) for valeur in arbre) else 'q'
+    with EcrivainRN(chemin, typeValeurs) as ecrivain:
+        for valeur in arbre:
+            ecrivain.ajouter(valeur)
+
+def _lire(tampon):
+    """
+    Vérifie l'en-tête et retourne (n, valeurs, couleurs): les valeurs sont
+    lues directement dans le tampon (une copie n'est faite que sur une
+    machine gros-boutiste).
+    """
+    if len(tampon) < ENTETE.size:
+        raise ValueError('Fichier trop court pour un arbre')
+    magique, version, typeValeurs, n = ENTETE.unpack_from(tampon)
+    if magique != MAGIQUE:
+        raise ValueError('Ce fichier ne contient pas un arbre')
+    if version != VERSION:
+        raise ValueError('Version de fichier non prise en charge: {}'.format(version))
+    typeValeurs = typeValeurs.decode()
+    if typeValeurs not in ('q', 'd'):
+        raise ValueError('Type de valeurs non pris en charge: {!r}'.format(typeValeurs))
+    fin = ENTETE.size + 8 * n
+    if len(tampon) != fin + (n + 7) // 8:
+        raise ValueError('Taille de fichier incohérente pour {} valeurs'.format(n))
+
+    vue = memoryview(tampon)
+    valeurs = vue[ENTETE.size:fin].cast(typeValeurs)
+    if sys.byteorder != 'little':
+        valeurs = array(typeValeurs, valeurs)
+        valeurs.byteswap()
+    return n, valeurs, vue[fin:]
+
+def _rouge(couleurs, i):
+    return couleurs[i >> 3] >> (i & 7) & 1
+
+def charger(chemin, classe=ArbresRN.NoeudRN):
+    """
+    Lit un fichier écrit par sauvegarder() ou EcrivainRN, et retourne la
+    racine de l'arbre reconstruit avec la forme et les couleurs du fichier,
+    en temps linéaire et sans rotation. Le ramasse-miettes est suspendu
+    pendant la reconstruction (voir ArbresRN._sansRamasseMiettes).
+    """
+    with open(chemin, 'rb') as fichier:
+        if fichier.seek(0, 2) == 0:
+            raise ValueError('Fichier vide')
+        with mmap.mmap(fichier.fileno(), 0, access=mmap.ACCESS_READ) as projection:
+            n, valeurs, couleurs = _lire(projection)
+            try:
+                with ArbresRN._sansRamasseMiettes():
+                    return _construire(classe, n, valeurs, couleurs)
+            finally:
+                # Les vues doivent être libérées avant la projection
+                del valeurs, couleurs
+
+def _construire(classe, n, valeurs, couleurs):
+    racine = classe()
+    # Pile des intervalles [debut, fin[ non vides et de leur noeud
+    P = [(0, n, racine)] if n else []
+    while P:
+        debut, fin, noeud = P.pop()
+        milieu = (debut + fin) // 2
+        noeud.valeur = valeurs[milieu]
+        if couleurs[milieu >> 3] >> (milieu & 7) & 1: noeud.couleur = 'R'
+        noeud.fg = fg = classe(parent=noeud)
+        noeud.fd = fd = classe(parent=noeud)
+        if milieu > debut:   P.append((debut, milieu, fg))
+        if milieu + 1 < fin: P.append((milieu + 1, fin, fd))
+    return racine
+
+
+class ArbreRNFichier:
+    """
+    Arbre enregistré, en lecture seule, projeté en mémoire: les recherches
+    se font par dichotomie dans le fichier, sans créer de noeud, et seules
+    les pages lues sont chargées par le système.
+
+        with ArbreRNFichier('arbre.arn') as arbre:
+            42 in arbre
+    """
+    def __init__(self, chemin):
+        with open(chemin, 'rb') as fichier:
+            if fichier.seek(0, 2) == 0:
+                raise ValueError('Fichier vide')
+            self.projection = mmap.mmap(fichier.fileno(), 0, access=mmap.ACCESS_READ)
+        self.taille, self.valeurs, self.couleurs = _lire(self.projection)
+
+    def fermer(self):
+        if self.projection is None: return
+        self.valeurs = self.couleurs = None
+        self.projection.close()
+        self.projection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.fermer()
+
+    def __len__(self):
+        return self.taille
+
+    def estVide(self):
+        return self.taille == 0
+
+    def __contains__(self, valeur):
+        i = bisect.bisect_left(self.valeurs, valeur)
+        return i < self.taille and self.valeurs[i] == valeur
+
+    def __iter__(self):
+        return iter(self.valeurs)
+
+    def rang(self, valeur):
+        """
+        Nombre de valeurs strictement inférieures à 'valeur'.
+        """
+        return bisect.bisect_left(self.valeurs, valeur)
+
+    def selection(self, i):
+        """
+        La i-ème plus petite valeur (à partir de 0).
+        """
+        if not 0 <= i < self.taille:
+            raise IndexError(i)
+        return self.valeurs[i]
+
+    def plancher(self, valeur):
+        """
+        La plus grande valeur <= 'valeur', None s'il n'y en a pas.
+        """
+        i = bisect.bisect_right(self.valeurs, valeur)
+        return self.valeurs[i - 1] if i else None
+
+    def plafond(self, valeur):
+        """
+        La plus petite valeur >= 'valeur', None s'il n'y en a pas.
+        """
+        i = bisect.bisect_left(self.valeurs, valeur)
+        return self.valeurs[i] if i < self.taille else None
+
+    def intervalle(self, a, b, inclureBornes=True):
+        """
+        Générateur des valeurs comprises entre a et b, comme
+        NoeudRN.intervalle(): inclureBornes est un booléen, ou un couple de
+        booléens pour traiter séparément les bornes a et b.
+        """
+        if isinstance(inclureBornes, bool):
+            inclureBornes = (inclureBornes, inclureBornes)
+        inclureA, inclureB = inclureBornes
+
+        debut = (bisect.bisect_left if inclureA else bisect.bisect_right)(self.valeurs, a)
+        fin = (bisect.bisect_right if inclureB else bisect.bisect_left)(self.valeurs, b)
+        for i in range(debut, fin):
+            yield self.valeurs[i]
+
+    def vue(self):
+        """
+        Retourne un NoeudRNFichier représentant la racine de l'arbre
+        implicite, utilisable partout où un NoeudRN est attendu pour la
+        lecture et l'affichage.
+        """
+        return NoeudRNFichier(self, 0, self.taille)
+
+
+class NoeudRNFichier(ArbresRN.NoeudRNLecture):
+    """
+    Adaptateur présentant le noeud de l'intervalle [debut, fin[ d'un
+    ArbreRNFichier avec l'interface de NoeudRN (sur le modèle de
+    ArbresRNTableau.NoeudRNTableau): un intervalle vide est un noeud vide,
+    les fils sont créés à la demande puis conservés. Le fichier est en
+    lecture seule: les modifications lèvent TypeError (voir
+    ArbresRN.NoeudRNLecture).
+    """
+    def __init__(self, arbre, debut, fin, parent=None):
+        self.arbre = arbre
+        self.debut = debut
+        self.fin = fin
+        self._p = parent
+        self._fg = None
+        self._fd = None
+        self.verbosite = 0
+
+    @property
+    def valeur(self):
+        if self.debut == self.fin: return None
+        return self.arbre.valeurs[(self.debut + self.fin) // 2]
+
+    @property
+    def couleur(self):
+        if self.debut == self.fin: return 'N'
+        return 'R' if _rouge(self.arbre.couleurs, (self.debut + self.fin) // 2) else 'N'
+
+    @property
+    def p(self):
+        return self._p
+
+    @property
+    def fg(self):
+        if self.debut == self.fin: return None
+        if self._fg is None:
+            self._fg = NoeudRNFichier(self.arbre, self.debut, (self.debut + self.fin) // 2, self)
+        return self._fg
+
+    @property
+    def fd(self):
+        if self.debut == self.fin: return None
+        if self._fd is None:
+            self._fd = NoeudRNFichier(self.arbre, (self.debut + self.fin) // 2 + 1, self.fin, self)
+        return self._fd
@@ -0,0 +1,264 @@
+# coding: utf-8
+
+import ArbresRN
+
+class NoeudPersistant:
+    """
+    Noeud d'un ArbreRNPersistant. Un noeud publié (accessible depuis la
+    racine d'une version) n'est plus jamais modifié: il peut donc être
+    partagé par plusieurs versions de l'arbre.
+
+    Les noeuds vides sont représentés par None, et il n'y a pas de lien
+    vers le parent: un noeud partagé a un parent différent dans chaque
+    version.
+    """
+    __slots__ = ('valeur', 'fg', 'fd', 'couleur')
+
+    def __init__(self, valeur, fg, fd, couleur):
+        self.valeur = valeur
+        self.fg = fg
+        self.fd = fd
+        self.couleur = couleur
+
+    def copie(self):
+        return NoeudPersistant(self.valeur, self.fg, self.fd, self.couleur)
+
+
+class ArbreRNPersistant:
+    """
+    Arbre rouge-noir persistant: inserer() et insererRN() ne modifient pas
+    l'arbre, mais retournent une nouvelle version qui partage avec
+    l'ancienne tous les sous-arbres non touchés.
+
+    Seuls les noeuds du chemin de la racine au nouveau noeud sont recopiés,
+    ainsi que les oncles recolorés par les corrections: O(log n) nouveaux
+    noeuds par insertion. Les corrections sont celles de
+    NoeudRN.insererRN(), appliquées aux copies, si bien que les arbres
+    obtenus ont la même forme.
+
+    Un instantané est donc gratuit: il suffit de garder une référence vers
+    la version courante, qui ne changera jamais.
+    """
+    def __init__(self, racine=None, taille=0):
+        self.racine = racine
+        self.taille = taille
+
+    def __len__(self):
+        return self.taille
+
+    def estVide(self):
+        return self.racine is None
+
+    def __contains__(self, valeur):
+        noeud = self.racine
+        while noeud is not None:
+            if   valeur > noeud.valeur: noeud = noeud.fd
+            elif valeur < noeud.valeur: noeud = noeud.fg
+            else: return True
+        return False
+
+    def __iter__(self):
+        """
+        Parcours infixe paresseux.
+        """
+        P = []
+        noeud = self.racine
+        while P or noeud is not None:
+            while noeud is not None:
+                P.append(noeud)
+                noeud = noeud.fg
+            noeud = P.pop()
+            yield noeud.valeur
+            noeud = noeud.fd
+
+    def _copierChemin(self, valeur):
+        """
+        Recopie le chemin de la racine jusqu'à l'emplacement de la valeur,
+        et y accroche un nouveau noeud rouge portant la valeur. Retourne la
+        liste des copies, de la racine au nouveau noeud, ou None si la
+        valeur est déjà présente.
+        """
+        chemin = []
+        noeud = self.racine
+        while noeud is not None:
+            if   valeur > noeud.valeur: suivant = noeud.fd
+            elif valeur < noeud.valeur: suivant = noeud.fg
+            else: return None
+            chemin.append(noeud.copie())
+            noeud = suivant
+
+        nouveau = NoeudPersistant(valeur, None, None, 'R')
+        chemin.append(nouveau)
+        for p, fils in zip(chemin, chemin[1:]):
+            if fils.valeur > p.valeur: p.fd = fils
+            else:                      p.fg = fils
+        return chemin
+
+    def inserer(self, valeur):
+        """
+        Retourne la version où la valeur est insérée sans rééquilibrage
+        (comme NoeudRN.inserer(): tout noeud sauf la racine est rouge).
+        """
+        chemin = self._copierChemin(valeur)
+        if chemin is None: return self
+        chemin[0].couleur = 'N'
+        return ArbreRNPersistant(chemin[0], self.taille + 1)
+
+    def insererRN(self, valeur):
+        """
+        Retourne la version où la valeur est insérée, avec rééquilibrage.
+
+        Les noeuds du chemin sont des copies encore privées: les corrections
+        peuvent les modifier sans toucher aux versions précédentes. Faute de
+        lien vers le parent, on remonte le chemin par les indices.
+        """
+        chemin = self._copierChemin(valeur)
+        if chemin is None: return self
+        racine = chemin[0]
+
+        i = len(chemin) - 1
+        while i > 0 and chemin[i-1].couleur == 'R':
+            noeud, p, gp = chemin[i], chemin[i-1], chemin[i-2]  # gp existe: la racine est noire
+
+            # Cas 1: l'oncle est rouge, il est recopié pour être recoloré
+            oncle = gp.fd if p is gp.fg else gp.fg
+            if oncle is not None and oncle.couleur == 'R':
+                oncle = oncle.copie()
+                oncle.couleur = 'N'
+                if p is gp.fg: gp.fd = oncle
+                else:          gp.fg = oncle
+                p.couleur = 'N'
+                gp.couleur = 'R'
+                i -= 2
+                continue
+
+            # Cas 2-2: configuration en triangle, rotation autour du père
+            if p is gp.fg and noeud is p.fd:
+                p.fd, noeud.fg = noeud.fg, p
+                gp.fg = noeud
+                noeud, p = p, noeud
+            elif p is gp.fd and noeud is p.fg:
+                p.fg, noeud.fd = noeud.fd, p
+                gp.fd = noeud
+                noeud, p = p, noeud
+
+            # Cas 2-1: configuration en ligne, rotation autour du grand-père
+            if p is gp.fg: gp.fg, p.fd = p.fd, gp
+            else:          gp.fd, p.fg = p.fg, gp
+            p.couleur = 'N'
+            gp.couleur = 'R'
+            if i >= 3:
+                ggp = chemin[i-3]
+                if ggp.fg is gp: ggp.fg = p
+                else:            ggp.fd = p
+            else:
+                racine = p
+            break
+
+        # Cas 0: la racine est noire
+        racine.couleur = 'N'
+        return ArbreRNPersistant(racine, self.taille + 1)
+
+    def calculerHauteur(self):
+        """
+        Même convention que NoeudRN.calculerHauteur(): une feuille est de
+        hauteur 0.
+        """
+        if self.racine is None: return 0
+        hauteur = 0
+        P = [(self.racine, 0)]
+        while P:
+            noeud, h = P.pop()
+            hauteur = max(hauteur, h)
+            if noeud.fg is not None: P.append((noeud.fg, h+1))
+            if noeud.fd is not None: P.append((noeud.fd, h+1))
+        return hauteur
+
+    def vue(self):
+        """
+        Retourne un NoeudRNPersistantVue représentant la racine de cette
+        version, utilisable partout où un NoeudRN est attendu pour la
+        lecture et l'affichage (tk_arbres.ArbreGraphique en particulier).
+        """
+        return NoeudRNPersistantVue(self)
+
+
+class NoeudRNPersistantVue(ArbresRN.NoeudRNLecture):
+    """
+    Adaptateur présentant un noeud d'un ArbreRNPersistant avec l'interface
+    de NoeudRN, sur le modèle de ArbresRNTableau.NoeudRNTableau:
+
+     - les champs valeur, couleur, fg, fd sont lus dans le noeud persistant
+     - les vues des fils sont créées à la demande puis conservées, avec un
+       lien vers leur parent dans cette version
+     - les fils vides (None) ont chacun leur vue, comme les noeuds vides de
+       NoeudRN
+     - la vue de la racine garde la version affichée (attribut version).
+       inserer() et insererRN() la remplacent par la version suivante;
+       restaurer() affiche n'importe quelle autre version, par exemple
+       une version précédente gardée dans un historique
+     - insererRNLot() insère les valeurs une à une; les autres
+       modifications lèvent TypeError (voir ArbresRN.NoeudRNLecture)
+    """
+    def __init__(self, version, noeud=None, parent=None):
+        self.version = version
+        self.noeud = version.racine if parent is None else noeud
+        self._p = parent
+        self._fg = None
+        self._fd = None
+        self.verbosite = 0
+
+    @property
+    def valeur(self):
+        if self.noeud is None: return None
+        return self.noeud.valeur
+
+    @property
+    def couleur(self):
+        if self.noeud is None: return 'N'
+        return self.noeud.couleur
+
+    @property
+    def p(self):
+        return self._p
+
+    @property
+    def fg(self):
+        if self.noeud is None: return None
+        if self._fg is None:
+            self._fg = NoeudRNPersistantVue(self.version, self.noeud.fg, self)
+        return self._fg
+
+    @property
+    def fd(self):
+        if self.noeud is None: return None
+        if self._fd is None:
+            self._fd = NoeudRNPersistantVue(self.version, self.noeud.fd, self)
+        return self._fd
+
+    def restaurer(self, version):
+        """
+        La racine affiche désormais la version donnée: les vues des autres
+        noeuds sont abandonnées. Lève TypeError sur une autre vue.
+        """
+        self._exigerRacine('restaurer')
+        self.version = version
+        self.rafraichir()
+
+    def _resynchroniser(self):
+        self.noeud = self.version.racine
+
+    def inserer(self, valeur):
+        self._exigerRacine('inserer')
+        self.restaurer(self.version.inserer(valeur))
+
+    def insererRN(self, valeur):
+        self._exigerRacine('insererRN')
+        self.restaurer(self.version.insererRN(valeur))
+
+    def insererRNLot(self, valeurs):
+        self._exigerRacine('insererRNLot')
+        version = self.version
+        for valeur in sorted(set(valeurs)):
+            version = version.insererRN(valeur)
+        self.restaurer(version)
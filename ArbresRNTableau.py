@@ -0,0 +1,436 @@
+# coding: utf-8
+
+from array import array
+
+import ArbresRN
+
+# Indice du noeud vide, partagé par toutes les feuilles
+NIL = 0
+
+# Codage des couleurs dans le tableau des couleurs
+NOIR, ROUGE = 0, 1
+
+class ArbreRNTableau:
+    """
+    Arbre rouge-noir stocké "en colonnes": les valeurs, les fils gauches,
+    les fils droits, les parents et les couleurs sont rangés dans des
+    tableaux typés parallèles (module array), un noeud étant désigné par
+    son indice.
+
+     - l'indice 0 est réservé au noeud vide NIL, noir
+     - les indices libérés sont conservés dans une liste libre et réutilisés
+       par les insertions suivantes
+     - un instantané de l'arbre est une simple copie des tableaux
+       (voir copier())
+
+    Les valeurs doivent être compatibles avec le type des tableaux
+    ('q' par défaut: entiers signés sur 64 bits, 'd' pour des flottants).
+
+    L'insertion et la recherche ont la même sémantique que
+    NoeudRN.insererRN(): une valeur déjà présente n'est pas insérée une
+    seconde fois, et les arbres obtenus ont la même forme.
+    """
+    def __init__(self, typeValeurs='q'):
+        self.typeValeurs = typeValeurs
+        self.valeurs = array(typeValeurs, [0])
+        self.g = array('l', [NIL])
+        self.d = array('l', [NIL])
+        self.p = array('l', [NIL])
+        self.couleurs = array('b', [NOIR])
+        self.libres = array('l')
+        self.racine = NIL
+        self.taille = 0
+
+    def __len__(self):
+        return self.taille
+
+    def estVide(self):
+        return self.racine == NIL
+
+    def copier(self):
+        """
+        Retourne un instantané indépendant de l'arbre: copie des tableaux,
+        sans parcours des noeuds.
+        """
+        copie = ArbreRNTableau.__new__(ArbreRNTableau)
+        copie.typeValeurs = self.typeValeurs
+        copie.valeurs = self.valeurs[:]
+        copie.g = self.g[:]
+        copie.d = self.d[:]
+        copie.p = self.p[:]
+        copie.couleurs = self.couleurs[:]
+        copie.libres = self.libres[:]
+        copie.racine = self.racine
+        copie.taille = self.taille
+        return copie
+
+    def octetsParCle(self):
+        """
+        Retourne la mémoire occupée par les tableaux, divisée par le nombre
+        de valeurs.
+        """
+        if self.estVide(): return 0
+        tableaux = (self.valeurs, self.g, self.d, self.p, self.couleurs, self.libres)
+        return sum(t.buffer_info()[1] * t.itemsize for t in tableaux) / self.taille
+
+    def _allouer(self, valeur, parent):
+        """
+        Retourne l'indice d'un nouveau noeud rouge, pris dans la liste libre
+        si possible.
+        """
+        if self.libres:
+            i = self.libres.pop()
+            self.valeurs[i] = valeur
+            self.g[i] = NIL
+            self.d[i] = NIL
+            self.p[i] = parent
+            self.couleurs[i] = ROUGE
+        else:
+            i = len(self.valeurs)
+            self.valeurs.append(valeur)
+            self.g.append(NIL)
+            self.d.append(NIL)
+            self.p.append(parent)
+            self.couleurs.append(ROUGE)
+        return i
+
+    def rechercher(self, valeur):
+        """
+        Retourne l'indice du noeud portant la valeur, NIL si elle est absente.
+        """
+        valeurs, g, d = self.valeurs, self.g, self.d
+        i = self.racine
+        while i != NIL:
+            v = valeurs[i]
+            if   valeur > v: i = d[i]
+            elif valeur < v: i = g[i]
+            else: return i
+        return NIL
+
+    def __contains__(self, valeur):
+        return self.rechercher(valeur) != NIL
+
+    def _insererABR(self, valeur):
+        """
+        Insère la valeur comme dans un ABR et retourne l'indice du nouveau
+        noeud, NIL si la valeur est déjà présente.
+        """
+        valeurs, g, d = self.valeurs, self.g, self.d
+        parent, i = NIL, self.racine
+        while i != NIL:
+            parent = i
+            v = valeurs[i]
+            if   valeur > v: i = d[i]
+            elif valeur < v: i = g[i]
+            else: return NIL
+
+        i = self._allouer(valeur, parent)
+        if parent == NIL:               self.racine = i
+        elif valeur > valeurs[parent]:  self.d[parent] = i
+        else:                           self.g[parent] = i
+        self.taille += 1
+        return i
+
+    def inserer(self, valeur):
+        """
+        Insère une valeur en respectant la structure d'ABR.
+        Ne réquilibre pas.
+        """
+        i = self._insererABR(valeur)
+        if i == self.racine: self.couleurs[i] = NOIR
+
+    def insererRN(self, valeur):
+        """
+        Insère une valeur en respectant la structure d'ABR.
+        Rééquilibre en tenant compte de la structure d'arbre RN.
+        """
+        i = self._insererABR(valeur)
+        if i == NIL: return
+
+        # Corrections: voir NoeudRN.corrigerInsertion()
+        g, d, p, couleurs = self.g, self.d, self.p, self.couleurs
+        while i != self.racine and couleurs[p[i]] == ROUGE:
+            pi = p[i]
+            gpi = p[pi]
+            if pi == g[gpi]:
+                oncle = d[gpi]
+                if couleurs[oncle] == ROUGE:    # Cas 1
+                    couleurs[pi] = couleurs[oncle] = NOIR
+                    couleurs[gpi] = ROUGE
+                    i = gpi
+                    continue
+                if i == d[pi]:                  # Cas 2-2
+                    i = pi
+                    self.rotationGauche(i)
+                    pi = p[i]
+                couleurs[pi] = NOIR             # Cas 2-1
+                couleurs[gpi] = ROUGE
+                self.rotationDroite(gpi)
+            else:
+                oncle = g[gpi]
+                if couleurs[oncle] == ROUGE:
+                    couleurs[pi] = couleurs[oncle] = NOIR
+                    couleurs[gpi] = ROUGE
+                    i = gpi
+                    continue
+                if i == g[pi]:
+                    i = pi
+                    self.rotationDroite(i)
+                    pi = p[i]
+                couleurs[pi] = NOIR
+                couleurs[gpi] = ROUGE
+                self.rotationGauche(gpi)
+            break
+        couleurs[self.racine] = NOIR
+
+    def insererRNLot(self, valeurs):
+        """
+        Insère les valeurs du lot une à une, dans l'ordre croissant.
+        """
+        for valeur in sorted(set(valeurs)):
+            self.insererRN(valeur)
+
+    def _liberer(self, i):
+        """
+        Rend l'indice i à la liste libre.
+        """
+        self.libres.append(i)
+
+    def _transplanter(self, u, v):
+        """
+        Remplace le sous-arbre de racine u par celui de racine v. Le parent
+        de NIL peut être modifié, comme dans corrigerSuppression().
+        """
+        p = self.p
+        if p[u] == NIL:          self.racine = v
+        elif u == self.g[p[u]]:  self.g[p[u]] = v
+        else:                    self.d[p[u]] = v
+        p[v] = p[u]
+
+    def supprimerRN(self, valeur):
+        """
+        Supprime une valeur et rééquilibre, comme NoeudRN.supprimerRN().
+        Lève KeyError si la valeur est absente.
+        """
+        z = self.rechercher(valeur)
+        if z == NIL:
+            raise KeyError(valeur)
+        self.supprimerIndice(z)
+
+    def discard(self, valeur):
+        z = self.rechercher(valeur)
+        if z != NIL:
+            self.supprimerIndice(z)
+
+    def pop(self, valeur=None):
+        """
+        Supprime et retourne la valeur, ou la plus petite valeur de l'arbre
+        si aucune n'est précisée, comme NoeudRN.pop().
+        """
+        if valeur is None:
+            if self.estVide():
+                raise KeyError('pop dans un arbre vide')
+            z = self.racine
+            while self.g[z] != NIL: z = self.g[z]
+        else:
+            z = self.rechercher(valeur)
+            if z == NIL:
+                raise KeyError(valeur)
+        valeur = self.valeurs[z]
+        self.supprimerIndice(z)
+        return valeur
+
+    def supprimerIndice(self, z):
+        """
+        Retire le noeud d'indice z et rend son indice à la liste libre.
+        Contrairement à NoeudRN.supprimerNoeud(), le successeur est déplacé
+        à la place de z, si bien que les autres indices restent valides.
+        """
+        g, d, p, couleurs = self.g, self.d, self.p, self.couleurs
+        y, couleurRetiree = z, couleurs[z]
+        if g[z] == NIL:
+            x = d[z]
+            self._transplanter(z, x)
+        elif d[z] == NIL:
+            x = g[z]
+            self._transplanter(z, x)
+        else:
+            y = d[z]
+            while g[y] != NIL: y = g[y]
+            couleurRetiree = couleurs[y]
+            x = d[y]
+            if p[y] == z:
+                p[x] = y
+            else:
+                self._transplanter(y, x)
+                d[y] = d[z]
+                p[d[y]] = y
+            self._transplanter(z, y)
+            g[y] = g[z]
+            p[g[y]] = y
+            couleurs[y] = couleurs[z]
+
+        if couleurRetiree == NOIR:
+            self._corrigerSuppression(x)
+        self.taille -= 1
+        self._liberer(z)
+
+    def _corrigerSuppression(self, x):
+        """
+        Voir NoeudRN.corrigerSuppression().
+        """
+        g, d, p, couleurs = self.g, self.d, self.p, self.couleurs
+        while x != self.racine and couleurs[x] == NOIR:
+            px = p[x]
+            if x == g[px]:
+                f = d[px]
+                if couleurs[f] == ROUGE:                            # Cas 1
+                    couleurs[f] = NOIR
+                    couleurs[px] = ROUGE
+                    self.rotationGauche(px)
+                    f = d[px]
+                if couleurs[g[f]] == NOIR and couleurs[d[f]] == NOIR:  # Cas 2
+                    couleurs[f] = ROUGE
+                    x = px
+                    continue
+                if couleurs[d[f]] == NOIR:                          # Cas 3
+                    couleurs[g[f]] = NOIR
+                    couleurs[f] = ROUGE
+                    self.rotationDroite(f)
+                    f = d[px]
+                couleurs[f] = couleurs[px]                          # Cas 4
+                couleurs[px] = NOIR
+                couleurs[d[f]] = NOIR
+                self.rotationGauche(px)
+            else:
+                f = g[px]
+                if couleurs[f] == ROUGE:
+                    couleurs[f] = NOIR
+                    couleurs[px] = ROUGE
+                    self.rotationDroite(px)
+                    f = g[px]
+                if couleurs[g[f]] == NOIR and couleurs[d[f]] == NOIR:
+                    couleurs[f] = ROUGE
+                    x = px
+                    continue
+                if couleurs[g[f]] == NOIR:
+                    couleurs[d[f]] = NOIR
+                    couleurs[f] = ROUGE
+                    self.rotationGauche(f)
+                    f = g[px]
+                couleurs[f] = couleurs[px]
+                couleurs[px] = NOIR
+                couleurs[g[f]] = NOIR
+                self.rotationDroite(px)
+            break
+        couleurs[x] = NOIR
+
+    def rotationGauche(self, b):
+        """
+        Rotation gauche autour du noeud d'indice b
+        (notations de NoeudRN.rotationGauche()).
+        """
+        g, d, p = self.g, self.d, self.p
+        dd = d[b]
+        d[b] = g[dd]
+        if g[dd] != NIL: p[g[dd]] = b
+        p[dd] = p[b]
+        if p[b] == NIL:      self.racine = dd
+        elif b == g[p[b]]:   g[p[b]] = dd
+        else:                d[p[b]] = dd
+        g[dd] = b
+        p[b] = dd
+
+    def rotationDroite(self, dd):
+        """
+        Rotation droite autour du noeud d'indice dd
+        (notations de NoeudRN.rotationDroite()).
+        """
+        g, d, p = self.g, self.d, self.p
+        b = g[dd]
+        g[dd] = d[b]
+        if d[b] != NIL: p[d[b]] = dd
+        p[b] = p[dd]
+        if p[dd] == NIL:     self.racine = b
+        elif dd == d[p[dd]]: d[p[dd]] = b
+        else:                g[p[dd]] = b
+        d[b] = dd
+        p[dd] = b
+
+    def calculerHauteur(self):
+        """
+        Même convention que NoeudRN.calculerHauteur(). Parcours itératif.
+        """
+        if self.estVide(): return 0
+        g, d = self.g, self.d
+        hauteur = 0
+        P = [(self.racine, 0)]
+        while P:
+            i, h = P.pop()
+            hauteur = max(hauteur, h)
+            if g[i] != NIL: P.append((g[i], h+1))
+            if d[i] != NIL: P.append((d[i], h+1))
+        return hauteur
+
+    def vue(self):
+        """
+        Retourne un NoeudRNTableau représentant la racine de l'arbre, qui
+        peut être utilisé partout où un NoeudRN est attendu pour la lecture
+        et l'affichage (tk_arbres.ArbreGraphique en particulier).
+        """
+        return NoeudRNTableau(self, self.racine)
+
+
+class NoeudRNTableau(ArbresRN.NoeudRNLecture):
+    """
+    Adaptateur présentant un noeud d'un ArbreRNTableau avec l'interface de
+    NoeudRN, afin de réutiliser les méthodes de parcours et de géométrie.
+
+     - les champs valeur, couleur, fg, fd et p sont lus dans les tableaux
+     - les fils sont créés à la demande puis conservés, pour que les
+       coordonnées calculées par calculerGeometrie() restent attachées
+       aux objets retournés par listeGenerations()
+     - comme pour NoeudRN, chaque feuille a ses propres fils vides
+     - seule la racine (obtenue par ArbreRNTableau.vue()) permet de
+       modifier l'arbre: inserer(), insererRN(), insererRNLot(),
+       supprimerRN(), discard() et pop() sont confiés à l'ArbreRNTableau;
+       les autres modifications lèvent TypeError (voir
+       ArbresRN.NoeudRNLecture)
+    """
+    def __init__(self, arbre, indice, parent=None):
+        self.arbre = arbre
+        self.indice = indice
+        self._p = parent
+        self._fg = None
+        self._fd = None
+        self.verbosite = 0
+
+    @property
+    def valeur(self):
+        if self.indice == NIL: return None
+        return self.arbre.valeurs[self.indice]
+
+    @property
+    def couleur(self):
+        return 'R' if self.arbre.couleurs[self.indice] == ROUGE else 'N'
+
+    @property
+    def p(self):
+        return self._p
+
+    @property
+    def fg(self):
+        if self.indice == NIL: return None
+        if self._fg is None:
+            self._fg = NoeudRNTableau(self.arbre, self.arbre.g[self.indice], self)
+        return self._fg
+
+    @property
+    def fd(self):
+        if self.indice == NIL: return None
+        if self._fd is None:
+            self._fd = NoeudRNTableau(self.arbre, self.arbre.d[self.indice], self)
+        return self._fd
+
+    def _resynchroniser(self):
+        self.indice = self.arbre.racine
@@ -0,0 +1,249 @@
+# coding: utf-8
+"""
+Mesures de performance des arbres rouge-noir.
+
+Chaque scénario est mesuré pour chaque moteur qui le permet et chaque
+taille: une exécution d'échauffement, puis plusieurs répétitions chronométrées
+(temps en secondes), et une exécution séparée sous tracemalloc pour le pic
+de mémoire (tracemalloc ralentit l'exécution: il ne fausse donc pas les
+temps). La préparation (tirage des valeurs, construction de l'arbre à
+parcourir...) n'est jamais chronométrée.
+
+Les résultats sont écrits en JSON pour comparer deux versions:
+    python bench_arbres.py --tailles 1000 10000 --sortie avant.json
+"""
+
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+import ArbresB
+import ArbresRN
+import ArbresRNTableau
+import svg_arbres
+
+"""
+Les moteurs, par nom: des fabriques d'arbres vides qui ont toutes une
+méthode insererRN().
+"""
+MOTEURS = {
+    'NoeudRN':        ArbresRN.NoeudRN,
+    'ArbreRNCompact': ArbresRN.ArbreRNCompact,
+    'ArbreRNTableau': ArbresRNTableau.ArbreRNTableau,
+    'ArbreB4':        ArbresB.ArbreB,
+    'ArbreB32':       lambda: ArbresB.ArbreB(32),
+}
+
+def valeursAleatoires(n):
+    return random.sample(range(10 * n), n)
+
+def valeursPresqueTriees(n, proportion=0.01):
+    """
+    Valeurs triées, dont une proportion de paires voisines est échangée.
+    """
+    valeurs = list(range(n))
+    for _ in range(int(n * proportion)):
+        i = random.randrange(n - 1)
+        valeurs[i], valeurs[i+1] = valeurs[i+1], valeurs[i]
+    return valeurs
+
+def construire(moteur, valeurs, statistiques=False):
+    arbre = MOTEURS[moteur]()
+    if statistiques: arbre.activerStatistiques()
+    for valeur in valeurs:
+        arbre.insererRN(valeur)
+    return arbre
+
+"""
+Un scénario prend le moteur et la taille, prépare ses données, et retourne
+la fonction à chronométrer (sans argument). Le résultat de cette fonction
+est ignoré, sauf pour les scénarios d'insertion: avec statistiques=True,
+elle retourne l'arbre construit avec ses compteurs activés.
+"""
+def scenarioInsertion(generer):
+    def scenario(moteur, n, statistiques=False):
+        valeurs = generer(n)
+        return lambda: construire(moteur, valeurs, statistiques)
+    return scenario
+
+def scenarioRecherche(moteur, n):
+    valeurs = valeursAleatoires(n)
+    # Autant de valeurs présentes que de valeurs absentes (impaires)
+    cherchees = [2 * v for v in random.sample(valeurs, n // 2)]
+    cherchees += [2 * v + 1 for v in random.sample(valeurs, n - n // 2)]
+    arbre = construire(moteur, [2 * v for v in valeurs])
+    def chercher():
+        for v in cherchees:
+            v in arbre
+    return chercher
+
+def scenarioParcours(moteur, n):
+    arbre = construire(moteur, valeursAleatoires(n))
+    return lambda: sum(1 for _ in arbre)
+
+def scenarioGenerations(moteur, n):
+    arbre = construire(moteur, valeursAleatoires(n))
+    return arbre.listeGenerations
+
+def scenarioGeometrie(disposition):
+    def scenario(moteur, n):
+        arbre = construire(moteur, valeursAleatoires(n))
+        arbre.setLargeurTotalePixels(1366)
+        arbre.setHauteurTotalePixels(676)
+        def calculer():
+            arbre.invaliderGeometrie()
+            arbre.calculerGeometrie(disposition=disposition)
+        return calculer
+    return scenario
+
+def scenarioEnsemble(operation):
+    def scenario(moteur, n):
+        # Deux arbres de n valeurs, qui en ont environ 10 % en commun
+        arbre = construire(moteur, valeursAleatoires(n))
+        autre = construire(moteur, valeursAleatoires(n))
+        return lambda: getattr(arbre, operation)(autre)
+    return scenario
+
+def scenarioRendu(moteur, n):
+    arbre = construire(moteur, valeursAleatoires(n))
+    def rendre():
+        svg_arbres.ecrireSVG(arbre, io.StringIO(), dessinerNIL=True)
+    return rendre
+
+"""
+Les scénarios, les moteurs qui les permettent, et ceux dont les compteurs
+sont relevés (voir NoeudRN.activerStatistiques()).
+"""
+TOUS = tuple(MOTEURS)
+INSTRUMENTES = ('NoeudRN',)
+SCENARIOS = {
+    'insertion_aleatoire':    (scenarioInsertion(valeursAleatoires),            TOUS, INSTRUMENTES),
+    'insertion_triee':        (scenarioInsertion(lambda n: list(range(n))),     TOUS, INSTRUMENTES),
+    'insertion_inverse':      (scenarioInsertion(lambda n: list(range(n, 0, -1))), TOUS, INSTRUMENTES),
+    'insertion_presque_triee': (scenarioInsertion(valeursPresqueTriees),         TOUS, INSTRUMENTES),
+    'recherche':              (scenarioRecherche,   ('NoeudRN', 'ArbreRNCompact', 'ArbreRNTableau', 'ArbreB4', 'ArbreB32'), ()),
+    'parcours':               (scenarioParcours,    ('NoeudRN', 'ArbreRNCompact', 'ArbreB4', 'ArbreB32'), ()),
+    'listeGenerations':       (scenarioGenerations, ('NoeudRN',), ()),
+    'geometrie':              (scenarioGeometrie('generations'), ('NoeudRN',), ()),
+    'geometrie_compacte':     (scenarioGeometrie('compacte'),    ('NoeudRN',), ()),
+    'rendu_svg':              (scenarioRendu,       ('NoeudRN',), ()),
+    'reunion':                (scenarioEnsemble('reunir'),      ('NoeudRN',), ()),
+    'intersection':           (scenarioEnsemble('intersecter'), ('NoeudRN',), ()),
+    'difference':             (scenarioEnsemble('soustraire'),  ('NoeudRN',), ()),
+}
+
+def mesurer(scenario, moteur, n, repetitions=5, memoire=True):
+    """
+    Mesure un scénario: retourne un dictionnaire avec les temps des
+    répétitions, leur minimum, médiane et moyenne, le pic de mémoire
+    en octets (None si memoire est faux) et les compteurs de l'arbre
+    construit (None si le moteur n'est pas instrumenté pour ce scénario).
+    Les compteurs sont relevés lors d'une exécution séparée.
+    """
+    fabrique, _, instrumentes = SCENARIOS[scenario]
+
+    # Échauffement
+    fabrique(moteur, n)()
+
+    temps = []
+    for _ in range(repetitions):
+        fonction = fabrique(moteur, n)
+        gc.collect()
+        t1 = time.perf_counter()
+        fonction()
+        t2 = time.perf_counter()
+        temps.append(t2 - t1)
+
+    pic = None
+    if memoire:
+        fonction = fabrique(moteur, n)
+        gc.collect()
+        tracemalloc.start()
+        fonction()
+        pic = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    statistiques = None
+    if moteur in instrumentes:
+        statistiques = fabrique(moteur, n, statistiques=True)().statistiques()
+
+    return {'scenario': scenario, 'moteur': moteur, 'n': n,
+            'temps': temps,
+            'min': min(temps),
+            'mediane': statistics.median(temps),
+            'moyenne': statistics.mean(temps),
+            'memoire_pic': pic,
+            'statistiques': statistiques}
+
+def afficherStatistiques(stats):
+    n = max(stats['insertions'], 1)
+    profondeurs = stats['profondeurs']
+    moyenne = sum(p * k for p, k in profondeurs.items()) / n
+    print('    par insertion: {:.2f} comparaisons, {:.2f} recolorations, '
+          '{:.2f} rotations (g {}, d {}), profondeur moyenne {:.2f}, max {}'.format(
+          stats['comparaisons'] / n, stats['recolorations'] / n,
+          (stats['rotationsGauches'] + stats['rotationsDroites']) / n,
+          stats['rotationsGauches'], stats['rotationsDroites'],
+          moyenne, max(profondeurs, default=0)))
+    print('    cas 0: {}, cas 1: {}, cas 2-1: {}, cas 2-2: {}'.format(
+          stats['cas 0'], stats['cas 1'], stats['cas 2-1'], stats['cas 2-2']))
+
+def version():
+    """
+    Commit git courant, s'il y en a un.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def principal(arguments=None):
+    parseur = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parseur.add_argument('--tailles', type=int, nargs='+', default=[1000, 10000, 100000])
+    parseur.add_argument('--repetitions', type=int, default=5)
+    parseur.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parseur.add_argument('--moteurs', nargs='+', choices=MOTEURS, default=list(MOTEURS))
+    parseur.add_argument('--sans-memoire', action='store_true',
+                         help='ne pas mesurer le pic de mémoire')
+    parseur.add_argument('--graine', type=int, default=0)
+    parseur.add_argument('--sortie', help='fichier JSON des résultats')
+    args = parseur.parse_args(arguments)
+
+    resultats = []
+    for scenario in args.scenarios:
+        for moteur in SCENARIOS[scenario][1]:
+            if moteur not in args.moteurs: continue
+            for n in args.tailles:
+                random.seed(args.graine)
+                r = mesurer(scenario, moteur, n, args.repetitions, not args.sans_memoire)
+                resultats.append(r)
+                memoire = '' if r['memoire_pic'] is None else \
+                          ', pic {:.1f} Mo'.format(r['memoire_pic'] / 1e6)
+                print('{:24} {:15} n={:<8} min {:.4f} s, médiane {:.4f} s{}'.format(
+                      scenario, moteur, n, r['min'], r['mediane'], memoire))
+                if r['statistiques'] is not None:
+                    afficherStatistiques(r['statistiques'])
+
+    if args.sortie:
+        with open(args.sortie, 'w', encoding='utf-8') as f:
+            json.dump({'version': version(),
+                       'python': platform.python_version(),
+                       'plateforme': platform.platform(),
+                       'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'repetitions': args.repetitions,
+                       'resultats': resultats}, f, indent=1)
+        print('Résultats écrits dans {}'.format(args.sortie))
+    return resultats
+
+if __name__ == '__main__':
+    principal()
@@ -0,0 +1,252 @@
+# coding: utf-8
+"""
+Opérations ensemblistes et construction réparties sur plusieurs processus.
+
+NoeudRN.reunir(), intersecter() et soustraire() scindent les arbres puis
+traitent les deux moitiés indépendamment. Ici, on scinde d'abord les deux
+arbres selon k - 1 valeurs pivots prises dans l'arbre 'autre': chaque paire
+de morceaux est combinée dans un processus, puis l'arbre est reconstruit
+en temps linéaire (NoeudRN.depuisTrie) à partir des valeurs obtenues.
+
+Les morceaux sont transmis aux processus par fork (copie à l'écriture)
+lorsque le système le permet, sinon sous forme de listes triées; seules les
+valeurs des résultats reviennent. Ces transferts et la reconstruction
+coûtent O(n + m) dans le processus principal: le mode parallèle ne se
+justifie que pour des arbres de plusieurs millions de valeurs, de tailles
+comparables. En dessous de 'seuil' valeurs dans l'arbre 'autre', l'opération
+est faite dans le processus courant.
+
+construire() répartit de même les valeurs par intervalles entre les
+processus, qui construisent chacun un sous-arbre et le renvoient sous forme
+compacte (NoeudRN.serialiser); les sous-arbres sont ensuite joints selon
+leur hauteur noire. La durée de chaque phase est mesurée, pour voir ce qui
+limite le gain:
+    python parallele_arbres.py 10000000 8
+
+Exemple:
+    parallele_arbres.reunir(arbre, autre, processus=4)
+"""
+
+import bisect
+import functools
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import ArbresRN
+
+# Nombre de valeurs de l'arbre 'autre' (ou de valeurs à insérer pour
+# construire) en dessous duquel on ne parallélise pas
+seuil = 1000000
+
+# Morceaux à traiter, hérités par les processus créés par fork
+_morceaux = None
+
+def _traiter(tache):
+    fonction, i, donnees, deballer = tache
+    if i is not None:       morceau = _morceaux[i]
+    elif deballer is None:  morceau = donnees
+    else:                   morceau = deballer(donnees)
+    return fonction(morceau)
+
+def _repartir(fonction, morceaux, processus, emballer=None, deballer=None):
+    """
+    Retourne [fonction(m) for m in morceaux], calculé par un pool de
+    processus. Avec fork, les processus héritent des morceaux; sinon chaque
+    morceau leur est envoyé, sous la forme emballer(m) s'il le faut, et
+    reconstruit par deballer().
+    """
+    global _morceaux
+    if 'fork' in multiprocessing.get_all_start_methods():
+        contexte = multiprocessing.get_context('fork')
+        taches = [(fonction, i, None, None) for i in range(len(morceaux))]
+        _morceaux = morceaux
+    else:
+        contexte = multiprocessing.get_context()
+        taches = [(fonction, None, emballer(m) if emballer else m, deballer)
+                  for m in morceaux]
+    try:
+        with contexte.Pool(min(processus, len(morceaux))) as pool:
+            return pool.map(_traiter, taches)
+    finally:
+        _morceaux = None
+
+def _combinerMorceau(operation, morceau):
+    arbre, autre = morceau
+    getattr(arbre, operation)(autre)
+    return [noeud.valeur for noeud in arbre._noeudsEnOrdre()]
+
+def _emballerPaire(morceau):
+    arbre, autre = morceau
+    return type(arbre), arbre.serialiser(), autre.serialiser()
+
+def _deballerPaire(donnees):
+    classe, forme, formeAutre = donnees
+    return classe.deserialiser(*forme), classe.deserialiser(*formeAutre)
+
+def pivots(arbre, k):
+    """
+    Retourne au plus k - 1 valeurs croissantes de l'arbre, qui le partagent
+    en morceaux de tailles voisines, sans parcourir tout l'arbre: on ne
+    visite que ses premières générations, et chaque sous-arbre laissé de
+    côté, de hauteur noire h, est compté pour 2^h valeurs.
+    """
+    profondeur = max(k - 1, 1).bit_length() + 4
+    elements = []  # (valeur ou None, poids), dans l'ordre infixe
+    P = [(arbre, 0, False)]
+    while P:
+        noeud, g, vu = P.pop()
+        if vu or noeud.estVide():
+            elements.append((noeud.valeur, 1 if vu else 0))
+        elif g == profondeur:
+            elements.append((None, 2**noeud._hauteurNoire()))
+        else:
+            P.append((noeud.fd, g + 1, False))
+            P.append((noeud, g, True))
+            P.append((noeud.fg, g + 1, False))
+
+    total = sum(poids for _, poids in elements)
+    valeurs, cumul = [], 0
+    for valeur, poids in elements:
+        cumul += poids
+        if valeur is not None and cumul >= total * (len(valeurs) + 1) / k:
+            valeurs.append(valeur)
+            if len(valeurs) == k - 1: break
+    return valeurs
+
+def combiner(arbre, autre, operation, processus=None):
+    """
+    Applique arbre.operation(autre), operation valant 'reunir',
+    'intersecter' ou 'soustraire', en répartissant le travail sur
+    'processus' processus (par défaut, un par coeur). Comme pour NoeudRN,
+    l'arbre 'autre' est vidé.
+
+    Seules les valeurs passent d'un processus à l'autre: lève TypeError
+    pour un DictionnaireRN, dont les clés et données seraient perdues.
+    """
+    if isinstance(arbre, ArbresRN.DictionnaireRN) or isinstance(autre, ArbresRN.DictionnaireRN):
+        raise TypeError('Les opérations réparties ne conservent pas les données des DictionnaireRN')
+    if processus is None: processus = os.cpu_count() or 1
+    valeursPivots = []
+    if processus >= 2 and not autre._estPlusPetitQue(seuil):
+        valeursPivots = pivots(autre, processus)
+    if not valeursPivots:
+        getattr(arbre, operation)(autre)
+        return
+
+    # Découpage des deux arbres selon les mêmes pivots, qui sont tous dans
+    # 'autre'; scinder() vide au passage les deux arbres.
+    morceaux, dansArbre = [], []
+    resteArbre, resteAutre = arbre, autre
+    for pivot in valeursPivots:
+        gauche, present, resteArbre = resteArbre.scinder(pivot)
+        gaucheAutre, _, resteAutre = resteAutre.scinder(pivot)
+        morceaux.append((gauche, gaucheAutre))
+        dansArbre.append(present)
+    morceaux.append((resteArbre, resteAutre))
+
+    resultats = _repartir(functools.partial(_combinerMorceau, operation), morceaux,
+                          processus, _emballerPaire, _deballerPaire)
+
+    def valeurs():
+        for i, resultat in enumerate(resultats):
+            yield from resultat
+            if i < len(valeursPivots):
+                if operation == 'reunir' or (operation == 'intersecter' and dansArbre[i]):
+                    yield valeursPivots[i]
+    arbre.reunir(type(arbre).depuisTrie(valeurs()))
+
+def reunir(arbre, autre, processus=None):
+    combiner(arbre, autre, 'reunir', processus)
+
+def intersecter(arbre, autre, processus=None):
+    combiner(arbre, autre, 'intersecter', processus)
+
+def soustraire(arbre, autre, processus=None):
+    combiner(arbre, autre, 'soustraire', processus)
+
+def _construireMorceau(classe, valeurs):
+    debut = time.perf_counter()
+    forme = classe.depuisTrie(valeurs, trier=True).serialiser()
+    return forme, time.perf_counter() - debut
+
+def construire(valeurs, processus=None, classe=ArbresRN.NoeudRN):
+    """
+    Construit un arbre rouge-noir à partir de valeurs quelconques (dans le
+    désordre, avec d'éventuels doublons), en répartissant le travail sur
+    'processus' processus. Retourne (arbre, temps), temps donnant la durée
+    en secondes de chaque phase:
+     - 'partition': choix de pivots dans un échantillon des valeurs, et
+       répartition des valeurs par intervalles entre les pivots
+     - 'construction': la plus longue des constructions des sous-arbres
+       (tri, depuisTrie(), serialiser()), faites en parallèle
+     - 'transfert': le reste du temps passé dans le pool (processus,
+       envoi des valeurs et retour des formes compactes), et
+       deserialiser() dans ce processus
+     - 'assemblage': jointure des sous-arbres selon leur hauteur noire
+       (joindre), les pivots servant de séparateurs
+
+    En dessous de 'seuil' valeurs (ou sans aucune valeur), l'arbre est
+    construit ici par depuisTrie(valeurs, trier=True), compté comme
+    construction.
+
+    'classe' ne peut pas être DictionnaireRN (TypeError): ses noeuds
+    portent des clés et des données, pas de simples valeurs.
+    """
+    if issubclass(classe, ArbresRN.DictionnaireRN):
+        raise TypeError('construire() ne construit que des arbres de valeurs')
+    if processus is None: processus = os.cpu_count() or 1
+    if not isinstance(valeurs, (list, tuple)): valeurs = list(valeurs)
+    temps = dict.fromkeys(('partition', 'construction', 'transfert', 'assemblage'), 0.0)
+
+    debut = time.perf_counter()
+    if processus < 2 or not valeurs or len(valeurs) < seuil:
+        arbre = classe.depuisTrie(valeurs, trier=True)
+        temps['construction'] = time.perf_counter() - debut
+        return arbre, temps
+
+    # Les pivots, tirés parmi les valeurs, ne sont mis dans aucun morceau
+    echantillon = sorted(set(random.sample(valeurs, min(len(valeurs), 100 * processus))))
+    pas = len(echantillon) / processus
+    separateurs = sorted({echantillon[int(pas * i)] for i in range(1, processus)})
+    morceaux = [[] for _ in range(len(separateurs) + 1)]
+    ajouts = [morceau.append for morceau in morceaux]
+    n = len(separateurs)
+    for valeur in valeurs:
+        i = bisect.bisect_left(separateurs, valeur)
+        if i == n or separateurs[i] != valeur: ajouts[i](valeur)
+    fin = time.perf_counter()
+    temps['partition'] = fin - debut
+
+    debut = fin
+    resultats = _repartir(functools.partial(_construireMorceau, classe), morceaux, processus)
+    del morceaux, ajouts
+    arbres = [classe.deserialiser(*forme) for forme, _ in resultats]
+    fin = time.perf_counter()
+    temps['construction'] = max(duree for _, duree in resultats)
+    temps['transfert'] = fin - debut - temps['construction']
+
+    debut = fin
+    arbre = arbres[0]
+    for separateur, suivant in zip(separateurs, arbres[1:]):
+        arbre = classe.joindre(arbre, separateur, suivant)
+    temps['assemblage'] = time.perf_counter() - debut
+    return arbre, temps
+
+if __name__ == '__main__':
+    # python parallele_arbres.py [nombre de valeurs] [processus]
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    processus = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    valeurs = [random.randrange(10 * n) for _ in range(n)]
+
+    debut = time.perf_counter()
+    ArbresRN.NoeudRN.depuisTrie(valeurs, trier=True)
+    print('depuisTrie(trier=True): {:.2f} s'.format(time.perf_counter() - debut))
+
+    seuil = 0
+    arbre, temps = construire(valeurs, processus)
+    print('construire, {} processus: {:.2f} s'.format(processus, sum(temps.values())))
+    for phase, duree in temps.items():
+        print('  {:12} {:.2f} s'.format(phase, duree))
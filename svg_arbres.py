@@ -0,0 +1,183 @@
+# coding: utf-8
+"""
+Rendu des arbres sans Tk: export SVG, et PNG si Pillow est installé.
+
+Les coordonnées sont celles calculées par NoeudRN.calculerGeometrie(), comme
+pour tk_arbres, y compris le morphisme RN <-> 234 (paramètre t).
+
+Le document SVG est écrit au fil du parcours de l'arbre, élément par
+élément: la mémoire utilisée ne dépend que de la hauteur de l'arbre, pas de
+son nombre de noeuds.
+
+Exemple:
+    python svg_arbres.py 1000 arbre.svg
+"""
+
+import random
+import sys
+from xml.sax.saxutils import escape
+
+import ArbresRN
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:
+    Image = None
+
+# Mêmes couleurs que tk_arbres
+rouge = "#E53A40"
+noir  = "#090707"
+bleu  = "#30A9DE"
+jaune = "#EFDA05"
+
+# En dessous de ce rayon (en pixels), les valeurs ne sont pas écrites
+rayonTexteMin = 4
+
+def preparer(arbre, largeur, hauteur, disposition='generations'):
+    """
+    Calcule la géométrie de l'arbre pour une image de largeur x hauteur
+    pixels.
+    """
+    arbre.setLargeurTotalePixels(largeur)
+    arbre.setHauteurTotalePixels(hauteur)
+    arbre.calculerGeometrie(disposition=disposition)
+
+def elements(arbre, t=0, dessinerNIL=False, couleurs=True):
+    """
+    Génère les éléments graphiques de l'arbre pour la transition t, dont la
+    géométrie a été calculée (voir preparer): d'abord les arêtes, puis les
+    noeuds, pour que les noeuds soient dessinés par-dessus.
+
+     - ('arete', x1, y1, x2, y2)
+     - ('noeud', vide, x, y, r, couleur, texte), texte valant None si le
+       noeud est trop petit pour être lisible
+
+    Avec couleurs=False, tous les noeuds sont noirs (mode ABR de tk_arbres).
+    """
+    for aretes in (True, False):
+        P = [arbre]
+        while P:
+            noeud = P.pop()
+            if noeud.fg is not None:
+                P.append(noeud.fd)
+                P.append(noeud.fg)
+            vide = noeud.estVide()
+            if vide and not dessinerNIL:
+                continue
+
+            x, y = noeud.xMorphisme(t), noeud.yMorphisme(t)
+            if aretes:
+                if not noeud.estRacine():
+                    yield ('arete', x, y, noeud.p.xMorphisme(t), noeud.p.yMorphisme(t))
+                continue
+
+            r = noeud.rMorphisme(t)
+            couleur = rouge if couleurs and noeud.couleur == 'R' else noir
+            texte = 'NIL' if vide else str(noeud.valeur)
+            if vide:
+                r -= r / 1.5
+            yield ('noeud', vide, x, y, r, couleur,
+                   texte if r >= rayonTexteMin else None)
+
+def ecrireSVG(arbre, fichier, largeur=1366, hauteur=676, t=0,
+              dessinerNIL=False, couleurs=True, disposition='generations',
+              geometrie=True):
+    """
+    Écrit l'arbre au format SVG dans fichier (un nom ou un fichier texte
+    ouvert). Si geometrie est faux, la géométrie déjà calculée est utilisée
+    telle quelle.
+    """
+    if isinstance(fichier, str):
+        with open(fichier, 'w', encoding='utf-8') as f:
+            ecrireSVG(arbre, f, largeur, hauteur, t, dessinerNIL, couleurs,
+                      disposition, geometrie)
+        return
+
+    if geometrie: preparer(arbre, largeur, hauteur, disposition)
+
+    ecrire = fichier.write
+    ecrire('<svg xmlns="http://www.w3.org/2000/svg" width="{0}" height="{1}" '
+           'viewBox="0 0 {0} {1}">\n'.format(largeur, hauteur))
+    ecrire('<rect width="100%" height="100%" fill="{}"/>\n'.format(bleu))
+    ecrire('<g stroke="{}" stroke-width="1.5">\n'.format(noir))
+    aretes = True
+    for e in elements(arbre, t, dessinerNIL, couleurs):
+        if e[0] == 'arete':
+            ecrire('<line x1="{:.2f}" y1="{:.2f}" x2="{:.2f}" y2="{:.2f}"/>\n'.format(*e[1:]))
+            continue
+        if aretes:
+            ecrire('</g>\n<g text-anchor="middle" dominant-baseline="central" '
+                   'font-family="sans-serif" fill="{}">\n'.format(jaune))
+            aretes = False
+
+        _, vide, x, y, r, couleur, texte = e
+        if vide:
+            ecrire('<rect x="{:.2f}" y="{:.2f}" width="{:.2f}" height="{:.2f}" fill="{}"/>\n'
+                   .format(x - r, y - r, 2 * r, 2 * r, couleur))
+        else:
+            ecrire('<circle cx="{:.2f}" cy="{:.2f}" r="{:.2f}" fill="{}"/>\n'
+                   .format(x, y, r, couleur))
+        if texte is not None:
+            ecrire('<text x="{:.2f}" y="{:.2f}" font-size="{:.1f}">{}</text>\n'
+                   .format(x, y, min(r, 15) * 0.8, escape(texte)))
+    ecrire('</g>\n</svg>\n')
+
+def ecrirePNG(arbre, fichier, largeur=1366, hauteur=676, t=0,
+              dessinerNIL=False, couleurs=True, disposition='generations',
+              geometrie=True):
+    """
+    Même rendu que ecrireSVG(), en image PNG. Nécessite Pillow.
+    """
+    if Image is None:
+        raise ImportError('ecrirePNG() nécessite Pillow (pip install Pillow)')
+
+    if geometrie: preparer(arbre, largeur, hauteur, disposition)
+
+    image = Image.new('RGB', (int(largeur), int(hauteur)), bleu)
+    dessin = ImageDraw.Draw(image)
+    for e in elements(arbre, t, dessinerNIL, couleurs):
+        if e[0] == 'arete':
+            dessin.line(e[1:], fill=noir, width=1)
+            continue
+        _, vide, x, y, r, couleur, texte = e
+        boite = (x - r, y - r, x + r, y + r)
+        if vide: dessin.rectangle(boite, fill=couleur)
+        else:    dessin.ellipse(boite, fill=couleur)
+        if texte is not None:
+            dessin.text((x, y), texte, fill=jaune, anchor='mm')
+    image.save(fichier)
+
+def ecrireMorphisme(arbre, modele, images=25, largeur=1366, hauteur=676,
+                    dessinerNIL=False, disposition='generations', format='svg'):
+    """
+    Écrit les images du morphisme RN -> 234, de t = 0 à t = 1, dans les
+    fichiers modele.format(0), modele.format(1)... (par exemple
+    modele = 'morphisme_{:03d}.svg'). La géométrie n'est calculée qu'une
+    fois: chaque image n'est qu'une interpolation.
+
+    Retourne la liste des noms de fichiers.
+    """
+    ecrireImage = ecrirePNG if format == 'png' else ecrireSVG
+    preparer(arbre, largeur, hauteur, disposition)
+
+    noms = []
+    for i in range(images):
+        t = i / (images - 1) if images > 1 else 1
+        nom = modele.format(i)
+        ecrireImage(arbre, nom, largeur, hauteur, t, dessinerNIL,
+                    disposition=disposition, geometrie=False)
+        noms.append(nom)
+    return noms
+
+if __name__ == '__main__':
+    # python svg_arbres.py [nombre de valeurs] [fichier .svg ou .png]
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    nom = sys.argv[2] if len(sys.argv) > 2 else 'arbre.svg'
+
+    arbre = ArbresRN.NoeudRN()
+    for valeur in random.sample(range(10 * n), n):
+        arbre.insererRN(valeur)
+
+    if nom.endswith('.png'): ecrirePNG(arbre, nom)
+    else:                    ecrireSVG(arbre, nom)
+    print('{} valeurs -> {}'.format(n, nom))
@@ -0,0 +1,45 @@
+# coding: utf-8
+"""
+Tests des moteurs: python -m pytest test_arbres.py
+"""
+
+import itertools
+import random
+
+import ArbresRN
+import ArbresRNFichier
+import parallele_arbres
+
+
+def test_intervalle_fichier_comme_noeudRN(tmp_path):
+    random.seed(3)
+    valeurs = random.sample(range(200), 80)
+    arbre = ArbresRN.NoeudRN.depuisTrie(valeurs, trier=True)
+    chemin = str(tmp_path / 'arbre.arn')
+    ArbresRNFichier.sauvegarder(arbre, chemin)
+
+    bornes = [True, False] + list(itertools.product((True, False), repeat=2))
+    with ArbresRNFichier.ArbreRNFichier(chemin) as fichier:
+        for a, b in [(-5, 250), (10, 10), (10, 11), (40, 120), (120, 40), (199, 300)]:
+            for inclureBornes in bornes:
+                attendu = list(arbre.intervalle(a, b, inclureBornes))
+                assert list(fichier.intervalle(a, b, inclureBornes)) == attendu
+
+
+def test_ecrivain_echec_garde_le_fichier(tmp_path):
+    chemin = str(tmp_path / 'arbre.arn')
+    ArbresRNFichier.sauvegarder(ArbresRN.NoeudRN.depuisTrie(range(10)), chemin)
+    try:
+        with ArbresRNFichier.EcrivainRN(chemin) as ecrivain:
+            ecrivain.ajouter(2)
+            ecrivain.ajouter(1)
+    except ValueError:
+        pass
+    assert list(ArbresRNFichier.charger(chemin)) == list(range(10))
+    assert [f.name for f in tmp_path.iterdir()] == ['arbre.arn']
+
+
+def test_construire_sans_valeurs(monkeypatch):
+    monkeypatch.setattr(parallele_arbres, 'seuil', 0)
+    arbre, temps = parallele_arbres.construire([], processus=4)
+    assert arbre.estVide() and list(arbre) == []
@@ -1,6 +1,12 @@
 from tkinter import *
+import ArbresB
 import ArbresRN
+import ArbresRNTableau
+import ArbresRNPersistant
+import math
 import random
+import sys
+import time
 
 rouge = "#E53A40"
 noir  = "#090707"
@@ -8,8 +14,14 @@ bleu  = "#30A9DE"
 jaune = "#EFDA05"
 
 class ArbreGraphique:
-    def __init__(self,root):
+    def __init__(self,root,fabriqueArbre=ArbresRN.NoeudRN):
+        """
+        fabriqueArbre est appelée sans argument pour créer un arbre vide:
+        un NoeudRN, ou tout objet présentant la même interface (par exemple
+        la vue d'un ArbresRNTableau.ArbreRNTableau).
+        """
         self.root = root
+        self.fabriqueArbre = fabriqueArbre
         self.root.title( "Arbres rouges noirs" )
 
         #  Récupérer la résolution de l'écran
@@ -30,10 +42,14 @@ class ArbreGraphique:
         self.hauteurCanvas = self.coeffDimensionsY * self.hauteurEcran - self.YPad
         
         # L'arbre sous-jacent
-        self.arbre = ArbresRN.NoeudRN()
+        self.arbre = self.fabriqueArbre()
         self.arbre.setLargeurTotalePixels(self.largeurCanvas)
         self.arbre.setHauteurTotalePixels(self.hauteurCanvas)
 
+        # Historique des versions, pour annuler/rétablir avec le moteur
+        # persistant (voir ArbresRNPersistant)
+        self.initialiserHistorique()
+
         # Le conteneur pour le canvas
         self.conteneurHaut = Frame(self.root)
         self.conteneurHaut.pack(side = TOP)
@@ -43,13 +59,40 @@ class ArbreGraphique:
         self.conteneurBas = Frame(self.root)
         self.conteneurBas.pack(side = TOP)
 
-        # Le canvas sur lequel dessiner l'abre
+        # Le canvas sur lequel dessiner l'abre, avec ses barres de défilement
         self.canvas = Canvas(self.conteneurHaut, 
                              width=self.largeurCanvas,
                              height=self.hauteurCanvas,
                              background=bleu,
                              highlightbackground=bleu)
-        self.canvas.pack(padx=self.canvasPad,pady=self.canvasPad)
+        self.defilementX = Scrollbar(self.conteneurHaut, orient=HORIZONTAL, command=self.defilerX)
+        self.defilementY = Scrollbar(self.conteneurHaut, orient=VERTICAL,   command=self.defilerY)
+        self.canvas.configure(xscrollcommand=self.defilementX.set,
+                              yscrollcommand=self.defilementY.set)
+        self.canvas.grid(row=0, column=0, padx=self.canvasPad,pady=self.canvasPad)
+        self.defilementY.grid(row=0, column=1, sticky=N+S)
+        self.defilementX.grid(row=1, column=0, sticky=E+W)
+
+        # Les éléments du canvas, par noeud (voir dessiner)
+        self.noeuds = {}
+        self.aretes = {}
+        self.agregats = {}
+
+        # Zoom et niveau de détail
+        #  - zoomDetail: en dessous de ce zoom, un sous-arbre dont la largeur
+        #    à l'écran est inférieure à largeurAgregat pixels est résumé par
+        #    un triangle portant son nombre de noeuds et sa hauteur noire.
+        #    Avec None, les sous-arbres sont résumés tant que les valeurs des
+        #    noeuds ne sont pas lisibles.
+        #  - rayonTexteMin: en dessous de ce rayon à l'écran, les valeurs
+        #    ne sont pas écrites
+        self.zoom = 1
+        self.zoomMax = 4096
+        self.zoomDetail = None
+        self.largeurAgregat = 60
+        self.rayonTexteMin = 6
+        self.resumes = {}
+        self.ajusterRegion()
 
 
         # Le champ de saisie de la valeur à insérer dans l'arbre
@@ -59,6 +102,8 @@ class ArbreGraphique:
         self.champ = Entry(self.conteneurBas, textvariable=self.valeurNoeud, width = 5, justify='right')
         chaine = 'Appuyer sur Entrée pour insérer un nombre aléatoire ou saisir un nombre.'
         chaine += 'Flèche haut/bas en mode arbre RN.'
+        if self.historique:
+            chaine += ' Ctrl-Z/Ctrl-Y pour annuler/rétablir.'
         self.label = Label(self.conteneurBas, text=chaine )
 
         self.label.pack(side = LEFT, padx=20, pady=5)
@@ -75,6 +120,12 @@ class ArbreGraphique:
         self.boite = Checkbutton(self.conteneurBas, text='NIL', variable=self.booleenNIL, command=self.gererBoite)
         self.boite.pack(side = LEFT, pady=5)
 
+        # La boîte à cocher pour la disposition compacte (sans chevauchement)
+        self.booleenCompacte = IntVar()
+
+        self.boiteCompacte = Checkbutton(self.conteneurBas, text='Compacte', variable=self.booleenCompacte, command=self.gererBoite)
+        self.boiteCompacte.pack(side = LEFT, pady=5)
+
         # Les boutons radio pour choisir le type d'arbre
         self.modeSelectionne = StringVar()
         self.modeSelectionne.set('ABR')
@@ -92,67 +143,449 @@ class ArbreGraphique:
         # Morphisme RN <-> 234
         self.root.bind('<Up>',   self.gererHaut)
         self.root.bind('<Down>', self.gererBas)
+
+        # Annuler/rétablir une insertion
+        self.root.bind('<Control-z>', self.gererAnnuler)
+        self.root.bind('<Control-y>', self.gererRetablir)
         self.transition = 0
+
+        # Animation du morphisme (voir demarrerMorphisme)
+        #  - imagesParSeconde: fréquence visée
+        #  - dureeMorphisme: durée en secondes du passage de 0 à 1
+        self.imagesParSeconde = 60
+        self.dureeMorphisme = 1.0
+        # Mettre verbosite = 1 pour afficher le bilan de chaque morphisme
+        # (voir statistiquesAnimation)
+        self.verbosite = 0
+        self.animation = None
+        self.cible = 0
+        self.trajectoires = []
+        self.elementsAnimes = 0
+        self.durees = []
+        self.imagesSautees = 0
+
+        # Zoom à la molette, déplacement en faisant glisser
+        self.canvas.bind('<MouseWheel>', self.gererMolette)
+        self.canvas.bind('<Button-4>',   self.gererMolette)
+        self.canvas.bind('<Button-5>',   self.gererMolette)
+        self.canvas.bind('<ButtonPress-1>', lambda event: self.canvas.scan_mark(event.x, event.y))
+        self.canvas.bind('<B1-Motion>',     self.gererGlisser)
+        self.canvas.bind('<Configure>',     lambda event: self.dessiner())
         
-    def parcoursListe(self, fonction):
-        dessinerNIL = self.booleenNIL.get()
-        for g, gen in enumerate(self.liste):
-            for p, noeud in enumerate(gen):            
-                fonction(noeud,dessinerNIL)
+    """
+    Le canvas est en mode retenu: chaque noeud affiché garde sa forme et son
+    texte, chaque arête son segment, chaque sous-arbre résumé son triangle,
+    dans les dictionnaires self.noeuds, self.aretes et self.agregats indexés
+    par noeud. Redessiner ne crée que les éléments des nouveaux noeuds, ne
+    déplace que ceux dont les coordonnées ont changé et ne supprime que ceux
+    des noeuds qui ne sont plus affichés.
+
+    Seuls les noeuds de la région visible ont des éléments: le parcours de
+    dessiner() écarte tout sous-arbre dont la boîte englobante (voir
+    calculerResumes) est hors de la vue, et s'arrête aux sous-arbres résumés.
+    Son coût dépend donc de ce qui est à l'écran, pas de la taille de l'arbre.
+    Pendant un morphisme, les éléments sont seulement déplacés (voir
+    demarrerMorphisme).
+
+    Les coordonnées de l'arbre sont multipliées par self.zoom à l'écran.
+    """
+    def segmentArete(self, noeud):
+        t, z = self.transition, self.zoom
+        return (noeud.xMorphisme(t) * z, noeud.yMorphisme(t) * z,
+                noeud.p.xMorphisme(t) * z, noeud.p.yMorphisme(t) * z)
+
+    def boiteNoeud(self, noeud):
+        """
+        Retourne le rectangle englobant la forme du noeud et le centre de son
+        texte.
+        """
+        z = self.zoom
+        r = noeud.rMorphisme(self.transition) * z
+        x = noeud.xMorphisme(self.transition) * z
+        y = noeud.yMorphisme(self.transition) * z
+
+        if noeud.estVide():
+            r -= r / 1.5
+        return (x - r, y - r, x + r, y + r), (x, y)
+
+    def boiteResume(self, noeud):
+        """
+        Boîte englobante du sous-arbre de noeud pour la transition courante.
+        Les noeuds se déplacent en ligne droite: la boîte interpolée entre
+        celles des deux vues contient tous les noeuds.
+        """
+        b, b234 = self.resumes[noeud][2:]
+        t = self.transition
+        return [u + t * (v - u) for u, v in zip(b, b234)]
+
+    def triangleAgregat(self, noeud):
+        z = self.zoom
+        x0, y0, x1, y1 = self.boiteResume(noeud)
+        x, y = noeud.xMorphisme(self.transition) * z, noeud.yMorphisme(self.transition) * z
+        return (x, y, x1 * z, y1 * z, x0 * z, y1 * z), (x, (y + 2 * y1 * z) / 3)
 
     def dessinerArete(self,noeud,dessinerNIL=False):
         if not noeud.estRacine() and ( not noeud.estVide() or dessinerNIL ):
-            #self.canvas.create_line(noeud.x, noeud.y, noeud.p.x, noeud.p.y, fill=noir, width=1.5)
-            self.canvas.create_line(noeud.xMorphisme(self.transition),
-                                    noeud.yMorphisme(self.transition),
-                                    noeud.p.xMorphisme(self.transition),
-                                    noeud.p.yMorphisme(self.transition),
-                                    fill=noir, width=1.5)
+            segment = self.segmentArete(noeud)
+            element = self.aretes.get(noeud)
+            if element is None:
+                ligne = self.canvas.create_line(*segment, fill=noir, width=1.5, tags='arete')
+                self.aretes[noeud] = (ligne, segment)
+                self.nouvellesAretes = True
+            elif element[1] != segment:
+                self.canvas.coords(element[0], *segment)
+                self.aretes[noeud] = (element[0], segment)
+            self.aretesVues.add(noeud)
         
     def dessinerNoeud(self,noeud,dessinerNIL=False):
-        if self.modeSelectionne.get() == 'ABR':
-            couleurNoeud = noir
+        if noeud.estVide() and not dessinerNIL:
+            return
 
-        if self.modeSelectionne.get() == 'ARN':
-            couleurNoeud = noir if noeud.couleur == 'N' else rouge
-            
-        valeur = 'NIL'
+        if self.modeSelectionne.get() == 'ARN' and noeud.couleur == 'R':
+            couleurNoeud = rouge
+        else:
+            couleurNoeud = noir
 
+        vide = noeud.estVide()
+        texte = 'NIL' if vide else str(noeud.valeur)
+        boite, centre = self.boiteNoeud(noeud)
+        # Genre de l'élément: forme du noeud, et présence du texte
+        genre = (vide, boite[2] - boite[0] >= 2 * self.rayonTexteMin)
+
+        element = self.noeuds.get(noeud)
+        # Un noeud vide qui reçoit une valeur change de forme
+        if element is not None and element[2] != genre:
+            self.canvas.delete(element[0], *element[1])
+            element = None
+
+        if element is None:
+            creer = self.canvas.create_rectangle if vide else self.canvas.create_oval
+            forme = creer(*boite, fill=couleurNoeud, outline="")
+            etiquette = ()
+            if genre[1]:
+                etiquette = (self.canvas.create_text(*centre, text=texte, fill=jaune),)
+        else:
+            forme, etiquette, _, ancienneBoite, ancienTexte, ancienneCouleur = element
+            if boite != ancienneBoite:
+                self.canvas.coords(forme, *boite)
+                for e in etiquette: self.canvas.coords(e, *centre)
+            if texte != ancienTexte:
+                for e in etiquette: self.canvas.itemconfig(e, text=texte)
+            if couleurNoeud != ancienneCouleur:
+                self.canvas.itemconfig(forme, fill=couleurNoeud)
+        self.noeuds[noeud] = (forme, etiquette, genre, boite, texte, couleurNoeud)
+        self.noeudsVus.add(noeud)
+
+    def dessinerAgregat(self, noeud):
         """
-        r = noeud.r
-
-        x1, y1 = noeud.x - r, noeud.y - r
-        x2, y2 = noeud.x + r, noeud.y + r
+        Résume le sous-arbre de noeud par un triangle portant son nombre de
+        noeuds et sa hauteur noire.
+        """
+        triangle, centre = self.triangleAgregat(noeud)
+        taille, hauteurNoire = self.resumes[noeud][:2]
+        texte = '{}\nhn {}'.format(taille, hauteurNoire)
+
+        element = self.agregats.get(noeud)
+        if element is None:
+            forme = self.canvas.create_polygon(*triangle, fill=noir, outline=jaune)
+            etiquette = self.canvas.create_text(*centre, text=texte, fill=jaune)
+        else:
+            forme, etiquette, ancienTriangle, ancienTexte = element
+            if triangle != ancienTriangle:
+                self.canvas.coords(forme, *triangle)
+                self.canvas.coords(etiquette, *centre)
+            if texte != ancienTexte:
+                self.canvas.itemconfig(etiquette, text=texte)
+        self.agregats[noeud] = (forme, etiquette, triangle, texte)
+        self.agregatsVus.add(noeud)
+
+    def preparerTrajectoires(self):
+        """
+        Calcule une fois pour toutes, au début d'un morphisme, les
+        coordonnées à l'écran de chaque élément existant pour t = 0 et t = 1.
+        Les noeuds se déplaçant en ligne droite, une image de l'animation
+        n'est ensuite qu'une interpolation et un appel à coords() par
+        élément, sans recalcul de géométrie.
         """
-        r = noeud.rMorphisme(self.transition)
+        transition = self.transition
+        extremites = []
+        for t in (0, 1):
+            self.transition = t
+            coordonnees = []
+            for noeud, element in self.aretes.items():
+                coordonnees.append((element[0], self.segmentArete(noeud)))
+            for noeud, element in self.noeuds.items():
+                boite, centre = self.boiteNoeud(noeud)
+                coordonnees.append((element[0], boite))
+                for e in element[1]: coordonnees.append((e, centre))
+            for noeud, element in self.agregats.items():
+                triangle, centre = self.triangleAgregat(noeud)
+                coordonnees.append((element[0], triangle))
+                coordonnees.append((element[1], centre))
+            extremites.append(coordonnees)
+        self.transition = transition
+
+        return [(element, debut, fin)
+                for (element, debut), (_, fin) in zip(*extremites)]
+
+    def demarrerMorphisme(self, cible):
+        """
+        Anime le morphisme de la transition courante jusqu'à cible (0 ou 1),
+        avec root.after() à la fréquence imagesParSeconde.
+
+        La transition dépend du temps écoulé, pas du nombre d'images: si une
+        image dépasse son budget, les images intermédiaires sont sautées et
+        comptées dans imagesSautees. La durée de chaque image (interpolation
+        et rendu par Tk) est gardée dans durees, voir
+        statistiquesAnimation().
+        """
+        if self.animation is not None:
+            if cible == self.cible: return
+            self.root.after_cancel(self.animation)
+        elif self.transition == cible:
+            # Déjà arrivé: rien à faire, même à chaque répétition de la touche
+            return
+        else:
+            self.trajectoires = self.preparerTrajectoires()
+            self.elementsAnimes = len(self.trajectoires)
+            self.durees = []
+            self.imagesSautees = 0
+
+        self.depart = self.transition
+        self.cible = cible
+        self.debutAnimation = self.derniereImage = time.perf_counter()
+        self.animation = self.root.after(0, self.imageSuivante)
+
+    def imageSuivante(self):
+        debut = time.perf_counter()
+        budget = 1 / self.imagesParSeconde
+
+        # Créneaux passés sans image depuis la précédente
+        self.imagesSautees += max(int((debut - self.derniereImage) / budget) - 1, 0)
+        self.derniereImage = debut
+
+        duree = self.dureeMorphisme * abs(self.cible - self.depart)
+        u = min((debut - self.debutAnimation) / duree, 1) if duree > 0 else 1
+        t = self.depart + u * (self.cible - self.depart)
+        self.transition = t
+
+        for element, a, b in self.trajectoires:
+            self.canvas.coords(element, *[x + t * (y - x) for x, y in zip(a, b)])
+        self.canvas.update_idletasks()
+        self.durees.append(time.perf_counter() - debut)
+
+        if u < 1:
+            attente = budget - (time.perf_counter() - debut)
+            self.animation = self.root.after(max(int(attente * 1000), 1), self.imageSuivante)
+        else:
+            self.animation = None
+            self.bilanMorphisme()
+            # Les noeuds entrés dans la région visible apparaissent
+            self.dessiner()
+
+    def arreterMorphisme(self):
+        """
+        Interrompt l'animation en cours, qui passe directement à sa cible.
+        """
+        if self.animation is not None:
+            self.root.after_cancel(self.animation)
+            self.animation = None
+            self.transition = self.cible
+            self.bilanMorphisme()
+
+    def bilanMorphisme(self):
+        self.trajectoires = []
+        stats = self.statistiquesAnimation()
+        if stats['images'] and self.verbosite == 1:
+            print('Morphisme: {images} images, moyenne {moyenne:.2f} ms, '
+                  'p95 {p95:.2f} ms, {sautees} sautées, {elements} éléments'.format(**stats))
+
+    def statistiquesAnimation(self):
+        """
+        Statistiques du dernier morphisme: nombre d'images, durée moyenne et
+        95e centile d'une image en millisecondes, nombre d'images sautées, et
+        nombre d'éléments animés.
+        """
+        durees = sorted(self.durees)
+        n = len(durees)
+        return {'images':   n,
+                'moyenne':  1000 * sum(durees) / n if n else 0,
+                'p95':      1000 * durees[math.ceil(0.95 * n) - 1] if n else 0,
+                'sautees':  self.imagesSautees,
+                'elements': self.elementsAnimes}
+
+    def effacer(self):
+        self.canvas.delete("all")
+        self.noeuds = {}
+        self.aretes = {}
+        self.agregats = {}
 
-        x1, y1 = noeud.xMorphisme(self.transition) - r, noeud.yMorphisme(self.transition) - r
-        x2, y2 = noeud.xMorphisme(self.transition) + r, noeud.yMorphisme(self.transition) + r
+    def calculerResumes(self, racines=None):
+        """
+        Calcule pour chaque noeud le résumé de son sous-arbre, en remontant
+        des feuilles vers la racine:
+        (nombre de noeuds, hauteur noire, boîte englobante en vue ABR,
+        boîte englobante en vue 234). Une boîte est un tuple
+        (xmin, ymin, xmax, ymax) en coordonnées de l'arbre; elle contient
+        aussi le père, pour l'arête qui y mène.
+
+        racines est la liste retournée par calculerGeometrie(): seuls ces
+        sous-arbres et leurs ancêtres sont recalculés, les autres résumés
+        sont inchangés. Après une insertion, cela coûte donc autant que la
+        géométrie incrémentale, O(log n) en moyenne, au lieu de O(n). Par
+        défaut, ou si la racine en fait partie, tout est recalculé.
+        """
+        if racines is None or any(r is self.arbre for r in racines):
+            self.resumes = {}
+            racines = [self.arbre]
+
+        for racine in racines:
+            ordre = []
+            P = [racine]
+            while P:
+                noeud = P.pop()
+                ordre.append(noeud)
+                if noeud.fg is not None:
+                    P.append(noeud.fg)
+                    P.append(noeud.fd)
+            for noeud in reversed(ordre):
+                self.resumerNoeud(noeud)
+
+        # Un ancêtre commun à plusieurs racines est recalculé une fois par
+        # racine; le dernier calcul voit tous ses sous-arbres à jour.
+        for racine in racines:
+            noeud = racine.p
+            while noeud is not None:
+                self.resumerNoeud(noeud)
+                noeud = noeud.p
+
+    def resumerNoeud(self, noeud):
+        """
+        Résumé du sous-arbre de noeud, d'après ceux de ses fils.
+        """
+        # Marge pour les rayons des noeuds
+        m = max(ArbresRN.NoeudRN.rayon, ArbresRN.NoeudRN.rayon234)
+        p = noeud.p if noeud.p is not None else noeud
+        x, y, x234, y234 = noeud._x, noeud._y, noeud._x234, noeud._y234
+        b = (min(x, p._x) - m, min(y, p._y) - m,
+             max(x, p._x) + m, max(y, p._y) + m)
+        b234 = (min(x234, p._x234) - m, min(y234, p._y234) - m,
+                max(x234, p._x234) + m, max(y234, p._y234) + m)
+        if noeud.fg is None:
+            self.resumes[noeud] = (0, 0, b, b234)
+            return
+
+        tg, hg, bg, bg234 = self.resumes[noeud.fg]
+        td, hd, bd, bd234 = self.resumes[noeud.fd]
+        b = (min(b[0], bg[0], bd[0]), min(b[1], bg[1], bd[1]),
+             max(b[2], bg[2], bd[2]), max(b[3], bg[3], bd[3]))
+        b234 = (min(b234[0], bg234[0], bd234[0]), min(b234[1], bg234[1], bd234[1]),
+                max(b234[2], bg234[2], bd234[2]), max(b234[3], bg234[3], bd234[3]))
+        hauteurNoire = max(hg, hd) + (noeud.couleur == 'N')
+        self.resumes[noeud] = (tg + td + 1, hauteurNoire, b, b234)
+
+    def regionVisible(self):
+        """
+        Rectangle visible du canvas, en coordonnées de l'arbre.
+        """
+        z = self.zoom
+        x0, y0 = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        x1 = self.canvas.canvasx(self.canvas.winfo_width())
+        y1 = self.canvas.canvasy(self.canvas.winfo_height())
+        return x0 / z, y0 / z, x1 / z, y1 / z
 
-        if not noeud.estVide():
-            valeur = noeud.valeur
-            self.canvas.create_oval( x1, y1, x2, y2, fill=couleurNoeud, outline="")
-            self.canvas.create_text( x1+r, y1+r, text=str(valeur), fill=jaune)
-        elif dessinerNIL:
-            c = 1.5
-            self.canvas.create_rectangle( x1+r/c, y1+r/c, x2-r/c, y2-r/c, fill=couleurNoeud, outline="")
-            self.canvas.create_text( x1+r, y1+r, text=str(valeur), fill=jaune)
+    def ajusterRegion(self):
+        z = self.zoom
+        self.canvas.configure(scrollregion=(0, 0, self.largeurCanvas * z, self.hauteurCanvas * z))
 
     # Met à jour la géométrie de l'abre après l'ajourt d'un noeud
     def mettreAJour(self):
         """
-        Mise à jour de la liste et de la géométrie après l'ajout d'un noeud.
+        Mise à jour de la géométrie et des résumés après l'ajout d'un noeud.
         """
-        self.liste = self.arbre.listeGenerations() # On récupère le dernier état de l'arbre
-        self.arbre.calculerGeometrie(t=False) # ainsi que sa géométrie
+        disposition = 'compacte' if self.booleenCompacte.get() else 'generations'
+        racines = self.arbre.calculerGeometrie(t=False, disposition=disposition)
+        self.calculerResumes(racines)
 
     def dessiner(self):
-        # On efface tout le canvas
-        self.canvas.delete("all")
+        self.arreterMorphisme()
+        self.noeudsVus = set()
+        self.aretesVues = set()
+        self.agregatsVus = set()
+        self.nouvellesAretes = False
 
-        # On redessine tous
-        self.parcoursListe(self.dessinerArete)
-        self.parcoursListe(self.dessinerNoeud)
+        # On crée ou on met à jour les éléments des noeuds visibles
+        dessinerNIL = self.booleenNIL.get()
+        vx0, vy0, vx1, vy1 = self.regionVisible()
+        if self.zoomDetail is None:
+            resumer = self.arbre.rMorphisme(self.transition) * self.zoom < self.rayonTexteMin
+        else:
+            resumer = self.zoom < self.zoomDetail
+        P = [self.arbre]
+        while P:
+            noeud = P.pop()
+            x0, y0, x1, y1 = self.boiteResume(noeud)
+            if x1 < vx0 or x0 > vx1 or y1 < vy0 or y0 > vy1:
+                continue
+            self.dessinerArete(noeud, dessinerNIL)
+            if (resumer and self.resumes[noeud][0] > 1
+                and (x1 - x0) * self.zoom < self.largeurAgregat):
+                self.dessinerAgregat(noeud)
+                continue
+            self.dessinerNoeud(noeud, dessinerNIL)
+            if noeud.fg is not None:
+                P.append(noeud.fd)
+                P.append(noeud.fg)
+
+        # On supprime ceux des noeuds qui ne sont plus affichés
+        for noeud in [n for n in self.aretes if n not in self.aretesVues]:
+            self.canvas.delete(self.aretes.pop(noeud)[0])
+        for noeud in [n for n in self.noeuds if n not in self.noeudsVus]:
+            forme, etiquette = self.noeuds.pop(noeud)[:2]
+            self.canvas.delete(forme, *etiquette)
+        for noeud in [n for n in self.agregats if n not in self.agregatsVus]:
+            forme, etiquette = self.agregats.pop(noeud)[:2]
+            self.canvas.delete(forme, etiquette)
+
+        # Les arêtes restent sous les noeuds
+        if self.nouvellesAretes:
+            self.canvas.tag_lower('arete')
+
+    def zoomer(self, facteur, x, y):
+        """
+        Multiplie le zoom par facteur, en gardant fixe le point (x, y) de la
+        fenêtre du canvas.
+        """
+        ancien = self.zoom
+        self.zoom = min(max(ancien * facteur, 1), self.zoomMax)
+        if self.zoom == ancien:
+            return
+
+        # Position du point fixe, en coordonnées de l'arbre
+        ax = self.canvas.canvasx(x) / ancien
+        ay = self.canvas.canvasy(y) / ancien
+
+        self.ajusterRegion()
+        z = self.zoom
+        self.canvas.xview_moveto((ax * z - x) / (self.largeurCanvas * z))
+        self.canvas.yview_moveto((ay * z - y) / (self.hauteurCanvas * z))
+        self.dessiner()
+
+    def gererMolette(self, event):
+        if event.num == 4 or event.delta > 0: self.zoomer(1.25, event.x, event.y)
+        else:                                 self.zoomer(0.8,  event.x, event.y)
+
+    def gererGlisser(self, event):
+        self.canvas.scan_dragto(event.x, event.y, gain=1)
+        self.dessiner()
+
+    def defilerX(self, *args):
+        self.canvas.xview(*args)
+        self.dessiner()
+
+    def defilerY(self, *args):
+        self.canvas.yview(*args)
+        self.dessiner()
 
     def mettreAJourEtDessiner(self):
         self.mettreAJour()
@@ -171,11 +604,48 @@ class ArbreGraphique:
             self.arbre.inserer(valeur)
         if self.modeSelectionne.get() == 'ARN':
             self.arbre.insererRN(valeur)
+        self.enregistrerVersion()
             
         self.valeurNoeud.set(random.randrange(0,100))
 
         self.mettreAJourEtDessiner()
 
+    def initialiserHistorique(self):
+        """
+        Seuls les arbres persistants (qui ont un attribut version) ont un
+        historique: garder une version ne coûte qu'une référence.
+        """
+        self.historique = []
+        self.position = 0
+        if hasattr(self.arbre, 'version'):
+            self.historique.append(self.arbre.version)
+
+    def enregistrerVersion(self):
+        """
+        Ajoute la version courante à l'historique, en oubliant les versions
+        annulées qui la suivaient.
+        """
+        if not self.historique or self.arbre.version is self.historique[self.position]:
+            return
+        del self.historique[self.position+1:]
+        self.historique.append(self.arbre.version)
+        self.position += 1
+
+    def allerA(self, position):
+        if not 0 <= position < len(self.historique) or position == self.position:
+            return
+        self.arreterMorphisme()
+        self.position = position
+        self.arbre.restaurer(self.historique[position])
+        self.mettreAJourEtDessiner()
+
+    # Méthodes appelées par Ctrl-Z et Ctrl-Y
+    def gererAnnuler(self, event):
+        self.allerA(self.position - 1)
+
+    def gererRetablir(self, event):
+        self.allerA(self.position + 1)
+
     # Méthode appelée lorsque le bouton NIL est cliqué
     def gererBoite(self):
         self.mettreAJourEtDessiner()
@@ -183,25 +653,36 @@ class ArbreGraphique:
     # Methode appelée lorsque la flèche du haut est pressée
     def gererHaut(self,event):
         if self.modeSelectionne.get() == 'ARN':
-            self.transition += 0.02
-            if self.transition > 1: self.transition = 1
-            self.mettreAJourEtDessiner()
+            self.demarrerMorphisme(1)
 
     # Méthode appelée lorsque la flèche du bas est pressée
     def gererBas(self,event):
         if self.modeSelectionne.get() == 'ARN':
-            self.transition -= 0.02
-            if self.transition < 0: self.transition = 0
-            self.mettreAJourEtDessiner()
+            self.demarrerMorphisme(0)
 
     # Méhode appelée lorsque le bouton radio est préssé
     def gererBouton(self):
         print('Mode {}'.format(self.modeSelectionne.get()))
+        self.arreterMorphisme()
         if self.modeSelectionne.get() == 'ABR':
             self.transition = 0
-        self.canvas.delete("all")
-        self.arbre = ArbresRN.NoeudRN()
+        self.effacer()
+        self.arbre = self.fabriqueArbre()
+        self.initialiserHistorique()
+        self.mettreAJour()
         
-fenetre = Tk()
-ag = ArbreGraphique(fenetre)
-fenetre.mainloop()
+if __name__ == '__main__':
+    # 'python tk_arbres.py tableau' pour utiliser le moteur à tableaux,
+    # 'python tk_arbres.py persistant' pour le moteur persistant (Ctrl-Z/Ctrl-Y),
+    # 'python tk_arbres.py 234' pour le B-arbre d'ordre 4 (ArbresB)
+    fabrique = ArbresRN.NoeudRN
+    if 'tableau' in sys.argv[1:]:
+        fabrique = lambda: ArbresRNTableau.ArbreRNTableau().vue()
+    if 'persistant' in sys.argv[1:]:
+        fabrique = lambda: ArbresRNPersistant.ArbreRNPersistant().vue()
+    if '234' in sys.argv[1:]:
+        fabrique = lambda: ArbresB.ArbreB(4).vue()
+
+    fenetre = Tk()
+    ag = ArbreGraphique(fenetre, fabrique)
+    fenetre.mainloop()